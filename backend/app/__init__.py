@@ -5,9 +5,6 @@ Flask application factory
 from flask import Flask
 from flask_cors import CORS
 from app.config import Config
-import firebase_admin
-from firebase_admin import credentials
-import os
 
 
 def create_app(config_class=Config):
@@ -15,7 +12,18 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
-    # No persistent database is used. Authentication is handled by Firebase.
+    # orjson-backed JSON responses with NumPy support (stdlib fallback)
+    from app.json_provider import init_json
+    init_json(app)
+
+    # Profiles/history storage backend (in-memory or SQLite). Authentication
+    # is handled by Firebase.
+    from app.storage import init_storage
+    init_storage(app)
+
+    # Memory-mapped store for large batch projection runs
+    from app.result_store import init_result_store
+    init_result_store(app)
 
     # Enable CORS for frontend communication
     CORS(app, resources={
@@ -27,42 +35,50 @@ def create_app(config_class=Config):
         }
     })
 
-    # Initialize Firebase Admin SDK
-    try:
-        # Check if Firebase is already initialized
-        firebase_admin.get_app()
-    except ValueError:
-        # Try to use base64-encoded service account from environment variable (production)
-        service_account_base64 = os.environ.get('FIREBASE_SERVICE_ACCOUNT_BASE64')
+    # Firebase Admin SDK is imported and initialized on the first token
+    # verification in each worker (see app/firebase.py)
+
+    # Apply result and token cache limits
+    from app.cache import init_cache, get_cache
+    from app.auth import init_auth, token_cache
+    init_cache(app)
+    init_auth(app)
+
+    # Opt-in latency metrics (/metrics) and per-request sampling profiler
+    from app.metrics import init_metrics
+    init_metrics(app)
+
+    # Coalescing of identical concurrent calculator requests
+    from app.singleflight import init_singleflight, flights
+    init_singleflight(app)
+
+    # Per-client rate limits and admission control for calculator routes
+    from app.ratelimit import init_rate_limit, admission_stats
+    init_rate_limit(app)
 
-        if service_account_base64:
-            # Decode base64 and parse JSON
-            import base64
-            import json
-            service_account_json = base64.b64decode(service_account_base64)
-            service_account_dict = json.loads(service_account_json)
-            cred = credentials.Certificate(service_account_dict)
-            firebase_admin.initialize_app(cred)
-            print("✅ Firebase initialized from environment variable")
-        else:
-            # Fall back to file (for local development)
-            cred_path = os.path.join(os.path.dirname(__file__), '..', 'firebase-service-account.json')
-            if os.path.exists(cred_path):
-                cred = credentials.Certificate(cred_path)
-                firebase_admin.initialize_app(cred)
-                print("✅ Firebase initialized from file")
-            else:
-                print("⚠️ Warning: Firebase service account not configured. Authentication will not work.")
+    # Background jobs for long-running calculations
+    from app.jobs import init_jobs, get_job_manager
+    init_jobs(app)
 
     # Register blueprints
-    from app.routes import auth, calculator, user
+    from app.routes import auth, calculator, jobs, user
     app.register_blueprint(auth.bp)
     app.register_blueprint(calculator.bp)
     app.register_blueprint(user.bp)
+    app.register_blueprint(jobs.bp)
 
     # Health check route
     @app.route('/health')
     def health():
-        return {'status': 'healthy', 'service': 'RetireRight LK API'}, 200
+        return {
+            'status': 'healthy',
+            'service': 'RetireRight LK API',
+            'cache': get_cache('calculations').stats(),
+            'userCache': get_cache('users').stats(),
+            'tokenCache': token_cache.stats(),
+            'singleFlight': flights.stats(),
+            'jobs': get_job_manager().stats(),
+            'admission': admission_stats()
+        }, 200
 
     return app
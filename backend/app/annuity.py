@@ -0,0 +1,61 @@
+"""
+Shared compound-interest factors for the calculation functions
+
+All rates are annual percentages compounded monthly and all terms are whole
+months, matching how EPF interest is quoted and credited.
+"""
+import numpy as np
+
+
+def growth_factor(annual_rate: float, months: int) -> float:
+    """
+    Growth of 1 LKR over `months` months at an annual EPF rate
+
+    Args:
+        annual_rate: Annual interest rate in percent (compounded monthly)
+        months: Number of months
+
+    Returns:
+        (1 + annual_rate / 100 / 12) ** months
+    """
+    return (1 + annual_rate / 100 / 12) ** months
+
+
+def growth_factor_array(annual_rates: np.ndarray, months: int) -> np.ndarray:
+    """Vectorized growth_factor for an array of annual rates"""
+    return (1 + np.asarray(annual_rates, dtype=np.float64) / 100 / 12) ** months
+
+
+def accumulation_factor(annual_rate: float, months: int) -> float:
+    """
+    Future value of 1 LKR deposited at the end of each month
+
+    Args:
+        annual_rate: Annual interest rate in percent (compounded monthly)
+        months: Number of monthly deposits
+
+    Returns:
+        ((1 + r) ** months - 1) / r for the monthly rate r, or months at 0%
+    """
+    monthly_rate = annual_rate / 100 / 12
+    if monthly_rate == 0:
+        return float(months)
+    return ((1 + monthly_rate) ** months - 1) / monthly_rate
+
+
+def pmt_factor(annual_rate: float, months: int) -> float:
+    """
+    Level monthly payment that exhausts 1 LKR over `months` months
+
+    Args:
+        annual_rate: Annual interest rate in percent (compounded monthly)
+        months: Number of monthly payments
+
+    Returns:
+        r / (1 - (1 + r) ** -months) for the monthly rate r, or 1 / months
+        at 0%
+    """
+    monthly_rate = annual_rate / 100 / 12
+    if monthly_rate == 0:
+        return 1 / months
+    return monthly_rate / (1 - (1 + monthly_rate) ** -months)
@@ -0,0 +1,182 @@
+"""
+ASGI adapter for serving the Flask app under uvicorn
+
+Flask views stay synchronous and run unchanged. For each HTTP request the
+adapter:
+
+1. reads the body on the event loop
+2. for views wrapped in require_auth, verifies the bearer token with
+   verify_firebase_token_async, so a slow Firebase certificate fetch parks
+   a coroutine on the I/O pool instead of holding a request thread
+   (require_auth reuses the outcome). Other requests are not verified:
+   on the rate-limited calculator routes a forged token would otherwise
+   buy a verification ahead of admission
+3. runs the WSGI app on the bounded request pool, streaming the response
+   back as the view produces it
+
+A sync gunicorn worker is blocked for the whole of a slow verification;
+here the worker keeps serving other requests meanwhile.
+"""
+from app.auth import VERIFIED_TOKEN_ENVIRON_KEY, bearer_token, verify_firebase_token_async
+from app.executors import configure_executors, run_request, shutdown_executors
+from werkzeug.exceptions import HTTPException
+import asyncio
+import io
+import sys
+
+
+def _build_environ(scope, body):
+    """Translate an ASGI HTTP scope into a WSGI environ (PEP 3333)"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+
+    client = scope.get('client')
+    if client:
+        environ['REMOTE_ADDR'] = client[0]
+        environ['REMOTE_PORT'] = str(client[1])
+
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        if key in environ:
+            separator = '; ' if key == 'HTTP_COOKIE' else ','
+            environ[key] = environ[key] + separator + value
+        else:
+            environ[key] = value
+
+    return environ
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+class AsgiAdapter:
+    """
+    ASGI 3 application wrapping the Flask WSGI app
+
+    Args:
+        flask_app: Flask application from create_app; pool sizes are read
+            from its ASGI_IO_WORKERS and ASGI_REQUEST_WORKERS config
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        configure_executors(
+            io_workers=flask_app.config['ASGI_IO_WORKERS'],
+            request_workers=flask_app.config['ASGI_REQUEST_WORKERS']
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                shutdown_executors(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = await _read_body(receive)
+        if body is None:
+            return
+
+        environ = _build_environ(scope, body)
+        auth_header = environ.get('HTTP_AUTHORIZATION')
+        if auth_header and self._requires_auth(environ):
+            try:
+                token = bearer_token(auth_header)
+            except IndexError:
+                token = None
+            if token:
+                try:
+                    decoded_token = await verify_firebase_token_async(token)
+                except Exception as e:
+                    decoded_token = e
+                environ[VERIFIED_TOKEN_ENVIRON_KEY] = (token, decoded_token)
+
+        loop = asyncio.get_running_loop()
+
+        def send_from_thread(message):
+            # Blocks the request thread until the server accepted the chunk,
+            # which gives streamed responses backpressure
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        await run_request(self._run_wsgi, environ, send_from_thread)
+
+    def _requires_auth(self, environ):
+        """True if the request routes to a view wrapped in require_auth"""
+        try:
+            endpoint, _ = self.flask_app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return False  # 404, 405 or a redirect; nothing to verify for
+        return getattr(self.flask_app.view_functions.get(endpoint), 'requires_auth', False)
+
+    def _run_wsgi(self, environ, send_from_thread):
+        """Run the WSGI app on a request thread and forward its output"""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        def send_start():
+            response['sent'] = True
+            send_from_thread({
+                'type': 'http.response.start',
+                'status': response['status'],
+                'headers': response['headers']
+            })
+
+        result = self.flask_app(environ, start_response)
+        try:
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not response.get('sent'):
+                    send_start()
+                send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not response.get('sent'):
+                send_start()
+            send_from_thread({'type': 'http.response.body', 'body': b''})
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
@@ -3,16 +3,63 @@ Firebase Authentication middleware and utilities
 """
 from functools import wraps
 from flask import request, jsonify
-from firebase_admin import auth as firebase_auth
+from app.cache import LRUCache
+from app.firebase import get_firebase_app
+from app.metrics import timed
+from app.executors import run_io
+import hashlib
+import threading
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Decoded tokens keyed by SHA-256 of the raw token. Each entry expires at the
+# token's own `exp` claim. Limits are applied from Config by init_auth().
+token_cache = LRUCache(maxsize=10000, ttl=3600)
+_token_cache_settings = {'enabled': True}
 
+# Callable used to verify a raw ID token; None means the Admin SDK's
+# verify_id_token (imported on first use). Tests can install a local stub
+# signer's verifier with set_token_verifier() to avoid reaching Google.
+_token_verifier = None
+
+_cert_refresher = None
+_cert_refresher_lock = threading.Lock()
+_cert_refresher_settings = {'interval': 0}  # Seconds; 0 disables
+
+# WSGI environ key holding (token, decoded token or exception) when the ASGI
+# adapter already verified the request's token off the request thread
+VERIFIED_TOKEN_ENVIRON_KEY = 'retireright.verified_token'
+
+
+def set_token_verifier(verifier):
+    """
+    Replace the function used to verify ID tokens
+
+    Args:
+        verifier: Callable taking a raw token and returning its decoded
+            claims (must include "exp"), or None to restore the Firebase
+            Admin SDK verifier
+    """
+    global _token_verifier
+    _token_verifier = verifier
+    token_cache.clear()
+
+
+def _token_cache_key(id_token):
+    """Hash the token so raw credentials are never kept as cache keys"""
+    return hashlib.sha256(id_token.encode('utf-8')).hexdigest()
+
+
+@timed
 def verify_firebase_token(id_token):
     """
     Verify Firebase ID token and return decoded token
 
+    Tokens that were verified before are served from token_cache until their
+    own expiry, skipping signature verification.
+
     Args:
         id_token: Firebase ID token from client
 
@@ -22,13 +69,179 @@ def verify_firebase_token(id_token):
     Raises:
         Exception: If token verification fails
     """
+    use_cache = _token_cache_settings['enabled'] and isinstance(id_token, str)
+    if use_cache:
+        key = _token_cache_key(id_token)
+        decoded_token = token_cache.get(key)
+        if decoded_token is not None:
+            return decoded_token
+
     try:
-        decoded_token = firebase_auth.verify_id_token(id_token)
-        return decoded_token
+        verifier = _token_verifier or _verify_with_firebase
+        decoded_token = verifier(id_token)
     except Exception as e:
         logger.error(f"Token verification failed: {str(e)}")
         raise Exception(f"Invalid authentication token: {str(e)}")
 
+    if use_cache:
+        remaining = decoded_token.get('exp', 0) - time.time()
+        if remaining > 0:
+            token_cache.set(key, decoded_token, ttl=remaining)
+
+    return decoded_token
+
+
+def cached_token(id_token):
+    """
+    Return a token's decoded claims if token_cache already holds them
+
+    Never verifies the token, so it is cheap enough to call on requests
+    that have not been admitted yet.
+
+    Returns:
+        dict, or None if the token was not verified by this worker or its
+        cached entry expired
+    """
+    if not _token_cache_settings['enabled'] or not isinstance(id_token, str):
+        return None
+    return token_cache.get(_token_cache_key(id_token))
+
+
+def forget_token(id_token):
+    """
+    Drop a token from token_cache so its next use is verified again
+
+    Used on logout and account deletion; a token revoked in Firebase is
+    otherwise served from the cache until its own expiry. The cache is per
+    worker process.
+    """
+    if isinstance(id_token, str):
+        token_cache.delete(_token_cache_key(id_token))
+
+
+def _verify_with_firebase(id_token):
+    """Verify with the Admin SDK, setting it up on the first call"""
+    from firebase_admin import auth as firebase_auth
+
+    firebase_app = get_firebase_app()
+    if firebase_app is not None and _cert_refresher_settings['interval'] > 0:
+        start_certificate_refresher(_cert_refresher_settings['interval'])
+    return firebase_auth.verify_id_token(id_token, app=firebase_app)
+
+
+async def verify_firebase_token_async(id_token):
+    """
+    Awaitable verify_firebase_token
+
+    Runs verification on the I/O pool so a slow certificate fetch or
+    Firebase call parks a coroutine instead of blocking the event loop.
+
+    Args:
+        id_token: Firebase ID token from client
+
+    Returns:
+        dict: Decoded token containing user information
+
+    Raises:
+        Exception: If token verification fails
+    """
+    return await run_io(verify_firebase_token, id_token)
+
+
+def bearer_token(auth_header):
+    """
+    Extract the token from an "Authorization: Bearer <token>" header
+
+    Raises:
+        IndexError: If the header has no token part
+    """
+    return auth_header.split(' ')[1]
+
+
+class CertificateRefreshUnsupported(Exception):
+    """The installed Admin SDK does not expose the certificate fetch used here"""
+
+
+def _refresh_certificates():
+    """
+    Fetch Google's ID token certificates through the SDK's own HTTP session
+
+    The Admin SDK caches the certificates according to their Cache-Control
+    headers, so this is a no-op while they are fresh and a refetch once they
+    go stale, which keeps the refetch off the request path.
+
+    The SDK has no public API for this; the private attributes used are
+    those of firebase-admin 6.x and 7.x.
+
+    Raises:
+        CertificateRefreshUnsupported: If the SDK no longer has them
+    """
+    from firebase_admin import auth as firebase_auth
+
+    try:
+        from firebase_admin._token_gen import ID_TOKEN_CERT_URI
+        client = firebase_auth._get_client(get_firebase_app())
+        fetch = client._token_verifier.request
+    except (ImportError, AttributeError) as e:
+        raise CertificateRefreshUnsupported(str(e))
+    fetch(ID_TOKEN_CERT_URI)
+
+
+def _certificate_refresh_loop(interval):
+    """
+    Body of the background certificate refresher thread
+
+    Stops if the SDK cannot be refreshed this way; certificates are then
+    fetched by verify_id_token itself when they go stale, as without the
+    refresher.
+    """
+    while True:
+        try:
+            _refresh_certificates()
+        except CertificateRefreshUnsupported as e:
+            logger.warning(f"Certificate refresher stopped; unsupported firebase-admin version: {str(e)}")
+            return
+        except Exception as e:
+            logger.warning(f"Certificate refresh failed: {str(e)}")
+        time.sleep(interval)
+
+
+def start_certificate_refresher(interval):
+    """
+    Start the background certificate refresher once per process
+
+    Args:
+        interval: Seconds between refresh attempts
+    """
+    global _cert_refresher
+
+    with _cert_refresher_lock:
+        if _cert_refresher is not None and _cert_refresher.is_alive():
+            return
+        _cert_refresher = threading.Thread(
+            target=_certificate_refresh_loop,
+            args=(interval,),
+            name='firebase-cert-refresher',
+            daemon=True
+        )
+        _cert_refresher.start()
+
+
+def init_auth(app):
+    """
+    Apply token cache and certificate refresher settings from the Flask app
+    config
+
+    Nothing is started here: Firebase is set up, and the refresher thread
+    started, on the first verification in each worker, so a gunicorn master
+    that preloads the app forks no threads or connections.
+    """
+    token_cache.configure(maxsize=app.config['TOKEN_CACHE_SIZE'], ttl=3600)
+    _token_cache_settings['enabled'] = app.config['TOKEN_CACHE_ENABLED']
+
+    interval = app.config['TOKEN_CERT_REFRESH_INTERVAL']
+    _cert_refresher_settings['interval'] = 0 if app.config.get('TESTING') else max(interval, 0)
+
 
 def require_auth(f):
     """
@@ -54,16 +267,22 @@ def require_auth(f):
 
         # Extract token (format: "Bearer <token>")
         try:
-            token = auth_header.split(' ')[1]
+            token = bearer_token(auth_header)
         except IndexError:
             return jsonify({
                 'error': 'Invalid authorization header',
                 'message': 'Authorization header must be in format: Bearer <token>'
             }), 401
 
-        # Verify token
+        # Verify token (unless the ASGI adapter already did)
         try:
-            decoded_token = verify_firebase_token(token)
+            verified = request.environ.get(VERIFIED_TOKEN_ENVIRON_KEY)
+            if verified is not None and verified[0] == token:
+                decoded_token = verified[1]
+                if isinstance(decoded_token, Exception):
+                    raise decoded_token
+            else:
+                decoded_token = verify_firebase_token(token)
             # Pass decoded token to route handler
             return f(decoded_token, *args, **kwargs)
         except Exception as e:
@@ -72,6 +291,8 @@ def require_auth(f):
                 'message': str(e)
             }), 401
 
+    # Lets the ASGI adapter verify tokens ahead of only these views
+    decorated_function.requires_auth = True
     return decorated_function
 
 
@@ -113,8 +334,10 @@ def validate_firebase_user(uid):
     Returns:
         bool: True if user exists, False otherwise
     """
+    from firebase_admin import auth as firebase_auth
+
     try:
-        firebase_auth.get_user(uid)
+        firebase_auth.get_user(uid, app=get_firebase_app())
         return True
     except firebase_auth.UserNotFoundError:
         return False
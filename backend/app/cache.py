@@ -0,0 +1,412 @@
+"""
+Result caches for calculator functions and per-user data
+
+Two interchangeable backends are provided, selected with CACHE_BACKEND:
+
+- "memory": an LRU/TTL cache inside each process
+- "redis": a Redis (or any Redis-protocol server) shared by all gunicorn
+  workers, so a result computed by one worker is a hit for the others
+
+Both expose get/set/delete/clear/stats. The Redis backend pickles values,
+so the server must be trusted (a local redis-server or a private network).
+"""
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import inspect
+import logging
+import pickle
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # Optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with per-entry TTL
+
+    Entries are evicted when the cache is full (least recently used first)
+    or when they are older than `ttl` seconds at lookup time.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def configure(self, maxsize, ttl):
+        """Change the size limit and TTL, trimming existing entries if needed"""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Store value under key, evicting the least recently used entries
+
+        `ttl` overrides the cache-wide TTL for this entry, e.g. to expire a
+        decoded token exactly at its own expiry time.
+        """
+        if self.maxsize <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Remove key if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class RedisCache:
+    """
+    Cache stored in a Redis-protocol server, shared by all workers
+
+    Keys are hashed under `namespace` and values are pickled, so any
+    picklable result (NumPy arrays, ColumnarTable) can be stored. Connections
+    come from a pool that redis-py re-creates in forked workers. A server
+    error is logged and counted, and the lookup is treated as a miss, so the
+    API keeps working (uncached) while Redis is down.
+
+    Args:
+        client: redis.Redis (or fakeredis.FakeRedis) instance
+        namespace: Prefix for every key this cache writes
+        ttl: Default entry lifetime in seconds
+    """
+
+    def __init__(self, client, namespace, ttl=300):
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+        self.maxsize = None  # Bounded by the server's maxmemory policy
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def configure(self, maxsize, ttl):
+        """Change the default TTL (size is left to the Redis server)"""
+        self.ttl = ttl
+
+    def _key(self, key):
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest()
+        return f"{self.namespace}{digest}"
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _error(self, operation, error):
+        self._count('errors')
+        logger.warning(f"Redis cache {operation} failed: {str(error)}")
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss or error"""
+        try:
+            payload = self.client.get(self._key(key))
+        except redis.RedisError as e:
+            self._error('get', e)
+            self._count('misses')
+            return default
+
+        if payload is None:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return pickle.loads(payload)
+
+    def set(self, key, value, ttl=None):
+        """Store value under key for `ttl` seconds (default: cache TTL)"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self.client.set(self._key(key), payload, px=max(1, int(ttl * 1000)))
+        except redis.RedisError as e:
+            self._error('set', e)
+
+    def delete(self, key):
+        """Remove key if present"""
+        try:
+            self.client.delete(self._key(key))
+        except redis.RedisError as e:
+            self._error('delete', e)
+
+    def clear(self):
+        """Remove every entry under this cache's namespace (counters are kept)"""
+        try:
+            batch = []
+            for name in self.client.scan_iter(match=f"{self.namespace}*", count=1000):
+                batch.append(name)
+                if len(batch) >= 1000:
+                    self.client.delete(*batch)
+                    batch = []
+            if batch:
+                self.client.delete(*batch)
+        except redis.RedisError as e:
+            self._error('clear', e)
+
+    def stats(self):
+        """Return this process's hit/miss/error counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'redis',
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class Generations:
+    """
+    Per-key write counters kept outside any evicting cache
+
+    Cached reads are tagged with their key's generation; bumping it on a
+    write makes every older entry stale. The counters must never be evicted
+    or expire, or a key's generation would go back to 0 and entries tagged
+    before the write would match again. One small int is kept per key ever
+    written.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def current(self, key):
+        """Return key's generation (0 if it was never bumped)"""
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def bump(self, key):
+        """Advance key's generation and return the new value"""
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisGenerations:
+    """
+    Generations stored as Redis counters with no TTL, shared by all workers
+
+    INCR is atomic across workers. Keys without a TTL are never evicted
+    under Redis' volatile-* maxmemory policies (the allkeys-* policies do
+    evict them, so they are unsuitable for a server holding the user cache).
+
+    Args:
+        client: redis.Redis (or fakeredis.FakeRedis) instance
+        namespace: Prefix for every counter key
+    """
+
+    def __init__(self, client, namespace):
+        self.client = client
+        self.namespace = namespace
+
+    def _key(self, key):
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest()
+        return f"{self.namespace}{digest}"
+
+    def current(self, key):
+        """Return key's generation, or None if Redis cannot be reached"""
+        try:
+            value = self.client.get(self._key(key))
+        except redis.RedisError as e:
+            logger.warning(f"Redis generation get failed: {str(e)}")
+            return None
+        return int(value) if value is not None else 0
+
+    def bump(self, key):
+        """Advance key's generation and return it (None on a Redis error)"""
+        try:
+            return self.client.incr(self._key(key))
+        except redis.RedisError as e:
+            logger.warning(f"Redis generation bump failed: {str(e)}")
+            return None
+
+
+# "calculations" is shared by all memoized calculation functions (keys are
+# prefixed with the function name); "users" holds per-user reads for the
+# user routes. init_cache() replaces both according to CACHE_BACKEND.
+_caches = {
+    'calculations': LRUCache(),
+    'users': LRUCache(maxsize=10000, ttl=60)
+}
+_generations = Generations()  # Write counters for the "users" cache
+_settings = {'enabled': True, 'users_enabled': True, 'precision': 4}
+
+
+def init_cache(app):
+    """Create the caches selected by CACHE_BACKEND from the Flask app config"""
+    global _generations
+
+    backend = app.config['CACHE_BACKEND']
+    sizes = {
+        'calculations': (app.config['CALCULATION_CACHE_SIZE'], app.config['CALCULATION_CACHE_TTL']),
+        'users': (app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+    }
+
+    if backend == 'memory':
+        for name, (maxsize, ttl) in sizes.items():
+            _caches[name] = LRUCache(maxsize=maxsize, ttl=ttl)
+        _generations = Generations()
+    elif backend == 'redis':
+        if redis is None:
+            raise ValueError("CACHE_BACKEND is 'redis' but the redis package is not installed")
+        # One pool for both namespaces; no connection is opened until first use
+        pool = redis.ConnectionPool.from_url(
+            app.config['CACHE_REDIS_URL'],
+            max_connections=app.config['CACHE_REDIS_MAX_CONNECTIONS'],
+            socket_timeout=app.config['CACHE_REDIS_TIMEOUT'],
+            socket_connect_timeout=app.config['CACHE_REDIS_TIMEOUT']
+        )
+        client = redis.Redis(connection_pool=pool)
+        prefix = app.config['CACHE_KEY_PREFIX']
+        for name, (maxsize, ttl) in sizes.items():
+            _caches[name] = RedisCache(client, namespace=f"{prefix}{name}:", ttl=ttl)
+        # Outside the "users" namespace, so clearing the cache keeps them
+        _generations = RedisGenerations(client, namespace=f"{prefix}generations:")
+    else:
+        raise ValueError(f"Unknown cache backend: {backend}")
+
+    _settings['enabled'] = app.config['CALCULATION_CACHE_ENABLED']
+    _settings['users_enabled'] = app.config['USER_CACHE_ENABLED']
+    if backend == 'memory' and app.config['STORAGE_BACKEND'] != 'memory':
+        # A write invalidates only the worker that handled it; the others
+        # would keep serving what they cached from the shared store
+        if _settings['users_enabled']:
+            logger.info("User cache disabled: shared storage needs CACHE_BACKEND='redis'")
+        _settings['users_enabled'] = False
+    _settings['precision'] = app.config['CALCULATION_CACHE_PRECISION']
+
+
+def get_cache(name='calculations'):
+    """Return the active cache for name ("calculations" or "users")"""
+    return _caches[name]
+
+
+def get_generations():
+    """Return the write counters that tag "users" cache entries"""
+    return _generations
+
+
+def user_cache_enabled():
+    """
+    True if the user routes should read through the "users" cache
+
+    Only with USER_CACHE_ENABLED, and only while the cache is as shared as
+    the storage: per-process storage with either backend, or shared
+    (SQLite) storage with Redis.
+    """
+    return _settings['users_enabled']
+
+
+def _normalize(value, precision):
+    """Round floats so jittered inputs share a cache key (10 == 10.0 already)"""
+    if isinstance(value, float):
+        return round(value, precision)
+    return value
+
+
+def memoize(func):
+    """
+    Memoize a pure calculation function in the "calculations" cache
+
+    Arguments are bound to the function signature (so positional, keyword
+    and defaulted calls share entries) and float values are rounded to
+    CALCULATION_CACHE_PRECISION decimals. The function is then called with
+    the normalized arguments, so a cached result is always exactly what the
+    key describes. Cached results are shared: callers must not mutate them.
+    """
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _settings['enabled']:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        precision = _settings['precision']
+        normalized = {
+            name: _normalize(value, precision)
+            for name, value in bound.arguments.items()
+        }
+        key = (func.__name__,) + tuple(normalized.values())
+        try:
+            hash(key)
+        except TypeError:
+            return func(**normalized)
+
+        cache = _caches['calculations']
+        result = cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = func(**normalized)
+            cache.set(key, result)
+        return result
+
+    return wrapper
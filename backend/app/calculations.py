@@ -1,10 +1,74 @@
 """
 Core calculation functions for EPF/ETF retirement planning
 """
+import math
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+from app.metrics import timed
+from app.annuity import growth_factor, growth_factor_array, accumulation_factor, pmt_factor
+from app.columnar import ColumnarTable
 
+# yearly_breakdown columns rounded to cents on output
+MONEY_COLUMNS = (
+    'salary', 'monthly_contribution', 'yearly_contribution',
+    'year_start_balance', 'year_end_balance', 'interest_earned'
+)
 
+
+def _project_yearly_balances(
+    years: int,
+    basic_salary: float,
+    employee_epf_rate: float,
+    annual_increment: float,
+    epf_interest_rate: float,
+    current_epf_balance: float
+):
+    """
+    Closed-form yearly EPF projection
+
+    Within a year the monthly contribution is constant, so twelve months of
+    compounding collapse to balance * G + contribution * A where G is the
+    yearly growth factor and A the 12-month annuity factor. Across years the
+    recurrence B[n] = B[n-1] * G + A * c[n-1] unrolls to
+    B[n] = G ** n * (B0 + A * sum(c[k] * G ** -(k + 1))), which is a cumsum.
+
+    Args:
+        years: Number of years to project
+        basic_salary: Current monthly basic salary
+        employee_epf_rate: Employee EPF rate (8 or 10)
+        annual_increment: Expected annual salary increment percentage
+        epf_interest_rate: Expected EPF interest rate
+        current_epf_balance: Current EPF balance
+
+    Returns:
+        Tuple of NumPy arrays (salaries, monthly_contributions,
+        year_start_balances, year_end_balances), one entry per year
+    """
+    year_growth = growth_factor(epf_interest_rate, 12)
+    annuity_factor = accumulation_factor(epf_interest_rate, 12)
+
+    # Salary for year k is basic_salary * (1 + increment) ** k
+    salary_growth = np.full(years, 1 + annual_increment / 100)
+    salary_growth[0] = 1.0
+    salaries = basic_salary * np.cumprod(salary_growth)
+
+    employee_contributions = salaries * (employee_epf_rate / 100)
+    employer_contributions = salaries * 0.12
+    monthly_contributions = employee_contributions + employer_contributions
+
+    exponents = np.arange(1, years + 1)
+    compounding = year_growth ** exponents
+    discounted = np.cumsum(monthly_contributions / compounding)
+    end_balances = compounding * (current_epf_balance + annuity_factor * discounted)
+
+    start_balances = np.empty(years)
+    start_balances[0] = current_epf_balance
+    start_balances[1:] = end_balances[:-1]
+
+    return salaries, monthly_contributions, start_balances, end_balances
+
+
+@timed
 def calculate_monthly_contributions(
     basic_salary: float,
     employee_epf_rate: int = 10
@@ -36,6 +100,59 @@ def calculate_monthly_contributions(
     }
 
 
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals exactly as Python's round() does
+
+    np.round scales by 100 first, which can land a value just below a half
+    cent on the half and round it the other way. Those few values are
+    re-rounded one by one so batch amounts match the per-employee ones.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(value, 2) for value in values[near_half].tolist()]
+    return rounded
+
+
+@timed
+def calculate_monthly_contributions_batch(
+    basic_salaries,
+    employee_epf_rates=10
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_monthly_contributions for many employees
+
+    Args:
+        basic_salaries: Monthly basic salaries in LKR (1-D array-like)
+        employee_epf_rates: Employee EPF rates, per employee or one value
+
+    Returns:
+        Dictionary with the same keys and rounding as
+        calculate_monthly_contributions, each an array
+    """
+    salaries = np.asarray(basic_salaries, dtype=np.float64)
+    rates = np.asarray(employee_epf_rates, dtype=np.float64)
+
+    employee_epf = salaries * (rates / 100)
+    employer_epf = salaries * 0.12  # 12%
+    employer_etf = salaries * 0.03  # 3%
+
+    total_epf = employee_epf + employer_epf
+    total_contribution = total_epf + employer_etf
+
+    return {
+        'employee_epf': _round_cents(employee_epf),
+        'employer_epf': _round_cents(employer_epf),
+        'employer_etf': _round_cents(employer_etf),
+        'total_epf': _round_cents(total_epf),
+        'total_monthly': _round_cents(total_contribution),
+        'yearly_contribution': _round_cents(total_epf * 12)  # Only EPF accumulates (not ETF)
+    }
+
+
+@timed
 def calculate_retirement_savings(
     current_age: int,
     retirement_age: int,
@@ -58,55 +175,586 @@ def calculate_retirement_savings(
         current_epf_balance: Current EPF balance
 
     Returns:
-        Dictionary with final balance and yearly breakdown
+        Dictionary with final balance and yearly breakdown (a ColumnarTable
+        with the columns listed in _yearly_breakdown_table)
     """
     years_to_retirement = retirement_age - current_age
     if years_to_retirement <= 0:
         raise ValueError("Retirement age must be greater than current age")
 
-    monthly_rate = epf_interest_rate / 100 / 12
-    total_balance = current_epf_balance
-    salary = basic_salary
-    yearly_data = []
+    salaries, monthly_contributions, start_balances, end_balances = _project_yearly_balances(
+        years_to_retirement,
+        basic_salary,
+        employee_epf_rate,
+        annual_increment,
+        epf_interest_rate,
+        current_epf_balance
+    )
+    yearly_data = _yearly_breakdown_table(
+        current_age, salaries, monthly_contributions, start_balances, end_balances
+    )
 
-    for year in range(years_to_retirement):
-        year_start_balance = total_balance
+    total_balance = float(end_balances[-1])
+    total_contributions = float(yearly_data.rounded('yearly_contribution').sum())
 
-        # Calculate monthly contributions for this year
-        employee_contribution = salary * (employee_epf_rate / 100)
-        employer_contribution = salary * 0.12
-        monthly_contribution = employee_contribution + employer_contribution
+    return {
+        'final_balance': round(total_balance, 2),
+        'years_to_retirement': years_to_retirement,
+        'yearly_breakdown': yearly_data,
+        'total_contributions': round(total_contributions, 2),
+        'total_interest': round(total_balance - current_epf_balance - total_contributions, 2)
+    }
 
-        # Calculate year-end balance with compound interest
-        for month in range(12):
-            total_balance = total_balance * (1 + monthly_rate) + monthly_contribution
 
-        year_end_balance = total_balance
-        year_interest = year_end_balance - year_start_balance - (monthly_contribution * 12)
+@timed
+def resume_retirement_savings(
+    yearly_breakdown,
+    from_year: int,
+    current_age: int,
+    retirement_age: int,
+    employee_epf_rate: int = 10,
+    annual_increment: float = 5.0,
+    epf_interest_rate: float = 9.5
+) -> Dict:
+    """
+    Re-run a projection from a year-end checkpoint with new assumptions
 
-        yearly_data.append({
-            'year': year + 1,
-            'age': current_age + year + 1,
-            'salary': round(salary, 2),
-            'monthly_contribution': round(monthly_contribution, 2),
-            'yearly_contribution': round(monthly_contribution * 12, 2),
-            'year_start_balance': round(year_start_balance, 2),
-            'year_end_balance': round(year_end_balance, 2),
-            'interest_earned': round(year_interest, 2)
-        })
+    Years before from_year are kept from yearly_breakdown as they are. The
+    rest are projected from the previous year's closing balance and salary,
+    so a change late in a long horizon only computes the years it affects.
+    A saved (serialized) breakdown only has rounded figures, so resuming
+    from one matches a full run to within rounding.
 
-        # Apply salary increment for next year
-        salary *= (1 + annual_increment / 100)
+    Args:
+        yearly_breakdown: yearly_breakdown of an earlier projection, e.g.
+            from calculate_retirement_savings or a saved calculation, as a
+            ColumnarTable, its JSON form or legacy rows
+        from_year: First year (1-based) that uses the new assumptions
+        current_age: Current age the earlier projection started from
+        retirement_age: Target retirement age (may differ from the earlier
+            projection's)
+        employee_epf_rate: Employee EPF rate from from_year on
+        annual_increment: Salary increment percentage from from_year on
+        epf_interest_rate: EPF interest rate from from_year on
+
+    Returns:
+        Dictionary with the same keys as calculate_retirement_savings
+    """
+    years_to_retirement = retirement_age - current_age
+    if years_to_retirement <= 0:
+        raise ValueError("Retirement age must be greater than current age")
+    yearly_breakdown = ColumnarTable.from_json(yearly_breakdown)
+    last_from_year = min(len(yearly_breakdown) + 1, years_to_retirement)
+    if not 1 <= from_year <= last_from_year:
+        raise ValueError(f"from_year must be between 1 and {last_from_year}")
+
+    prefix = yearly_breakdown.head(from_year - 1)
+    if len(prefix):
+        basic_salary = float(prefix['salary'][-1]) * (1 + annual_increment / 100)
+        opening_balance = float(prefix['year_end_balance'][-1])
+    else:
+        basic_salary = float(yearly_breakdown['salary'][0])
+        opening_balance = float(yearly_breakdown['year_start_balance'][0])
+
+    salaries, monthly_contributions, start_balances, end_balances = _project_yearly_balances(
+        years_to_retirement - len(prefix),
+        basic_salary,
+        employee_epf_rate,
+        annual_increment,
+        epf_interest_rate,
+        opening_balance
+    )
+    suffix = _yearly_breakdown_table(
+        current_age, salaries, monthly_contributions, start_balances, end_balances,
+        first_year=from_year
+    )
+    yearly_data = ColumnarTable.concat([prefix, suffix]) if len(prefix) else suffix
+
+    total_balance = float(end_balances[-1])
+    total_contributions = float(yearly_data.rounded('yearly_contribution').sum())
+    current_epf_balance = float(yearly_breakdown['year_start_balance'][0])
 
     return {
         'final_balance': round(total_balance, 2),
         'years_to_retirement': years_to_retirement,
         'yearly_breakdown': yearly_data,
-        'total_contributions': round(sum(y['yearly_contribution'] for y in yearly_data), 2),
-        'total_interest': round(total_balance - current_epf_balance - sum(y['yearly_contribution'] for y in yearly_data), 2)
+        'total_contributions': round(total_contributions, 2),
+        'total_interest': round(total_balance - current_epf_balance - total_contributions, 2)
+    }
+
+
+def _yearly_breakdown_table(
+    current_age: int,
+    salaries: np.ndarray,
+    monthly_contributions: np.ndarray,
+    start_balances: np.ndarray,
+    end_balances: np.ndarray,
+    first_year: int = 1
+) -> ColumnarTable:
+    """
+    Build the yearly breakdown table from the projection columns
+
+    Columns: year, age, salary, monthly_contribution, yearly_contribution,
+    year_start_balance, year_end_balance, interest_earned. Money columns
+    are kept unrounded and rounded to 2 decimals when serialized.
+    """
+    yearly_contributions = monthly_contributions * 12
+    interest_earned = end_balances - start_balances - yearly_contributions
+    years = np.arange(first_year, first_year + len(salaries))
+
+    return ColumnarTable({
+        'year': years,
+        'age': current_age + years,
+        'salary': salaries,
+        'monthly_contribution': monthly_contributions,
+        'yearly_contribution': yearly_contributions,
+        'year_start_balance': start_balances,
+        'year_end_balance': end_balances,
+        'interest_earned': interest_earned
+    }, decimals=dict.fromkeys(MONEY_COLUMNS, 2))
+
+
+def iter_yearly_breakdown(
+    current_age: int,
+    retirement_age: int,
+    basic_salary: float,
+    employee_epf_rate: int = 10,
+    annual_increment: float = 5.0,
+    epf_interest_rate: float = 9.5,
+    current_epf_balance: float = 0
+):
+    """
+    Yearly breakdown of calculate_retirement_savings as a row generator
+
+    Inputs are validated eagerly so errors surface before a streamed
+    response starts; rows are then produced one at a time.
+
+    Returns:
+        Generator of yearly_breakdown dicts
+    """
+    years_to_retirement = retirement_age - current_age
+    if years_to_retirement <= 0:
+        raise ValueError("Retirement age must be greater than current age")
+
+    columns = _project_yearly_balances(
+        years_to_retirement,
+        basic_salary,
+        employee_epf_rate,
+        annual_increment,
+        epf_interest_rate,
+        current_epf_balance
+    )
+    return _yearly_breakdown_table(current_age, *columns).iter_rows()
+
+
+def _whole_ages(values) -> np.ndarray:
+    """
+    Return ages as int64, refusing values that are not whole numbers
+
+    Raises:
+        ValueError: If any age is fractional or not finite
+    """
+    ages = np.asarray(values, dtype=np.float64)
+    if not np.all(np.isfinite(ages)) or np.any(ages != np.floor(ages)):
+        raise ValueError("Ages must be whole numbers")
+    return ages.astype(np.int64)
+
+
+@timed
+def calculate_retirement_savings_batch(
+    current_ages,
+    retirement_ages,
+    basic_salaries,
+    employee_epf_rates=10,
+    annual_increments=5.0,
+    epf_interest_rates=9.5,
+    current_epf_balances=0,
+    inflation_rates=6.0
+) -> Dict[str, np.ndarray]:
+    """
+    Project retirement savings for many profiles in a single NumPy pass
+
+    Every argument is a column: either a 1-D array-like with one entry per
+    profile or a scalar applied to all profiles. Ages must be whole numbers.
+    Profiles with shorter horizons are padded with NaN after their
+    retirement year.
+
+    Args:
+        current_ages: Current ages
+        retirement_ages: Target retirement ages
+        basic_salaries: Current monthly basic salaries
+        employee_epf_rates: Employee EPF rates (8 or 10)
+        annual_increments: Expected annual salary increment percentages
+        epf_interest_rates: Expected EPF interest rates
+        current_epf_balances: Current EPF balances
+        inflation_rates: Expected inflation rates
+
+    Returns:
+        Dictionary of arrays: yearly_balances and yearly_real_values
+        (profiles x years), plus final_balances, real_values,
+        years_to_retirement, monthly_pension_20y and monthly_pension_25y
+        (one entry per profile)
+    """
+    (current_ages, retirement_ages, basic_salaries, employee_epf_rates,
+     annual_increments, epf_interest_rates, current_epf_balances,
+     inflation_rates) = np.broadcast_arrays(
+        _whole_ages(current_ages),
+        _whole_ages(retirement_ages),
+        np.asarray(basic_salaries, dtype=np.float64),
+        np.asarray(employee_epf_rates, dtype=np.float64),
+        np.asarray(annual_increments, dtype=np.float64),
+        np.asarray(epf_interest_rates, dtype=np.float64),
+        np.asarray(current_epf_balances, dtype=np.float64),
+        np.asarray(inflation_rates, dtype=np.float64)
+    )
+    if current_ages.ndim != 1:
+        raise ValueError("Profile columns must be one-dimensional")
+    if current_ages.size == 0:
+        raise ValueError("At least one profile is required")
+
+    years_to_retirement = retirement_ages - current_ages
+    if np.any(years_to_retirement <= 0):
+        raise ValueError("Retirement age must be greater than current age")
+
+    max_years = int(years_to_retirement.max())
+    exponents = np.arange(max_years, dtype=np.float64)
+
+    monthly_rates = epf_interest_rates / 100 / 12
+    year_growth = growth_factor_array(epf_interest_rates, 12)
+    annuity_factors = np.where(
+        monthly_rates == 0,
+        12.0,
+        (year_growth - 1) / np.where(monthly_rates == 0, 1.0, monthly_rates)
+    )
+
+    # Monthly contribution per profile and year, grown by the salary increment
+    contribution_rates = employee_epf_rates / 100 + 0.12
+    balances = np.power((1 + annual_increments / 100)[:, None], exponents)
+    balances *= (basic_salaries * contribution_rates)[:, None]
+
+    # Same cumsum unrolling as _project_yearly_balances, done in place to keep
+    # the number of profiles x years temporaries at two
+    compounding = np.power(year_growth[:, None], exponents + 1)
+    balances /= compounding
+    np.cumsum(balances, axis=1, out=balances)
+    balances *= annuity_factors[:, None]
+    balances += current_epf_balances[:, None]
+    balances *= compounding
+
+    padding = exponents[None, :] >= years_to_retirement[:, None]
+    balances[padding] = np.nan
+
+    # Deflate each year-end balance by the inflation accumulated so far
+    real_values = np.power((1 + inflation_rates / 100)[:, None], exponents + 1, out=compounding)
+    np.divide(balances, real_values, out=real_values)
+
+    last_year = (years_to_retirement - 1)[:, None]
+    final_balances = np.take_along_axis(balances, last_year, axis=1)[:, 0]
+    final_real_values = np.take_along_axis(real_values, last_year, axis=1)[:, 0]
+
+    return {
+        'years_to_retirement': years_to_retirement,
+        'yearly_balances': balances,
+        'yearly_real_values': real_values,
+        'final_balances': final_balances,
+        'real_values': final_real_values,
+        'monthly_pension_20y': _monthly_pension_batch(final_balances, epf_interest_rates, 20 * 12),
+        'monthly_pension_25y': _monthly_pension_batch(final_balances, epf_interest_rates, 25 * 12)
+    }
+
+
+def _monthly_pension_batch(
+    epf_balances: np.ndarray,
+    annual_rates: np.ndarray,
+    total_months: int
+) -> np.ndarray:
+    """
+    Vectorized PMT used by calculate_retirement_savings_batch
+
+    Mirrors calculate_monthly_pension: zero for non-positive balances and a
+    straight division when the rate is zero.
+    """
+    monthly_rates = annual_rates / 100 / 12
+    safe_rates = np.where(monthly_rates == 0, 1.0, monthly_rates)
+    growth = growth_factor_array(annual_rates, total_months)
+    pension = np.where(
+        monthly_rates == 0,
+        epf_balances / total_months,
+        epf_balances * safe_rates / (1 - 1 / growth)
+    )
+    return np.where(epf_balances > 0, pension, 0.0)
+
+
+def _draw_rate_paths(
+    rng: np.random.Generator,
+    distribution: Optional[Dict],
+    default_mean: float,
+    default_std: float,
+    shape
+) -> np.ndarray:
+    """
+    Draw a (paths x years) matrix of annual percentage rates
+
+    Supported distribution specs:
+        {"type": "normal", "mean": 9.5, "std": 1.0, "min": 0, "max": 15}
+        {"type": "uniform", "low": 8, "high": 11}
+        {"type": "fixed", "value": 9.5}
+
+    Missing mean/value fall back to the deterministic assumption, so None
+    gives a normal distribution around it with the default spread.
+    """
+    distribution = distribution or {}
+    if not isinstance(distribution, dict):
+        raise ValueError("Distribution specs must be objects")
+    kind = distribution.get('type', 'normal')
+
+    if kind == 'normal':
+        rates = rng.normal(
+            distribution.get('mean', default_mean),
+            distribution.get('std', default_std),
+            shape
+        )
+    elif kind == 'uniform':
+        if 'low' not in distribution or 'high' not in distribution:
+            raise ValueError("Uniform distribution requires 'low' and 'high'")
+        rates = rng.uniform(distribution['low'], distribution['high'], shape)
+    elif kind == 'fixed':
+        rates = np.full(shape, float(distribution.get('value', default_mean)))
+    else:
+        raise ValueError(f"Unsupported distribution type: {kind}")
+
+    if 'min' in distribution or 'max' in distribution:
+        np.clip(rates, distribution.get('min'), distribution.get('max'), out=rates)
+
+    return rates
+
+
+@timed
+def simulate_retirement_savings(
+    current_age: int,
+    retirement_age: int,
+    basic_salary: float,
+    employee_epf_rate: int = 10,
+    annual_increment: float = 5.0,
+    epf_interest_rate: float = 9.5,
+    current_epf_balance: float = 0,
+    inflation_rate: float = 6.0,
+    epf_interest_distribution: Optional[Dict] = None,
+    increment_distribution: Optional[Dict] = None,
+    inflation_distribution: Optional[Dict] = None,
+    paths: int = 10000,
+    seed: Optional[int] = None,
+    chunk_size: int = 10000,
+    percentiles: tuple = (5, 50, 95),
+    progress: Optional[Callable[[int, int], None]] = None,
+    max_years: Optional[int] = None
+) -> Dict:
+    """
+    Monte Carlo retirement projection with uncertain rates
+
+    Each path draws its own EPF interest, salary increment and inflation rate
+    for every year. Paths are simulated in chunks of `chunk_size`, so peak
+    memory is bounded by chunk_size x years regardless of the path count
+    (years itself is bounded by max_years); only the final balance and real
+    value of each path are retained.
+
+    Args:
+        current_age: Current age
+        retirement_age: Target retirement age
+        basic_salary: Current monthly basic salary
+        employee_epf_rate: Employee EPF rate (8 or 10)
+        annual_increment: Expected annual salary increment percentage
+        epf_interest_rate: Expected EPF interest rate
+        current_epf_balance: Current EPF balance
+        inflation_rate: Expected inflation rate
+        epf_interest_distribution: Distribution spec for yearly EPF rates
+        increment_distribution: Distribution spec for yearly increments
+        inflation_distribution: Distribution spec for yearly inflation
+        paths: Number of simulated paths
+        seed: Seed for the random generator (same seed and chunk size
+            reproduce the same result)
+        chunk_size: Maximum number of paths simulated at once
+        percentiles: Percentiles to report
+        progress: Optional callback called as progress(paths_done, paths)
+            after each chunk
+        max_years: Longest horizon accepted (None for no limit)
+
+    Returns:
+        Dictionary with the deterministic projection and percentile bands
+        for the final balance and its real (inflation-adjusted) value
+    """
+    if not (float(current_age).is_integer() and float(retirement_age).is_integer()):
+        raise ValueError("Ages must be whole numbers")
+    years_to_retirement = int(retirement_age) - int(current_age)
+    if years_to_retirement <= 0:
+        raise ValueError("Retirement age must be greater than current age")
+    if max_years is not None and years_to_retirement > max_years:
+        raise ValueError(f"Projections are limited to {max_years} years before retirement")
+    if paths <= 0:
+        raise ValueError("Number of paths must be positive")
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int) or seed < 0):
+        raise ValueError("seed must be a non-negative integer")
+
+    deterministic = calculate_retirement_savings(
+        current_age=current_age,
+        retirement_age=retirement_age,
+        basic_salary=basic_salary,
+        employee_epf_rate=employee_epf_rate,
+        annual_increment=annual_increment,
+        epf_interest_rate=epf_interest_rate,
+        current_epf_balance=current_epf_balance
+    )
+    deterministic_power = calculate_purchasing_power(
+        deterministic['final_balance'],
+        years_to_retirement,
+        inflation_rate
+    )
+
+    rng = np.random.default_rng(seed)
+    final_balances = np.empty(paths)
+    real_values = np.empty(paths)
+    contribution_rate = employee_epf_rate / 100 + 0.12
+
+    for start in range(0, paths, chunk_size):
+        size = min(chunk_size, paths - start)
+        shape = (size, years_to_retirement)
+
+        interest = _draw_rate_paths(rng, epf_interest_distribution, epf_interest_rate, 1.0, shape)
+        increments = _draw_rate_paths(rng, increment_distribution, annual_increment, 2.0, shape)
+        inflation = _draw_rate_paths(rng, inflation_distribution, inflation_rate, 2.0, shape)
+
+        # Year k salary uses the increments of years 0..k-1
+        increments /= 100
+        increments += 1
+        increments[:, 1:] = increments[:, :-1]
+        increments[:, 0] = 1.0
+        contributions = np.cumprod(increments, axis=1, out=increments)
+        contributions *= basic_salary * contribution_rate
+
+        monthly_rates = interest / 100 / 12
+        year_growth = (1 + monthly_rates) ** 12
+        safe_rates = np.where(monthly_rates == 0, 1.0, monthly_rates)
+        annuity_factors = np.where(monthly_rates == 0, 12.0, (year_growth - 1) / safe_rates)
+
+        # B[n] = P[n] * (B0 + sum(c[k] * A[k] / P[k + 1])) with P the running
+        # product of yearly growth factors
+        growth = np.cumprod(year_growth, axis=1, out=year_growth)
+        contributions *= annuity_factors
+        contributions /= growth
+        final = growth[:, -1] * (current_epf_balance + contributions.sum(axis=1))
+
+        inflation /= 100
+        inflation += 1
+        final_balances[start:start + size] = final
+        real_values[start:start + size] = final / np.prod(inflation, axis=1)
+        if progress is not None:
+            progress(start + size, paths)
+
+    def bands(values):
+        points = np.percentile(values, percentiles)
+        summary = {f'p{p:g}': round(float(v), 2) for p, v in zip(percentiles, points)}
+        summary['mean'] = round(float(values.mean()), 2)
+        return summary
+
+    return {
+        'paths': paths,
+        'seed': seed,
+        'years_to_retirement': years_to_retirement,
+        'deterministic': {
+            'final_balance': deterministic['final_balance'],
+            'real_value': deterministic_power['real_value']
+        },
+        'final_balance': bands(final_balances),
+        'real_value': bands(real_values)
     }
 
 
+@timed
+def calculate_sensitivity_grid(
+    current_age: int,
+    basic_salary: float,
+    epf_interest_rates,
+    annual_increments,
+    inflation_rates,
+    retirement_ages,
+    employee_epf_rate: int = 10,
+    current_epf_balance: float = 0,
+    pension_years: int = 20
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the projection over a full grid of assumptions at once
+
+    Uses the same closed form as _projected_final_balance, broadcast over
+    the axes (epf_interest_rate, annual_increment, inflation_rate,
+    retirement_age), so the cost is a handful of array operations however
+    many cells the grid has.
+
+    Args:
+        current_age: Current age
+        basic_salary: Current monthly basic salary
+        epf_interest_rates: EPF interest rates to evaluate
+        annual_increments: Salary increment percentages to evaluate
+        inflation_rates: Inflation rates to evaluate
+        retirement_ages: Retirement ages to evaluate (whole numbers)
+        employee_epf_rate: Employee EPF rate (8 or 10)
+        current_epf_balance: Current EPF balance
+        pension_years: Withdrawal period for the monthly pension
+
+    Returns:
+        Dictionary with the axis values and final_balance, real_value and
+        monthly_pension arrays shaped (rates, increments, inflation, ages)
+    """
+    rates = np.asarray(epf_interest_rates, dtype=np.float64).reshape(-1, 1, 1, 1)
+    increments = np.asarray(annual_increments, dtype=np.float64).reshape(1, -1, 1, 1)
+    inflation = np.asarray(inflation_rates, dtype=np.float64).reshape(1, 1, -1, 1)
+    ages = _whole_ages(retirement_ages).reshape(1, 1, 1, -1)
+
+    years = ages - current_age
+    if np.any(years <= 0):
+        raise ValueError("Retirement age must be greater than current age")
+
+    monthly_rates = rates / 100 / 12
+    year_growth = growth_factor_array(rates, 12)
+    safe_rates = np.where(monthly_rates == 0, 1.0, monthly_rates)
+    annuity_factors = np.where(monthly_rates == 0, 12.0, (year_growth - 1) / safe_rates)
+    salary_growth = 1 + increments / 100
+    contribution = basic_salary * (employee_epf_rate / 100 + 0.12)
+
+    # (G ** n - s ** n) / (G - s), with its limit n * G ** (n - 1) where G == s
+    compounded = year_growth ** years
+    difference = year_growth - salary_growth
+    same_growth = np.abs(difference) < 1e-12
+    geometric_sum = np.where(
+        same_growth,
+        years * year_growth ** (years - 1),
+        (compounded - salary_growth ** years) / np.where(same_growth, 1.0, difference)
+    )
+    final_balance = current_epf_balance * compounded + annuity_factors * contribution * geometric_sum
+
+    shape = np.broadcast_shapes(rates.shape, increments.shape, inflation.shape, ages.shape)
+    final_balance = np.broadcast_to(final_balance, shape)
+    real_value = final_balance / (1 + inflation / 100) ** years
+
+    total_months = pension_years * 12
+    pmt = np.where(
+        monthly_rates == 0,
+        1 / total_months,
+        safe_rates / (1 - (1 + safe_rates) ** -total_months)
+    )
+    monthly_pension = np.where(final_balance > 0, final_balance * pmt, 0.0)
+
+    return {
+        'epf_interest_rates': rates.ravel(),
+        'annual_increments': increments.ravel(),
+        'inflation_rates': inflation.ravel(),
+        'retirement_ages': ages.ravel(),
+        'final_balance': final_balance,
+        'real_value': real_value,
+        'monthly_pension': monthly_pension
+    }
+
+
+@timed
 def calculate_purchasing_power(
     future_value: float,
     years: int,
@@ -135,6 +783,7 @@ def calculate_purchasing_power(
     }
 
 
+@timed
 def calculate_monthly_pension(
     epf_balance: float,
     interest_rate: float = 9.5,
@@ -158,14 +807,10 @@ def calculate_monthly_pension(
             'total_interest': 0
         }
 
-    monthly_rate = interest_rate / 100 / 12
     total_months = years * 12
 
     # PMT formula: calculate monthly withdrawal
-    if monthly_rate == 0:
-        monthly_pension = epf_balance / total_months
-    else:
-        monthly_pension = (epf_balance * monthly_rate) / (1 - (1 + monthly_rate) ** -total_months)
+    monthly_pension = epf_balance * pmt_factor(interest_rate, total_months)
 
     total_withdrawals = monthly_pension * total_months
     total_interest = total_withdrawals - epf_balance
@@ -179,6 +824,7 @@ def calculate_monthly_pension(
     }
 
 
+@timed
 def calculate_required_savings(
     target_amount: float,
     current_balance: float,
@@ -199,22 +845,18 @@ def calculate_required_savings(
     Returns:
         Dictionary with gap analysis and recommendations
     """
-    monthly_rate = interest_rate / 100 / 12
     total_months = years * 12
+    accumulation = accumulation_factor(interest_rate, total_months)
 
     # Calculate projected balance with current contributions
-    projected_balance = current_balance
-    for _ in range(total_months):
-        projected_balance = projected_balance * (1 + monthly_rate) + monthly_contribution
+    projected_balance = (current_balance * growth_factor(interest_rate, total_months)
+                         + monthly_contribution * accumulation)
 
     gap = target_amount - projected_balance
 
     if gap > 0:
         # Calculate required additional monthly savings
-        if monthly_rate == 0:
-            required_additional = gap / total_months
-        else:
-            required_additional = (gap * monthly_rate) / ((1 + monthly_rate) ** total_months - 1)
+        required_additional = gap / accumulation
     else:
         required_additional = 0
 
@@ -228,6 +870,314 @@ def calculate_required_savings(
     }
 
 
+def _final_balance_by_years(
+    basic_salary: float,
+    employee_epf_rate: float,
+    annual_increment: float,
+    epf_interest_rate: float,
+    current_epf_balance: float
+):
+    """
+    Return the closed-form final balance as a function of years alone
+
+    The growth and annuity factors are computed once, so each call costs a
+    few powers; goal seek over retirement age evaluates it many times.
+    """
+    year_growth = growth_factor(epf_interest_rate, 12)
+    salary_growth = 1 + annual_increment / 100
+    contribution = basic_salary * (employee_epf_rate / 100 + 0.12)
+    scaled_contribution = accumulation_factor(epf_interest_rate, 12) * contribution
+    same_growth = abs(year_growth - salary_growth) < 1e-12
+
+    def final_balance(years):
+        compounded = year_growth ** years
+        if same_growth:
+            geometric_sum = years * year_growth ** (years - 1)
+        else:
+            geometric_sum = (compounded - salary_growth ** years) / (year_growth - salary_growth)
+        return current_epf_balance * compounded + scaled_contribution * geometric_sum
+
+    return final_balance
+
+
+def _projected_final_balance(
+    years: int,
+    basic_salary: float,
+    employee_epf_rate: float,
+    annual_increment: float,
+    epf_interest_rate: float,
+    current_epf_balance: float
+) -> float:
+    """
+    Scalar closed form of the final balance from _project_yearly_balances
+
+    With yearly growth G, 12-month annuity factor A, first-year monthly
+    contribution c and salary growth s, the balance after n years is
+    B0 * G ** n + A * c * (G ** n - s ** n) / (G - s).
+    """
+    return _final_balance_by_years(
+        basic_salary, employee_epf_rate, annual_increment, epf_interest_rate, current_epf_balance
+    )(years)
+
+
+def _solve_increasing(func, target, low, high, tolerance, max_iterations=60):
+    """
+    Find x in [low, high] with func(x) == target for increasing func
+
+    Uses the Illinois variant of false position: it keeps a bracket like
+    bisection but converges superlinearly, and in a single step when func is
+    linear (as the final balance is in the starting salary).
+
+    Returns:
+        tuple: (x, evaluations)
+    """
+    f_low = func(low) - target
+    f_high = func(high) - target
+    evaluations = 2
+    side = 0
+    x = low
+
+    for _ in range(max_iterations):
+        x = (low * f_high - high * f_low) / (f_high - f_low)
+        f_x = func(x) - target
+        evaluations += 1
+
+        if abs(f_x) <= tolerance:
+            break
+        if f_x < 0:
+            low, f_low = x, f_x
+            if side == -1:
+                f_high /= 2
+            side = -1
+        else:
+            high, f_high = x, f_x
+            if side == 1:
+                f_low /= 2
+            side = 1
+
+    return x, evaluations
+
+
+def _first_age_reaching(balance_at, target, low, high):
+    """
+    Find the smallest whole age in [low, high] whose balance reaches target
+
+    balance_at need not be monotonic, but may turn at most once. The closed
+    form, nominal or deflated, is a sum of two exponentials in the number
+    of years, so it always qualifies. The turning age is found by bisecting
+    on the sign of the year-on-year change, then the target by bisecting
+    the side where the balance rises.
+
+    Returns:
+        tuple: (age, True), or if no age reaches target (age with the
+        largest balance, False)
+    """
+    if balance_at(low) >= target:
+        return low, True
+    if low == high:
+        return low, False
+
+    def rising(age):
+        return balance_at(age + 1) > balance_at(age)
+
+    # First age at which the balance stops moving the way it starts
+    rising_first = rising(low)
+    turn_low, turn_high = low + 1, high
+    while turn_low < turn_high:
+        middle = (turn_low + turn_high) // 2
+        if rising(middle) != rising_first:
+            turn_high = middle
+        else:
+            turn_low = middle + 1
+    turn = turn_low
+
+    if rising_first:
+        # Rises to a peak at turn, then falls
+        if balance_at(turn) < target:
+            return turn, False
+        rise_low, rise_high = low, turn
+    else:
+        # Falls to a trough at turn, then rises
+        if balance_at(high) < target:
+            return (low if balance_at(low) >= balance_at(high) else high), False
+        rise_low, rise_high = turn, high
+
+    while rise_low < rise_high:
+        middle = (rise_low + rise_high) // 2
+        if balance_at(middle) >= target:
+            rise_high = middle
+        else:
+            rise_low = middle + 1
+    return rise_low, True
+
+
+GOAL_SEEK_VARIABLES = ('retirementAge', 'basicSalary', 'epfInterestRate', 'annualIncrement')
+
+# Times the salary bracket may grow fourfold (to about 1e27 times its start)
+MAX_SALARY_BRACKET_STEPS = 45
+
+
+@timed
+def solve_retirement_goal(
+    target_amount: float,
+    solve_for: str,
+    current_age: int,
+    retirement_age: int,
+    basic_salary: float,
+    employee_epf_rate: int = 10,
+    annual_increment: float = 5.0,
+    epf_interest_rate: float = 9.5,
+    current_epf_balance: float = 0,
+    inflation_rate: float = 6.0,
+    real_terms: bool = False,
+    max_retirement_age: int = 75,
+    max_rate: float = 30.0
+) -> Dict:
+    """
+    Find the input value that makes the projection reach a target
+
+    Solves over the closed-form final balance, so each evaluation is O(1):
+    retirement age by bisection over whole years (in real terms, where the
+    balance can peak and fall, after first bisecting for the peak), and
+    salary, EPF rate or increment by bracketed false position.
+
+    Args:
+        target_amount: Target balance at retirement (LKR)
+        solve_for: One of GOAL_SEEK_VARIABLES; its given value is ignored
+        current_age: Current age
+        retirement_age: Target retirement age
+        basic_salary: Current monthly basic salary
+        employee_epf_rate: Employee EPF rate (8 or 10)
+        annual_increment: Expected annual salary increment percentage
+        epf_interest_rate: Expected EPF interest rate
+        current_epf_balance: Current EPF balance
+        inflation_rate: Expected inflation rate (used when real_terms)
+        real_terms: Compare the inflation-adjusted value with the target
+        max_retirement_age: Upper bound when solving for retirement age
+        max_rate: Upper bound (percent) when solving for a rate
+
+    Returns:
+        Dictionary with the solved value, the projection it gives and
+        whether the target is reachable within the search bounds (if not,
+        the value is the bound, or for retirement age the age whose
+        projection comes closest)
+    """
+    if solve_for not in GOAL_SEEK_VARIABLES:
+        raise ValueError(f"solve_for must be one of: {', '.join(GOAL_SEEK_VARIABLES)}")
+    if target_amount <= 0:
+        raise ValueError("Target amount must be positive")
+    if employee_epf_rate < 0:
+        raise ValueError("Employee EPF rate must not be negative")
+    if current_epf_balance < 0:
+        raise ValueError("Current EPF balance must not be negative")
+    if solve_for != 'basicSalary' and basic_salary < 0:
+        raise ValueError("Basic salary must not be negative")
+    if annual_increment <= -100 or epf_interest_rate <= -100:
+        raise ValueError("Rates must be greater than -100%")
+
+    params = {
+        'retirementAge': retirement_age,
+        'basicSalary': basic_salary,
+        'epfInterestRate': epf_interest_rate,
+        'annualIncrement': annual_increment
+    }
+
+    evaluations = 0
+
+    def projected(value):
+        nonlocal evaluations
+        evaluations += 1
+        inputs = dict(params, **{solve_for: value})
+        years = inputs['retirementAge'] - current_age
+        balance = _projected_final_balance(
+            years,
+            inputs['basicSalary'],
+            employee_epf_rate,
+            inputs['annualIncrement'],
+            inputs['epfInterestRate'],
+            current_epf_balance
+        )
+        if real_terms:
+            balance /= (1 + inflation_rate / 100) ** years
+        return balance
+
+    if solve_for == 'retirementAge':
+        low, high = current_age + 1, max_retirement_age
+        if high < low:
+            raise ValueError("Current age is beyond the maximum retirement age")
+        if real_terms or epf_interest_rate < 0 or annual_increment < 0:
+            # Not monotonic in age: once inflation outpaces growth the real
+            # value peaks and then falls
+            balance_by_years = _final_balance_by_years(
+                basic_salary, employee_epf_rate, annual_increment,
+                epf_interest_rate, current_epf_balance
+            )
+            deflator = 1 + inflation_rate / 100 if real_terms else 1.0
+            balances = {}
+
+            def balance_at(age):
+                nonlocal evaluations
+                if age not in balances:
+                    evaluations += 1
+                    years = age - current_age
+                    balances[age] = balance_by_years(years) / deflator ** years
+                return balances[age]
+
+            value, achievable = _first_age_reaching(balance_at, target_amount, low, high)
+        else:
+            achievable = projected(high) >= target_amount
+            if achievable:
+                # Smallest whole age whose projection reaches the target
+                while low < high:
+                    middle = (low + high) // 2
+                    if projected(middle) >= target_amount:
+                        high = middle
+                    else:
+                        low = middle + 1
+            value = high
+    else:
+        if retirement_age - current_age <= 0:
+            raise ValueError("Retirement age must be greater than current age")
+
+        if solve_for == 'basicSalary':
+            # The balance is affine in salary, so false position on the
+            # balance itself lands in one step once the root is bracketed
+            low, high = 0.0, max(basic_salary, 1000.0)
+            for _ in range(MAX_SALARY_BRACKET_STEPS):
+                if projected(high) >= target_amount:
+                    break
+                high *= 4
+            else:
+                raise ValueError("The target cannot be reached with any basic salary")
+            func, goal, tolerance = projected, target_amount, max(0.005, target_amount * 1e-10)
+        else:
+            # Rates act exponentially; the log of the balance is close to
+            # linear in them, which keeps false position to a few steps
+            low, high = 0.0, max_rate
+            func, goal, tolerance = (lambda x: math.log(projected(x))), math.log(target_amount), 1e-11
+
+        if projected(low) >= target_amount:
+            value, achievable = low, True
+        elif projected(high) < target_amount:
+            value, achievable = high, False
+        else:
+            value, _ = _solve_increasing(func, goal, low, high, tolerance)
+            achievable = True
+
+    years = (value if solve_for == 'retirementAge' else retirement_age) - current_age
+    return {
+        'solve_for': solve_for,
+        'value': value if solve_for == 'retirementAge' else round(value, 6),
+        'achievable': achievable,
+        'target_amount': round(target_amount, 2),
+        'real_terms': real_terms,
+        'projected_value': round(projected(value), 2),
+        'years_to_retirement': years,
+        'evaluations': evaluations - 1
+    }
+
+
+@timed
 def calculate_lump_sum_tax(withdrawal_amount: float) -> Dict[str, float]:
     """
     Calculate tax on EPF lump sum withdrawal (Sri Lankan tax rules)
@@ -0,0 +1,149 @@
+"""
+Columnar (struct-of-arrays) tables for per-year results
+
+A projection's yearly breakdown is held as one NumPy array per column
+instead of one dict per year. It is serialized as
+
+    {"columns": ["year", "age", ...], "data": {"year": [1, 2, ...], ...}}
+
+and converted to the legacy list of row dicts only when a client asks for
+it with ?layout=rows.
+"""
+from flask import request
+import numpy as np
+
+LAYOUT_COLUMNS = 'columns'
+LAYOUT_ROWS = 'rows'
+
+
+class ColumnarTable:
+    """
+    Immutable table of equal-length 1-D NumPy columns
+
+    Columns are made read-only because tables are shared through the
+    result cache. `decimals` maps column names to the number of decimals
+    they are rounded to on output; the stored values stay unrounded, so
+    later calculations (e.g. resuming from a checkpoint) see exact figures.
+    """
+
+    def __init__(self, columns, decimals=None):
+        self._decimals = dict(decimals or {})
+        self._columns = {}
+        length = None
+        for name, values in columns.items():
+            array = np.asarray(values)
+            if array.ndim != 1:
+                raise ValueError(f"Column {name} must be one-dimensional")
+            if length is None:
+                length = len(array)
+            elif len(array) != length:
+                raise ValueError("All columns must have the same length")
+            array.flags.writeable = False
+            self._columns[name] = array
+        self._length = length or 0
+
+    def __reduce__(self):
+        # Rebuild through __init__ so unpickled columns (e.g. from the Redis
+        # cache) are read-only again
+        return (ColumnarTable, (self._columns, self._decimals))
+
+    @property
+    def columns(self):
+        """Column names in order"""
+        return list(self._columns)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        """Return a column (unrounded) as a read-only NumPy array"""
+        return self._columns[name]
+
+    def rounded(self, name):
+        """Return a column rounded to its output decimals"""
+        values = self._columns[name]
+        decimals = self._decimals.get(name)
+        return values if decimals is None else np.round(values, decimals)
+
+    def head(self, count):
+        """Return a table of the first `count` rows (views, no copy)"""
+        return ColumnarTable(
+            {name: values[:count] for name, values in self._columns.items()},
+            self._decimals
+        )
+
+    @classmethod
+    def concat(cls, tables):
+        """Stack tables with the same columns end to end"""
+        names = tables[0].columns
+        decimals = {}
+        for table in tables:
+            decimals.update(table._decimals)
+        return cls(
+            {name: np.concatenate([table[name] for table in tables]) for name in names},
+            decimals
+        )
+
+    def iter_rows(self):
+        """Yield one dict per row with Python scalars"""
+        names = self.columns
+        for values in zip(*(self.rounded(name).tolist() for name in names)):
+            yield dict(zip(names, values))
+
+    def to_rows(self):
+        """Return the legacy list of row dicts"""
+        return list(self.iter_rows())
+
+    def to_arrays(self):
+        """Return {"columns": [...], "data": {column: rounded array}}"""
+        return {
+            'columns': self.columns,
+            'data': {name: self.rounded(name) for name in self._columns}
+        }
+
+    def to_json(self):
+        """Return {"columns": [...], "data": {column: [values]}} with lists"""
+        return {
+            'columns': self.columns,
+            'data': {name: self.rounded(name).tolist() for name in self._columns}
+        }
+
+    def serialize(self, layout=LAYOUT_COLUMNS):
+        """
+        Return the response form for the given layout
+
+        The columnar form is the table itself; the app's JSON provider
+        writes it out with to_arrays().
+        """
+        if layout == LAYOUT_ROWS:
+            return self.to_rows()
+        return self
+
+    @classmethod
+    def from_json(cls, payload):
+        """
+        Build a table from its columnar JSON form or from legacy rows
+
+        Raises:
+            ValueError: If payload is neither form
+        """
+        if isinstance(payload, cls):
+            return payload
+        if is_columnar(payload):
+            return cls({name: payload['data'][name] for name in payload['columns']})
+        if isinstance(payload, list) and payload and all(isinstance(row, dict) for row in payload):
+            names = list(payload[0])
+            return cls({name: [row[name] for row in payload] for name in names})
+        raise ValueError("Expected a columnar table or a non-empty list of rows")
+
+
+def is_columnar(payload):
+    """True if payload is the {"columns", "data"} JSON form"""
+    return isinstance(payload, dict) and 'columns' in payload and 'data' in payload
+
+
+def requested_layout():
+    """Return 'rows' if the request asked for ?layout=rows, else 'columns'"""
+    if request.args.get('layout') == LAYOUT_ROWS:
+        return LAYOUT_ROWS
+    return LAYOUT_COLUMNS
@@ -14,12 +14,23 @@ class Config:
     # Firebase Configuration
     FIREBASE_PROJECT_ID = os.environ.get('FIREBASE_PROJECT_ID', 'retireright-lk-41def')
 
+    # Verified ID token cache (entries expire at each token's own exp claim)
+    TOKEN_CACHE_ENABLED = os.environ.get('TOKEN_CACHE_ENABLED', 'true').lower() == 'true'
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+    # Seconds between background refreshes of Google's signing certificates (0 disables)
+    TOKEN_CERT_REFRESH_INTERVAL = int(os.environ.get('TOKEN_CERT_REFRESH_INTERVAL', 600))
+
     # Frontend URL for CORS
     FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
 
-    # Database Configuration (SQLite for MVP)
-    # No persistent relational database is used. The app relies on Firebase for
-    # authentication and keeps profiles/history in-memory (non-persistent).
+    # Storage for profiles and calculation history
+    # 'memory' keeps data per process (non-persistent); 'sqlite' uses an SQLite
+    # database in WAL mode that every gunicorn worker shares.
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'memory')
+    SQLITE_PATH = os.environ.get(
+        'SQLITE_PATH',
+        os.path.join(os.path.dirname(__file__), '..', 'data', 'app.db')
+    )
 
     # EPF Configuration (Sri Lanka)
     EPF_EMPLOYEE_RATE_OPTIONS = [8, 10]  # Percentage options
@@ -35,6 +46,129 @@ class Config:
     # Retirement age options
     RETIREMENT_AGE_OPTIONS = [55, 60, 65]
 
+    # Longest projection (retirementAge - currentAge) the array routes accept;
+    # batch and Monte Carlo results hold a value per profile or path and year
+    MAX_PROJECTION_YEARS = int(os.environ.get('MAX_PROJECTION_YEARS', 100))
+
+    # Goal-seek search bounds
+    GOAL_SEEK_MAX_RETIREMENT_AGE = 75
+    GOAL_SEEK_MAX_RATE = 30.0  # Percent, for EPF interest and salary increment
+
+    # Sensitivity grids (product of all axis lengths)
+    SENSITIVITY_MAX_CELLS = int(os.environ.get('SENSITIVITY_MAX_CELLS', 50000))
+
+    # Batch projections (profiles per request, in every output mode)
+    BATCH_MAX_PROFILES = int(os.environ.get('BATCH_MAX_PROFILES', 100000))
+
+    # Monte Carlo projections
+    MONTE_CARLO_DEFAULT_PATHS = int(os.environ.get('MONTE_CARLO_DEFAULT_PATHS', 10000))
+    MONTE_CARLO_MAX_PATHS = int(os.environ.get('MONTE_CARLO_MAX_PATHS', 100000))
+    MONTE_CARLO_CHUNK_SIZE = int(os.environ.get('MONTE_CARLO_CHUNK_SIZE', 10000))
+
+    # Instrumentation (both off by default)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILE_ALL_REQUESTS = os.environ.get('PROFILE_ALL_REQUESTS', 'false').lower() == 'true'
+    PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.002))  # Seconds
+    PROFILE_DIR = os.environ.get(
+        'PROFILE_DIR',
+        os.path.join(os.path.dirname(__file__), '..', 'instance', 'profiles')
+    )
+    # Value a request's X-Profile header must carry to be profiled (unset:
+    # only PROFILE_ALL_REQUESTS profiles), and profiles kept in PROFILE_DIR
+    PROFILE_SECRET = os.environ.get('PROFILE_SECRET', '')
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 200))
+
+    # Result cache for deterministic calculator functions
+    CALCULATION_CACHE_ENABLED = os.environ.get('CALCULATION_CACHE_ENABLED', 'true').lower() == 'true'
+    CALCULATION_CACHE_SIZE = int(os.environ.get('CALCULATION_CACHE_SIZE', 2048))
+    CALCULATION_CACHE_TTL = int(os.environ.get('CALCULATION_CACHE_TTL', 300))  # Seconds
+    CALCULATION_CACHE_PRECISION = 4  # Decimal places used when keying float inputs
+
+    # Cache backend for calculation results and per-user reads: 'memory'
+    # (per process) or 'redis' (shared by all workers; the server must be
+    # trusted because values are pickled)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_REDIS_MAX_CONNECTIONS = int(os.environ.get('CACHE_REDIS_MAX_CONNECTIONS', 16))  # Per worker
+    CACHE_REDIS_TIMEOUT = float(os.environ.get('CACHE_REDIS_TIMEOUT', 0.25))  # Seconds
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'retireright:')
+
+    # Profile and first history page reads (invalidated on every write). Not
+    # used with shared (sqlite) storage unless CACHE_BACKEND is 'redis'.
+    USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', 'true').lower() == 'true'
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))  # Seconds
+
+    # Identical concurrent calculator requests share one computation. With
+    # SINGLE_FLIGHT_SHARED, workers also coordinate through an SQLite file
+    # and finished responses stay readable there for SINGLE_FLIGHT_RESULT_TTL.
+    SINGLE_FLIGHT_ENABLED = os.environ.get('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+    SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', 30))  # Seconds
+    SINGLE_FLIGHT_SHARED = os.environ.get('SINGLE_FLIGHT_SHARED', 'false').lower() == 'true'
+    SINGLE_FLIGHT_SHARED_PATH = os.environ.get(
+        'SINGLE_FLIGHT_SHARED_PATH',
+        os.path.join(os.path.dirname(__file__), '..', 'data', 'singleflight.db')
+    )
+    SINGLE_FLIGHT_RESULT_TTL = float(os.environ.get('SINGLE_FLIGHT_RESULT_TTL', 1.0))  # Seconds
+
+    # JSON encoder for responses: 'auto' (orjson if installed), 'orjson' or 'stdlib'
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+
+    # Profiles computed per chunk when streaming batch results
+    STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 5000))
+
+    # Batch runs stored with "store": true (memory-mapped .npy files)
+    BATCH_RESULTS_DIR = os.environ.get(
+        'BATCH_RESULTS_DIR',
+        os.path.join(os.path.dirname(__file__), '..', 'data', 'batch-runs')
+    )
+    BATCH_RESULTS_TTL = int(os.environ.get('BATCH_RESULTS_TTL', 86400))  # Seconds
+    BATCH_RESULTS_PAGE_SIZE = int(os.environ.get('BATCH_RESULTS_PAGE_SIZE', 1000))  # Profiles
+    BATCH_RESULTS_MAX_PAGE_SIZE = int(os.environ.get('BATCH_RESULTS_MAX_PAGE_SIZE', 10000))
+
+    # Per-client limits on calculator routes, keyed by Firebase uid or client
+    # IP. Cost units are about one scenario-year of projection work; see
+    # app/ratelimit.py. All limits apply per worker process.
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_REQUESTS_PER_SECOND = float(os.environ.get('RATE_LIMIT_REQUESTS_PER_SECOND', 20))
+    RATE_LIMIT_BURST = float(os.environ.get('RATE_LIMIT_BURST', 40))  # Requests
+    RATE_LIMIT_MAX_CLIENTS = int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', 10000))
+    # Reverse proxies in front of the app whose X-Forwarded-For is trusted
+    RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', 0))
+    # Cost bucket per client; a request costing more than the burst needs a
+    # full bucket, and one above ADMISSION_MAX_REQUEST_COST is refused (413)
+    ADMISSION_COST_PER_SECOND = float(os.environ.get('ADMISSION_COST_PER_SECOND', 50000))
+    ADMISSION_COST_BURST = float(os.environ.get('ADMISSION_COST_BURST', 500000))
+    ADMISSION_MAX_REQUEST_COST = float(os.environ.get('ADMISSION_MAX_REQUEST_COST', 2000000))  # Else 413
+    ADMISSION_CHEAP_COST = float(os.environ.get('ADMISSION_CHEAP_COST', 1000))  # Never shed
+    ADMISSION_MAX_INFLIGHT_COST = float(os.environ.get('ADMISSION_MAX_INFLIGHT_COST', 500000))
+
+    # Background jobs (/api/jobs). Job rows are shared by all workers through
+    # an SQLite file; each worker runs the jobs it accepted on JOBS_WORKERS
+    # threads and queues at most JOBS_QUEUE_SIZE more.
+    JOBS_DB_PATH = os.environ.get(
+        'JOBS_DB_PATH',
+        os.path.join(os.path.dirname(__file__), '..', 'data', 'jobs.db')
+    )
+    JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2))  # Per worker process
+    JOBS_QUEUE_SIZE = int(os.environ.get('JOBS_QUEUE_SIZE', 32))  # Per worker process
+    JOBS_MAX_PER_USER = int(os.environ.get('JOBS_MAX_PER_USER', 2))  # Queued or running
+    JOBS_RESULT_TTL = int(os.environ.get('JOBS_RESULT_TTL', 3600))  # Seconds
+    JOBS_RETRY_AFTER = int(os.environ.get('JOBS_RETRY_AFTER', 5))  # Seconds, on 429/503
+    # Largest estimated cost (in admission cost units) a job may have; jobs take
+    # the work ADMISSION_MAX_REQUEST_COST refuses, but not without bound
+    JOBS_MAX_COST = float(os.environ.get('JOBS_MAX_COST', 50000000))  # Else 413
+
+    # Scenario comparisons at or above the threshold run on a process pool
+    SCENARIO_PARALLEL_THRESHOLD = int(os.environ.get('SCENARIO_PARALLEL_THRESHOLD', 200))
+    SCENARIO_MAX_WORKERS = int(os.environ.get('SCENARIO_MAX_WORKERS', min(4, os.cpu_count() or 1)))
+
+    # Thread pools used when served through asgi.py (uvicorn): the I/O pool
+    # runs token verification, the request pool runs the Flask views
+    ASGI_IO_WORKERS = int(os.environ.get('ASGI_IO_WORKERS', 64))
+    ASGI_REQUEST_WORKERS = int(os.environ.get('ASGI_REQUEST_WORKERS', min(32, (os.cpu_count() or 1) + 4)))
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -55,7 +189,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     DEBUG = True
     TESTING = True
-    # No DB settings for testing by default
+    STORAGE_BACKEND = 'memory'
 
 
 # Configuration dictionary
@@ -0,0 +1,66 @@
+"""
+Thread pools that keep blocking work off the ASGI event loop
+
+Used only when the app runs under an ASGI server (see app/asgi.py):
+
+- the I/O pool runs calls that mostly wait (Firebase token verification,
+  storage access), so it can be much larger than the CPU count
+- the request pool runs the synchronous Flask views, including all NumPy
+  calculation work
+
+Pools are created on first use so nothing is started before a pre-fork
+server forks its workers.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import os
+import threading
+
+_settings = {
+    'io_workers': 64,
+    'request_workers': min(32, (os.cpu_count() or 1) + 4)
+}
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def configure_executors(io_workers, request_workers):
+    """Set pool sizes; takes effect for pools not created yet"""
+    _settings['io_workers'] = io_workers
+    _settings['request_workers'] = request_workers
+
+
+def _get_pool(kind):
+    pool = _pools.get(kind)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(kind)
+            if pool is None:
+                pool = ThreadPoolExecutor(
+                    max_workers=_settings[f'{kind}_workers'],
+                    thread_name_prefix=f'asgi-{kind}'
+                )
+                _pools[kind] = pool
+    return pool
+
+
+def shutdown_executors(wait=True):
+    """Stop both pools (they are recreated on next use)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
+
+
+async def run_io(func, *args, **kwargs):
+    """Await func(*args, **kwargs) on the I/O pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool('io'), partial(func, *args, **kwargs))
+
+
+async def run_request(func, *args, **kwargs):
+    """Await func(*args, **kwargs) on the request (CPU) pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool('request'), partial(func, *args, **kwargs))
@@ -0,0 +1,77 @@
+"""
+Lazy Firebase Admin SDK initialization
+
+firebase_admin and its google-auth/requests/cryptography stack take a few
+hundred milliseconds to import, and initializing the SDK parses the
+service account and builds HTTP sessions. Neither is needed to serve the
+calculator routes, so both happen on the first token verification in each
+worker process. Nothing Firebase-related exists in a gunicorn master that
+preloads the app, so no session or socket is inherited across the fork.
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_state = {'pid': None, 'app': None}
+
+
+def _credentials():
+    """
+    Load the service account credentials
+
+    Returns:
+        tuple: (credentials, source) with source "environment variable" or
+        "file", or (None, None) if no service account is configured
+    """
+    from firebase_admin import credentials
+
+    # Base64-encoded service account from environment variable (production)
+    service_account_base64 = os.environ.get('FIREBASE_SERVICE_ACCOUNT_BASE64')
+    if service_account_base64:
+        import base64
+        import json
+        service_account_json = base64.b64decode(service_account_base64)
+        service_account_dict = json.loads(service_account_json)
+        return credentials.Certificate(service_account_dict), 'environment variable'
+
+    # Fall back to file (for local development)
+    cred_path = os.path.join(os.path.dirname(__file__), '..', 'firebase-service-account.json')
+    if os.path.exists(cred_path):
+        return credentials.Certificate(cred_path), 'file'
+
+    return None, None
+
+
+def get_firebase_app():
+    """
+    Return the default Firebase app, initializing the SDK on first use
+
+    Returns:
+        firebase_admin.App, or None if no service account is configured
+        (verification then fails with the SDK's own "no app" error)
+    """
+    if _state['pid'] == os.getpid():
+        return _state['app']
+
+    with _lock:
+        if _state['pid'] != os.getpid():
+            import firebase_admin
+
+            try:
+                # Already initialized (e.g. by a script or an earlier app)
+                _state['app'] = firebase_admin.get_app()
+            except ValueError:
+                cred, source = _credentials()
+                if cred is None:
+                    logger.warning("Firebase service account not configured. "
+                                   "Authentication will not work.")
+                    _state['app'] = None
+                else:
+                    _state['app'] = firebase_admin.initialize_app(cred)
+                    logger.info(f"Firebase initialized from {source}")
+            _state['pid'] = os.getpid()
+    return _state['app']
+
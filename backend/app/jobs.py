@@ -0,0 +1,456 @@
+"""
+Background jobs for long-running calculator requests
+
+A job runs one of the calculator views (scenario comparison, sensitivity
+grid, Monte Carlo, ...) outside the HTTP request, so it is not bound by the
+server's worker timeout. Clients submit a job, get its id and poll for
+status, progress and finally the result.
+
+Job rows live in a small SQLite file shared by every worker process, so any
+worker can answer a poll. Each process executes the jobs it accepted on its
+own pool of JOBS_WORKERS threads fed by a queue of at most JOBS_QUEUE_SIZE
+jobs; the threads are started on the first submission, after any pre-fork.
+Finished results are kept for JOBS_RESULT_TTL seconds. A job whose process
+exited before finishing it is reported as failed.
+"""
+from contextvars import ContextVar
+from datetime import datetime
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Job type -> calculator endpoint whose view computes it
+JOB_TYPES = {
+    'retirementProjection': 'calculator.retirement_projection',
+    'batch': 'calculator.retirement_projection_batch',
+    'monteCarlo': 'calculator.monte_carlo_projection',
+    'goalSeek': 'calculator.goal_seek',
+    'sensitivity': 'calculator.sensitivity',
+    'compare': 'calculator.compare_scenarios'
+}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# Progress is written to the job row at most this often (seconds)
+PROGRESS_INTERVAL = 0.25
+
+_progress_callback = ContextVar('job_progress_callback', default=None)
+
+
+class QueueFullError(Exception):
+    """Raised when this worker's job queue has no free slot"""
+
+
+class JobLimitError(Exception):
+    """Raised when a user already has the maximum number of active jobs"""
+
+
+def report_progress(done, total):
+    """
+    Report how much of the current job is done
+
+    Calculation code calls this between chunks of work; outside a job it
+    does nothing.
+
+    Args:
+        done: Units of work finished so far
+        total: Total units of work
+    """
+    callback = _progress_callback.get()
+    if callback is not None and total:
+        callback(min(done / total, 1.0))
+
+
+def _isoformat(timestamp):
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+class JobStore:
+    """
+    SQLite table of jobs in WAL mode, shared by every worker process
+
+    Each thread gets its own connection, opened lazily so no connection is
+    inherited across a fork (as in SQLiteStorage). The file and its schema
+    are created by the first connection, so an app that never runs a job
+    leaves nothing on disk.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            uid TEXT NOT NULL,
+            type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            progress REAL NOT NULL DEFAULT 0,
+            owner_pid INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            expires_at REAL,
+            error TEXT,
+            result_status INTEGER,
+            result BLOB
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_uid_status ON jobs (uid, status)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_expires_at ON jobs (expires_at)"
+    )
+
+    COLUMNS = (
+        "id, uid, type, status, progress, owner_pid, created_at, started_at, "
+        "finished_at, expires_at, error, result_status"
+    )
+    COUNT_ACTIVE = "SELECT COUNT(*) FROM jobs WHERE uid = ? AND status IN ('queued', 'running')"
+    INSERT = (
+        "INSERT INTO jobs (id, uid, type, status, owner_pid, created_at) "
+        "VALUES (?, ?, ?, 'queued', ?, ?)"
+    )
+    SELECT = f"SELECT {COLUMNS} FROM jobs WHERE id = ? AND uid = ?"
+    SELECT_FOR_USER = (
+        f"SELECT {COLUMNS} FROM jobs WHERE uid = ? ORDER BY created_at DESC LIMIT ?"
+    )
+    SELECT_RESULT = "SELECT result_status, result FROM jobs WHERE id = ? AND uid = ?"
+    SELECT_ACTIVE = "SELECT id, owner_pid FROM jobs WHERE status IN ('queued', 'running')"
+    CLAIM = (
+        "UPDATE jobs SET status = 'running', started_at = ? "
+        "WHERE id = ? AND status = 'queued'"
+    )
+    PROGRESS = "UPDATE jobs SET progress = ? WHERE id = ? AND status = 'running'"
+    FINISH = (
+        "UPDATE jobs SET status = ?, progress = COALESCE(?, progress), finished_at = ?, "
+        "expires_at = ?, error = ?, result_status = ?, result = ? WHERE id = ?"
+    )
+    ABANDON = (
+        "UPDATE jobs SET status = 'failed', finished_at = ?, expires_at = ?, error = ? "
+        "WHERE id = ? AND status IN ('queued', 'running')"
+    )
+    CANCEL = (
+        "UPDATE jobs SET status = 'cancelled', finished_at = ?, expires_at = ? "
+        "WHERE id = ? AND uid = ? AND status = 'queued'"
+    )
+    DELETE = "DELETE FROM jobs WHERE id = ? AND uid = ? AND status NOT IN ('queued', 'running')"
+    DELETE_UNQUEUED = "DELETE FROM jobs WHERE id = ?"
+    PURGE = "DELETE FROM jobs WHERE expires_at < ?"
+
+    def __init__(self, path, result_ttl=3600, busy_timeout=5.0):
+        self.path = path
+        self.result_ttl = result_ttl
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _create_schema(self):
+        """Create the file and its tables, once per store"""
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            try:
+                with connection:
+                    for statement in self.SCHEMA:
+                        connection.execute(statement)
+            finally:
+                connection.close()
+            self._schema_ready = True
+
+    def _connect(self):
+        if not self._schema_ready:
+            self._create_schema()
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @property
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _row_to_job(self, row):
+        (job_id, _, job_type, status, progress, _, created_at, started_at,
+         finished_at, expires_at, error, _) = row
+        return {
+            'id': job_id,
+            'type': job_type,
+            'status': status,
+            'progress': round(progress, 4),
+            'createdAt': _isoformat(created_at),
+            'startedAt': _isoformat(started_at),
+            'finishedAt': _isoformat(finished_at),
+            'expiresAt': _isoformat(expires_at),
+            'error': error
+        }
+
+    def create(self, uid, job_type, max_active):
+        """
+        Insert a queued job for uid
+
+        The count of the user's active jobs and the insert run in one write
+        transaction, so concurrent submissions from several workers cannot
+        exceed max_active.
+
+        Returns:
+            str: The new job id
+
+        Raises:
+            JobLimitError: If uid already has max_active queued/running jobs
+        """
+        job_id = uuid.uuid4().hex
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            active = connection.execute(self.COUNT_ACTIVE, (uid,)).fetchone()[0]
+            if active >= max_active:
+                raise JobLimitError(f'At most {max_active} jobs may be queued or running at once')
+            connection.execute(self.INSERT, (job_id, uid, job_type, os.getpid(), time.time()))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def remove_unqueued(self, job_id):
+        """Delete a job that could not be queued"""
+        self._connection.execute(self.DELETE_UNQUEUED, (job_id,))
+
+    def get(self, uid, job_id):
+        """Return a job's status dict, or None if uid has no such job"""
+        row = self._connection.execute(self.SELECT, (job_id, uid)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, uid, limit=50):
+        """Return uid's most recent jobs, newest first"""
+        rows = self._connection.execute(self.SELECT_FOR_USER, (uid, limit)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def get_result(self, uid, job_id):
+        """Return (HTTP status, JSON body bytes) of a finished job, or None"""
+        row = self._connection.execute(self.SELECT_RESULT, (job_id, uid)).fetchone()
+        if row is None or row[1] is None:
+            return None
+        return row[0], row[1]
+
+    def claim(self, job_id):
+        """Mark a queued job running; False if it was cancelled meanwhile"""
+        return self._connection.execute(self.CLAIM, (time.time(), job_id)).rowcount == 1
+
+    def set_progress(self, job_id, progress):
+        self._connection.execute(self.PROGRESS, (progress, job_id))
+
+    def finish(self, job_id, status, error=None, result_status=None, result=None):
+        """Record a job's outcome and start its result's TTL"""
+        now = time.time()
+        self._connection.execute(self.FINISH, (
+            status, 1.0 if status == SUCCEEDED else None, now, now + self.result_ttl,
+            error, result_status, result, job_id
+        ))
+
+    def cancel(self, uid, job_id):
+        """Cancel a queued job; False if it is not queued (or not uid's)"""
+        now = time.time()
+        return self._connection.execute(
+            self.CANCEL, (now, now + self.result_ttl, job_id, uid)
+        ).rowcount == 1
+
+    def delete(self, uid, job_id):
+        """Delete a finished job and its result; False if it is still active"""
+        return self._connection.execute(self.DELETE, (job_id, uid)).rowcount == 1
+
+    def purge(self):
+        """
+        Drop expired jobs and fail active jobs whose worker process exited
+
+        Process ids are only meaningful on this host, so every process
+        using the file must run on the same machine.
+        """
+        now = time.time()
+        connection = self._connection
+        connection.execute(self.PURGE, (now,))
+        for job_id, owner_pid in connection.execute(self.SELECT_ACTIVE).fetchall():
+            if owner_pid != os.getpid() and not _process_alive(owner_pid):
+                connection.execute(self.ABANDON, (
+                    now, now + self.result_ttl, 'Worker process exited before the job finished', job_id
+                ))
+
+
+class JobManager:
+    """
+    Queue and thread pool executing jobs accepted by this process
+
+    Args:
+        app: Flask app whose calculator views run the jobs
+        store: JobStore shared with the other workers
+        workers: Threads executing jobs in this process
+        queue_size: Jobs that may wait for a thread in this process
+        max_per_user: Queued or running jobs allowed per user (all workers)
+    """
+
+    def __init__(self, app, store, workers=2, queue_size=32, max_per_user=2):
+        self.app = app
+        self.store = store
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_per_user = max_per_user
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._running = 0
+
+    def _ensure_workers(self):
+        """Start this process's queue and threads on first use (per pid)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._running = 0
+                for index in range(self.workers):
+                    threading.Thread(
+                        target=self._work, name=f'job-worker-{index}', daemon=True
+                    ).start()
+                self._pid = os.getpid()
+
+    def submit(self, uid, job_type, payload):
+        """
+        Queue a job for uid
+
+        Args:
+            uid: Owner's Firebase UID
+            job_type: A JOB_TYPES key
+            payload: JSON body for the calculator view
+
+        Returns:
+            str: The job id
+
+        Raises:
+            JobLimitError: If uid has too many active jobs
+            QueueFullError: If this worker's queue is full
+        """
+        self._ensure_workers()
+        self.store.purge()
+        job_id = self.store.create(uid, job_type, self.max_per_user)
+        try:
+            self._queue.put_nowait((job_id, job_type, payload))
+        except queue.Full:
+            self.store.remove_unqueued(job_id)
+            raise QueueFullError('The job queue is full')
+        return job_id
+
+    def _work(self):
+        while True:
+            job_id, job_type, payload = self._queue.get()
+            with self._lock:
+                self._running += 1
+            try:
+                self._run(job_id, job_type, payload)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}")
+                try:
+                    self.store.finish(job_id, FAILED, error=str(e))
+                except sqlite3.Error:
+                    logger.exception(f"Could not record failure of job {job_id}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self._queue.task_done()
+
+    def _run(self, job_id, job_type, payload):
+        if not self.store.claim(job_id):
+            return  # Cancelled while queued
+
+        last_write = [0.0]
+
+        def progress(fraction):
+            now = time.monotonic()
+            if now - last_write[0] >= PROGRESS_INTERVAL:
+                last_write[0] = now
+                self.store.set_progress(job_id, fraction)
+
+        token = _progress_callback.set(progress)
+        try:
+            status, body = self._execute(JOB_TYPES[job_type], payload)
+        finally:
+            _progress_callback.reset(token)
+
+        if status < 400:
+            self.store.finish(job_id, SUCCEEDED, result_status=status, result=body)
+        else:
+            try:
+                error = json.loads(body).get('message')
+            except (ValueError, AttributeError):
+                error = None
+            self.store.finish(
+                job_id, FAILED, error=error or f'Calculation returned HTTP {status}',
+                result_status=status, result=body
+            )
+
+    def _execute(self, endpoint, payload):
+        """Call the endpoint's view with payload as its JSON body"""
+        app = self.app
+        path = next(app.url_map.iter_rules(endpoint)).rule
+        with app.test_request_context(path, method='POST', json=payload):
+            response = app.make_response(app.view_functions[endpoint]())
+            return response.status_code, response.get_data()
+
+    def stats(self):
+        """Return this process's queued and running job counts"""
+        with self._lock:
+            started = self._pid == os.getpid()
+            return {
+                'workers': self.workers if started else 0,
+                'queued': self._queue.qsize() if started else 0,
+                'running': self._running if started else 0,
+                'queueSize': self.queue_size
+            }
+
+
+_manager = None
+
+
+def init_jobs(app):
+    """Create the job store and manager from the JOBS_* settings"""
+    global _manager
+
+    store = JobStore(app.config['JOBS_DB_PATH'], result_ttl=app.config['JOBS_RESULT_TTL'])
+    _manager = JobManager(
+        app, store,
+        workers=app.config['JOBS_WORKERS'],
+        queue_size=app.config['JOBS_QUEUE_SIZE'],
+        max_per_user=app.config['JOBS_MAX_PER_USER']
+    )
+    return _manager
+
+
+def get_job_manager():
+    """Return the job manager"""
+    return _manager
@@ -0,0 +1,88 @@
+"""
+JSON providers for the Flask app
+
+create_app installs one according to JSON_PROVIDER:
+
+- "orjson": orjson, which also writes NumPy arrays and scalars natively
+- "stdlib": Flask's json-module provider, extended for NumPy values
+- "auto" (default): orjson when it is installed, stdlib otherwise
+
+Both write ColumnarTable values in their {"columns", "data"} form, rounding
+each column once at serialization time.
+"""
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from app.columnar import ColumnarTable
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+
+def _numpy_default(obj):
+    """Convert NumPy values and tables; defer everything else to Flask"""
+    if isinstance(obj, ColumnarTable):
+        return obj.to_arrays()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return DefaultJSONProvider.default(obj)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider with NumPy and ColumnarTable support"""
+
+    default = staticmethod(_numpy_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    orjson-backed provider
+
+    Responses are written straight to bytes (no str round trip). Unlike the
+    stdlib provider, keys are not sorted, NaN/Infinity become null and
+    datetimes are written as ISO 8601 strings.
+    """
+
+    OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson else 0
+    mimetype = 'application/json'
+
+    def _dumps_bytes(self, obj):
+        options = self.OPTIONS
+        if self._app.debug:
+            options |= orjson.OPT_INDENT_2
+        # Arrays orjson cannot write natively (non-contiguous, object dtype)
+        # fall back to _numpy_default
+        return orjson.dumps(obj, default=_numpy_default, option=options)
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj), mimetype=self.mimetype)
+
+
+PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'stdlib': StdlibJSONProvider
+}
+
+
+def init_json(app):
+    """Install the JSON provider selected by JSON_PROVIDER"""
+    name = app.config['JSON_PROVIDER']
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown JSON provider: {name}")
+    if name == 'orjson' and orjson is None:
+        raise ValueError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+
+    app.json = PROVIDERS[name](app)
+    return name
@@ -0,0 +1,248 @@
+"""
+Opt-in latency instrumentation and per-request sampling profiler
+
+Enabled with METRICS_ENABLED / PROFILING_ENABLED. When both are off no
+request hooks are registered and timed() functions pay a single flag check.
+"""
+from collections import Counter
+from functools import wraps
+from flask import Response, g, request
+from datetime import datetime
+import bisect
+import hmac
+import os
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (Prometheus "le" bounds, +Inf is implicit)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram with a fixed label set"""
+
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts, sum, count]
+
+    def observe(self, labels, value):
+        """Record one observation for the given label values"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        """Return the histogram in Prometheus text exposition format"""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram'
+        ]
+        with self._lock:
+            series = sorted(self._series.items())
+
+        for labels, (counts, total, count) in series:
+            label_text = ','.join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)
+            )
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_LATENCY = Histogram(
+    'retireright_request_duration_seconds',
+    'Time spent handling a request, by endpoint',
+    ('endpoint', 'method', 'status')
+)
+FUNCTION_LATENCY = Histogram(
+    'retireright_function_duration_seconds',
+    'Time spent in token verification and calculation functions',
+    ('function',)
+)
+
+_enabled = False
+
+
+def timed(func):
+    """
+    Record the wall time of func in FUNCTION_LATENCY when metrics are on
+
+    Used on verify_firebase_token and the calculation functions so /metrics
+    can split request time between auth and computation.
+    """
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            FUNCTION_LATENCY.observe((name,), time.perf_counter() - start)
+
+    return wrapper
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread
+
+    A background thread snapshots the target thread's stack every `interval`
+    seconds. Stacks are aggregated in collapsed ("folded") form, which
+    flamegraph tools read directly.
+    """
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def folded(self):
+        """Return samples as 'frame;frame;frame count' lines"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.observe(
+            (endpoint, request.method, str(response.status_code)),
+            time.perf_counter() - start
+        )
+    return response
+
+
+def _prune_profiles(profile_dir, max_files):
+    """Delete the oldest profiles so at most max_files remain"""
+    names = sorted(name for name in os.listdir(profile_dir) if name.endswith('.folded'))
+    for name in names[:max(len(names) - max_files, 0)]:
+        try:
+            os.remove(os.path.join(profile_dir, name))
+        except FileNotFoundError:
+            pass  # Pruned concurrently by another worker
+
+
+def _make_profiler_hooks(app):
+    profile_dir = app.config['PROFILE_DIR']
+    interval = app.config['PROFILE_SAMPLE_INTERVAL']
+    profile_all = app.config['PROFILE_ALL_REQUESTS']
+    secret = app.config['PROFILE_SECRET'].encode('utf-8')
+    max_files = app.config['PROFILE_MAX_FILES']
+
+    def profile_requested():
+        header = request.headers.get('X-Profile')
+        return bool(secret) and header is not None and hmac.compare_digest(
+            header.encode('utf-8'), secret
+        )
+
+    def start_profiler():
+        if profile_all or profile_requested():
+            g.profiler = SamplingProfiler(threading.get_ident(), interval).start()
+
+    def stop_profiler(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+
+        profiler.stop()
+        endpoint = request.endpoint or 'unmatched'
+        filename = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{endpoint}.folded"
+        try:
+            os.makedirs(profile_dir, exist_ok=True)
+            with open(os.path.join(profile_dir, filename), 'w') as f:
+                f.write(profiler.folded())
+            _prune_profiles(profile_dir, max_files)
+            response.headers['X-Profile-File'] = filename
+        except OSError as e:
+            logger.error(f"Failed to write profile: {str(e)}")
+        response.headers['X-Profile-Samples'] = str(sum(profiler.samples.values()))
+        return response
+
+    return start_profiler, stop_profiler
+
+
+def render_metrics():
+    """Return all metrics in Prometheus text format"""
+    return REQUEST_LATENCY.render() + '\n' + FUNCTION_LATENCY.render() + '\n'
+
+
+def init_metrics(app):
+    """
+    Register instrumentation hooks according to the app config
+
+    METRICS_ENABLED adds request/function latency histograms and /metrics.
+    PROFILING_ENABLED lets a request whose "X-Profile" header equals
+    PROFILE_SECRET (or every request, with PROFILE_ALL_REQUESTS) be sampled;
+    the folded stacks are written to PROFILE_DIR, which keeps the newest
+    PROFILE_MAX_FILES, and named in the X-Profile-File response header.
+    """
+    global _enabled
+
+    if app.config['PROFILING_ENABLED']:
+        # Registered first so the profiler brackets the metrics hooks too
+        start_profiler, stop_profiler = _make_profiler_hooks(app)
+        app.before_request(start_profiler)
+        app.after_request(stop_profiler)
+
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    _enabled = True
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
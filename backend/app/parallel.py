@@ -0,0 +1,96 @@
+"""
+Process-pool helpers for CPU-heavy calculator work
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool(max_workers):
+    """
+    Return the shared process pool, creating it on first use
+
+    The pool is kept for the lifetime of the worker process so requests do
+    not pay process start-up cost. It uses the 'spawn' start method because
+    forking a threaded gunicorn worker can copy held locks into the child.
+
+    Args:
+        max_workers: Number of worker processes
+
+    Returns:
+        ProcessPoolExecutor shared by all requests in this process
+    """
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _pool_workers = max_workers
+        return _pool
+
+
+def _reset_pool():
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+        _pool_workers = None
+
+
+def _apply_shard(func, shard):
+    """Run func over one shard inside a worker process"""
+    return [func(item) for item in shard]
+
+
+def map_sharded(func, items, max_workers, shards_per_worker=4, progress=None):
+    """
+    Apply func to every item, sharding the list across the process pool
+
+    Items are grouped into contiguous shards so each task amortises the
+    pickling overhead over many items. Results keep the input order. If the
+    pool cannot be used the items are processed serially instead.
+
+    Args:
+        func: Module-level (picklable) function taking a single item
+        items: List of items to process
+        max_workers: Number of worker processes
+        shards_per_worker: Shards submitted per worker, for load balancing
+        progress: Optional callback called as progress(items_done, items)
+            as shards complete
+
+    Returns:
+        List of func(item) results in input order
+    """
+    shard_count = max(1, min(len(items), max_workers * shards_per_worker))
+    shard_size = -(-len(items) // shard_count)
+    shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+
+    try:
+        pool = get_process_pool(max_workers)
+        futures = [pool.submit(_apply_shard, func, shard) for shard in shards]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+            if progress is not None:
+                progress(len(results), len(items))
+        return results
+    except BrokenProcessPool as e:
+        logger.error(f"Process pool failed, falling back to serial execution: {str(e)}")
+        _reset_pool()
+        return [func(item) for item in items]
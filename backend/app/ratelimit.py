@@ -0,0 +1,371 @@
+"""
+Per-client rate limiting and cost-based admission for calculator routes
+
+Every calculator request is checked before its view runs:
+
+1. The client is identified by Firebase uid when the request carries a
+   token this worker has already verified (found in the token cache; no
+   token is verified just to pick the key), otherwise by IP address.
+2. Routes declare the work a request asks for with @request_cost; the
+   estimate is in cost units, one unit being about one scenario-year of a
+   scalar projection. A request estimated above ADMISSION_MAX_REQUEST_COST
+   is refused with 413; such work belongs in a background job (/api/jobs).
+   A body the estimate rejects outright (RequestRejected) gets 400.
+3. Each client has two token buckets: one request per request
+   (RATE_LIMIT_REQUESTS_PER_SECOND, burst RATE_LIMIT_BURST) and one for
+   cost units (ADMISSION_COST_PER_SECOND, burst ADMISSION_COST_BURST).
+   A request that either bucket cannot cover gets 429 with Retry-After set
+   to when it can.
+4. Requests costing more than ADMISSION_CHEAP_COST are shed with 503 when
+   the requests already running in this process would exceed
+   ADMISSION_MAX_INFLIGHT_COST, so heavy work cannot pile up behind cheap
+   requests and stretch their latency.
+
+Buckets and the in-flight total are kept per worker process.
+"""
+from collections import OrderedDict
+from flask import current_app, g, jsonify, request
+from app.auth import VERIFIED_TOKEN_ENVIRON_KEY, bearer_token, cached_token
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RequestRejected(Exception):
+    """Raised by a cost estimate for a request that must be refused outright (400)"""
+
+
+class TokenBuckets:
+    """
+    Request and cost token buckets for many clients
+
+    Each client's buckets start full and refill continuously. Only the
+    `max_clients` most recently seen clients are tracked; a forgotten
+    client starts again with full buckets.
+
+    Args:
+        request_rate: Requests refilled per second
+        request_burst: Request bucket capacity
+        cost_rate: Cost units refilled per second
+        cost_burst: Cost bucket capacity
+        max_clients: Clients tracked at once
+    """
+
+    def __init__(self, request_rate, request_burst, cost_rate, cost_burst, max_clients=10000):
+        self.request_rate = request_rate
+        self.request_burst = request_burst
+        self.cost_rate = cost_rate
+        self.cost_burst = cost_burst
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> [request tokens, cost tokens, updated]
+
+    def take(self, key, cost, now=None):
+        """
+        Take one request and `cost` units from key's buckets if both allow
+
+        Nothing is taken unless both buckets can cover the request. A cost
+        above the bucket's capacity needs (and empties) a full bucket.
+
+        Returns:
+            float: 0 if the request was admitted, otherwise the seconds
+            until it would be
+        """
+        now = time.monotonic() if now is None else now
+        cost = min(cost, self.cost_burst)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [self.request_burst, self.cost_burst, now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                elapsed = now - bucket[2]
+                bucket[0] = min(self.request_burst, bucket[0] + elapsed * self.request_rate)
+                bucket[1] = min(self.cost_burst, bucket[1] + elapsed * self.cost_rate)
+                bucket[2] = now
+
+            wait = max(
+                (1 - bucket[0]) / self.request_rate if bucket[0] < 1 else 0.0,
+                (cost - bucket[1]) / self.cost_rate if bucket[1] < cost else 0.0
+            )
+            if wait > 0:
+                return wait
+            bucket[0] -= 1
+            bucket[1] -= cost
+            return 0.0
+
+    def request_wait(self, key, now=None):
+        """Return the seconds until key's request bucket has a token (0 if now)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return 0.0
+            tokens = min(self.request_burst, bucket[0] + (now - bucket[2]) * self.request_rate)
+            return (1 - tokens) / self.request_rate if tokens < 1 else 0.0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buckets)
+
+
+class AdmissionController:
+    """
+    Rate limits, per-request cost ceiling and in-flight shedding
+
+    Args:
+        buckets: TokenBuckets shared by all clients
+        max_request_cost: Largest cost a single request may have
+        cheap_cost: Requests at or below this cost are never shed
+        max_inflight_cost: Cost of heavy requests allowed to run at once
+        shed_retry_after: Retry-After seconds sent with 503
+    """
+
+    def __init__(self, buckets, max_request_cost, cheap_cost, max_inflight_cost,
+                 shed_retry_after=1):
+        self.buckets = buckets
+        self.max_request_cost = max_request_cost
+        self.cheap_cost = cheap_cost
+        self.max_inflight_cost = max_inflight_cost
+        self.shed_retry_after = shed_retry_after
+        self._lock = threading.Lock()
+        self._inflight_cost = 0
+        self._counters = {'admitted': 0, 'limited': 0, 'shed': 0, 'tooExpensive': 0}
+
+    def _count(self, outcome):
+        with self._lock:
+            self._counters[outcome] += 1
+
+    def precheck(self, key):
+        """
+        Refuse a client already out of request tokens, before its cost is known
+
+        Estimating the cost parses the request body, which a flooding
+        client should not get to make the server do.
+
+        Returns:
+            int: 0 to go on to admit(), otherwise Retry-After seconds
+        """
+        wait = self.buckets.request_wait(key)
+        if wait > 0:
+            self._count('limited')
+            return max(1, math.ceil(wait))
+        return 0
+
+    def admit(self, key, cost):
+        """
+        Decide whether a request of `cost` from client `key` may run
+
+        Returns:
+            tuple: (None, 0) if admitted (the caller must release(cost)
+            afterwards), otherwise (status, retry_after) with status 413,
+            429 or 503 and retry_after in whole seconds (0 for 413)
+        """
+        if cost > self.max_request_cost:
+            self._count('tooExpensive')
+            return 413, 0
+
+        wait = self.buckets.take(key, cost)
+        if wait > 0:
+            self._count('limited')
+            return 429, max(1, math.ceil(wait))
+
+        with self._lock:
+            # A lone heavy request always runs, however large
+            if (cost > self.cheap_cost and self._inflight_cost > 0
+                    and self._inflight_cost + cost > self.max_inflight_cost):
+                self._counters['shed'] += 1
+                return 503, self.shed_retry_after
+            self._inflight_cost += cost
+            self._counters['admitted'] += 1
+        return None, 0
+
+    def release(self, cost):
+        """Return an admitted request's cost once it has finished"""
+        with self._lock:
+            self._inflight_cost -= cost
+
+    def stats(self):
+        """Return outcome counters, in-flight cost and tracked clients"""
+        with self._lock:
+            stats = dict(self._counters, inFlightCost=self._inflight_cost)
+        stats['clients'] = len(self.buckets)
+        return stats
+
+
+_controller = None
+
+
+def init_rate_limit(app):
+    """Create the admission controller from the RATE_LIMIT_*/ADMISSION_* settings"""
+    global _controller
+
+    if not app.config['RATE_LIMIT_ENABLED']:
+        _controller = None
+        return None
+
+    buckets = TokenBuckets(
+        request_rate=app.config['RATE_LIMIT_REQUESTS_PER_SECOND'],
+        request_burst=app.config['RATE_LIMIT_BURST'],
+        cost_rate=app.config['ADMISSION_COST_PER_SECOND'],
+        cost_burst=app.config['ADMISSION_COST_BURST'],
+        max_clients=app.config['RATE_LIMIT_MAX_CLIENTS']
+    )
+    _controller = AdmissionController(
+        buckets,
+        max_request_cost=app.config['ADMISSION_MAX_REQUEST_COST'],
+        cheap_cost=app.config['ADMISSION_CHEAP_COST'],
+        max_inflight_cost=app.config['ADMISSION_MAX_INFLIGHT_COST']
+    )
+    return _controller
+
+
+def get_admission_controller():
+    """Return the admission controller, or None when rate limiting is off"""
+    return _controller
+
+
+def admission_stats():
+    """Return the controller's stats, or {'enabled': False}"""
+    if _controller is None:
+        return {'enabled': False}
+    return dict(_controller.stats(), enabled=True)
+
+
+def request_cost(estimate):
+    """
+    Declare how much work a request to the decorated view asks for
+
+    Place it directly under @bp.route so it marks the registered view.
+
+    Args:
+        estimate: Function taking the parsed JSON body (None if there is
+            none or it is not valid JSON) and returning the cost in units
+            of about one scenario-year; it raises RequestRejected for a
+            body too large to cost (e.g. an over-long horizon)
+    """
+    def decorator(view):
+        view.request_cost = estimate
+        return view
+    return decorator
+
+
+def client_key():
+    """
+    Return "uid:<uid>" for a request with a verified token, else "ip:<address>"
+
+    Only a token already verified (by the ASGI adapter, or earlier by this
+    worker and still in the token cache) names the client; anything else,
+    including a forged or expired token, is limited by address without
+    verifying it, so a flood of bad tokens costs no signature checks.
+
+    RATE_LIMIT_TRUSTED_PROXIES is the number of reverse proxies (e.g. nginx)
+    in front of the app; the client address is then taken from
+    X-Forwarded-For as seen by the outermost of them.
+    """
+    auth_header = request.headers.get('Authorization')
+    if auth_header:
+        try:
+            token = bearer_token(auth_header)
+        except IndexError:
+            token = None  # Malformed header; limit by address instead
+        if token is not None:
+            verified = request.environ.get(VERIFIED_TOKEN_ENVIRON_KEY)
+            if verified is not None and verified[0] == token:
+                decoded_token = verified[1]
+            else:
+                decoded_token = cached_token(token)
+            if isinstance(decoded_token, dict) and decoded_token.get('uid'):
+                return f"uid:{decoded_token['uid']}"
+
+    proxies = current_app.config['RATE_LIMIT_TRUSTED_PROXIES']
+    route = request.access_route
+    if proxies > 0 and request.headers.get('X-Forwarded-For') and len(route) >= proxies:
+        return f'ip:{route[-proxies]}'
+    return f'ip:{request.remote_addr}'
+
+
+def estimate_cost(endpoint, data):
+    """
+    Estimate the cost of calling an endpoint with a JSON body
+
+    Args:
+        endpoint: Endpoint name, e.g. "calculator.compare_scenarios"
+        data: Parsed JSON body (None if there is none)
+
+    Returns:
+        int: The view's @request_cost estimate, at least 1 (1 for views
+        without one or a body it cannot estimate)
+
+    Raises:
+        RequestRejected: If the estimate refuses the body as invalid
+    """
+    view = current_app.view_functions.get(endpoint)
+    estimate = getattr(view, 'request_cost', None)
+    if estimate is None:
+        return 1
+    try:
+        return max(1, int(estimate(data)))
+    except (TypeError, ValueError, AttributeError, KeyError, IndexError, OverflowError):
+        return 1  # Malformed body; the view rejects it cheaply
+
+
+def _too_many_requests(retry_after):
+    return jsonify({
+        'error': 'Too many requests',
+        'message': 'Rate limit exceeded; retry later'
+    }), 429, {'Retry-After': str(retry_after)}
+
+
+def admit_request():
+    """
+    before_request hook: refuse the request if the client is over its limits
+
+    Register it on a blueprint together with release_request.
+    """
+    if _controller is None or request.method == 'OPTIONS':
+        return None
+
+    key = client_key()
+    retry_after = _controller.precheck(key)
+    if retry_after:
+        return _too_many_requests(retry_after)
+
+    try:
+        cost = estimate_cost(request.endpoint, request.get_json(silent=True))
+    except RequestRejected as e:
+        return jsonify({
+            'error': 'Invalid request',
+            'message': str(e)
+        }), 400
+    status, retry_after = _controller.admit(key, cost)
+    if status is None:
+        g.admitted_cost = cost
+        return None
+
+    if status == 413:
+        return jsonify({
+            'error': 'Request too expensive',
+            'message': f'This request is estimated at {cost} cost units; the limit is '
+                       f'{_controller.max_request_cost:.0f}. Submit it as a background job '
+                       f'(POST /api/jobs) instead.'
+        }), 413
+    if status == 429:
+        return _too_many_requests(retry_after)
+    return jsonify({
+        'error': 'Server busy',
+        'message': 'Too much work in progress; retry later'
+    }), 503, {'Retry-After': str(retry_after)}
+
+
+def release_request(exc=None):
+    """teardown_request hook: release the cost of an admitted request"""
+    cost = g.pop('admitted_cost', None)
+    if cost is not None and _controller is not None:
+        _controller.release(cost)
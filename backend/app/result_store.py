@@ -0,0 +1,195 @@
+"""
+On-disk store for large batch projection runs
+
+A stored run is a directory holding one .npy file per result column and a
+small manifest.json:
+
+    <BATCH_RESULTS_DIR>/<run id>/
+        manifest.json
+        years_to_retirement.npy     (profiles,)
+        final_balances.npy          (profiles,)
+        ...
+        yearly_balances.npy         (profiles, years), NaN after retirement
+        yearly_real_values.npy      (profiles, years)
+
+The files are written through memory maps one chunk of profiles at a time,
+and read back with np.load(mmap_mode='r'), so slicing a page of profiles
+or a range of years touches only those pages of the file; neither writing
+nor reading ever holds a whole run in RAM. Runs are shared by all workers
+and removed once older than BATCH_RESULTS_TTL.
+"""
+from datetime import datetime, timedelta
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+import numpy as np
+
+MANIFEST_NAME = 'manifest.json'
+
+# Result column -> (file name, calculate_retirement_savings_batch key, dtype,
+# one value per year)
+RUN_COLUMNS = {
+    'yearsToRetirement': ('years_to_retirement.npy', 'years_to_retirement', 'int64', False),
+    'finalBalance': ('final_balances.npy', 'final_balances', 'float64', False),
+    'realValue': ('real_values.npy', 'real_values', 'float64', False),
+    'monthlyPension20y': ('monthly_pension_20y.npy', 'monthly_pension_20y', 'float64', False),
+    'monthlyPension25y': ('monthly_pension_25y.npy', 'monthly_pension_25y', 'float64', False),
+    'yearlyBalances': ('yearly_balances.npy', 'yearly_balances', 'float64', True),
+    'yearlyRealValues': ('yearly_real_values.npy', 'yearly_real_values', 'float64', True)
+}
+
+_RUN_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class BatchResultStore:
+    """
+    Directory of memory-mapped batch runs
+
+    Args:
+        root: Directory holding one subdirectory per run
+        ttl: Seconds a run is kept after it was written
+    """
+
+    def __init__(self, root, ttl=86400):
+        self.root = root
+        self.ttl = ttl
+
+    def _run_dir(self, run_id):
+        if not _RUN_ID.match(run_id or ''):
+            return None
+        return os.path.join(self.root, run_id)
+
+    def create_run(self, chunks, profiles, years):
+        """
+        Write a run from batch results computed chunk by chunk
+
+        The run is assembled in a temporary directory and renamed into
+        place once its manifest is written, so readers never see a partial
+        run.
+
+        Args:
+            chunks: Iterable of (start, batch) with batch a
+                calculate_retirement_savings_batch result for the profiles
+                starting at index `start`
+            profiles: Total number of profiles
+            years: Longest horizon over all profiles
+
+        Returns:
+            dict: The run's manifest
+        """
+        self.purge_expired()
+
+        run_id = uuid.uuid4().hex
+        staging = os.path.join(self.root, f'.tmp-{run_id}')
+        os.makedirs(staging)
+        try:
+            _write_columns(staging, chunks, profiles, years)
+
+            created_at = datetime.utcnow()
+            manifest = {
+                'runId': run_id,
+                'createdAt': created_at.isoformat(),
+                'expiresAt': (created_at + timedelta(seconds=self.ttl)).isoformat(),
+                'profiles': profiles,
+                'years': years,
+                'columns': {
+                    name: {
+                        'file': filename,
+                        'dtype': dtype,
+                        'shape': [profiles, years] if per_year else [profiles]
+                    }
+                    for name, (filename, _, dtype, per_year) in RUN_COLUMNS.items()
+                }
+            }
+            with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+                json.dump(manifest, f)
+
+            os.rename(staging, os.path.join(self.root, run_id))
+            return manifest
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def get_manifest(self, run_id):
+        """Return a run's manifest, or None if it does not exist (or expired)"""
+        run_dir = self._run_dir(run_id)
+        if run_dir is None:
+            return None
+        try:
+            with open(os.path.join(run_dir, MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        if datetime.fromisoformat(manifest['expiresAt']) < datetime.utcnow():
+            return None
+        return manifest
+
+    def open_column(self, run_id, name):
+        """
+        Return a read-only memory map of one result column
+
+        Slicing it reads only the pages the slice covers.
+        """
+        filename = RUN_COLUMNS[name][0]
+        return np.load(os.path.join(self._run_dir(run_id), filename), mmap_mode='r')
+
+    def purge_expired(self):
+        """Delete runs past their TTL and staging directories left by crashes"""
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root, exist_ok=True)
+            return
+        cutoff = time.time() - self.ttl
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except FileNotFoundError:
+                pass  # Removed by another worker meanwhile
+
+
+def _write_columns(directory, chunks, profiles, years):
+    """Create every column file as a memory map and fill it chunk by chunk"""
+    outputs = {
+        key: np.lib.format.open_memmap(
+            os.path.join(directory, filename), mode='w+', dtype=dtype,
+            shape=(profiles, years) if per_year else (profiles,)
+        )
+        for filename, key, dtype, per_year in RUN_COLUMNS.values()
+    }
+
+    for start, batch in chunks:
+        for key, output in outputs.items():
+            values = batch[key]
+            stop = start + len(values)
+            if output.ndim == 2:
+                # Chunks are only as wide as their own longest horizon
+                width = values.shape[1]
+                output[start:stop, :width] = values
+                output[start:stop, width:] = np.nan
+            else:
+                output[start:stop] = values
+
+    for output in outputs.values():
+        output.flush()
+    # The maps are closed when this function's references go away
+
+
+_store = None
+
+
+def init_result_store(app):
+    """Create the batch run store from BATCH_RESULTS_DIR/BATCH_RESULTS_TTL"""
+    global _store
+
+    _store = BatchResultStore(app.config['BATCH_RESULTS_DIR'], ttl=app.config['BATCH_RESULTS_TTL'])
+    return _store
+
+
+def get_result_store():
+    """Return the batch run store"""
+    return _store
@@ -2,7 +2,9 @@
 Authentication routes for Firebase integration
 """
 from flask import Blueprint, request, jsonify
-from app.auth import verify_firebase_token, get_user_from_token, require_auth
+from app.auth import (
+    bearer_token, forget_token, verify_firebase_token, get_user_from_token, require_auth
+)
 from datetime import datetime
 import logging
 import json
@@ -108,12 +110,14 @@ def get_current_user(current_user):
 def logout(current_user):
     """
     Logout endpoint (mainly for logging purposes)
-    Actual token invalidation happens on client side
+    Actual token invalidation happens on client side; the token is only
+    dropped from this worker's verified token cache
 
     Returns:
         Success message
     """
     try:
+        forget_token(bearer_token(request.headers['Authorization']))
         logger.info(f"User logged out: {current_user.get('email')}")
         return jsonify({
             'success': True,
@@ -139,6 +143,8 @@ def delete_account(current_user):
         Success message
     """
     try:
+        forget_token(bearer_token(request.headers['Authorization']))
+
         # No DB: nothing to delete locally. If you want to delete the Firebase account,
         # that must be done via Firebase Admin SDK (not performed here).
         logger.info(f"Requested account delete for UID: {current_user.get('uid')}")
@@ -1,22 +1,364 @@
 """
 Calculator routes for EPF/ETF calculations
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app
 from app.auth import require_auth
 from app.calculations import (
     calculate_monthly_contributions,
+    calculate_monthly_contributions_batch,
     calculate_retirement_savings,
+    calculate_retirement_savings_batch,
     calculate_purchasing_power,
-    calculate_monthly_pension
+    calculate_monthly_pension,
+    iter_yearly_breakdown,
+    simulate_retirement_savings,
+    solve_retirement_goal,
+    calculate_sensitivity_grid,
+    resume_retirement_savings,
+    GOAL_SEEK_VARIABLES
 )
+from app.parallel import map_sharded
+from app.cache import memoize
+from app.streaming import open_upload, read_upload_records, requested_stream_format, stream_rows
+from app.columnar import requested_layout
+from app.singleflight import coalesce_requests
+from app.result_store import RUN_COLUMNS, get_result_store
+from app.jobs import report_progress
+from app.ratelimit import RequestRejected, admit_request, release_request, request_cost
+from itertools import islice
+import numpy as np
+import io
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 
+# Routes call the memoized variants; the frontend resends identical payloads
+cached_monthly_contributions = memoize(calculate_monthly_contributions)
+cached_retirement_savings = memoize(calculate_retirement_savings)
+cached_purchasing_power = memoize(calculate_purchasing_power)
+cached_monthly_pension = memoize(calculate_monthly_pension)
+
 bp = Blueprint('calculator', __name__, url_prefix='/api/calculator')
 
+# Per-client rate limits and cost-based admission (see app/ratelimit.py)
+bp.before_request(admit_request)
+bp.teardown_request(release_request)
+
+# Column order for streamed CSV output
+YEARLY_BREAKDOWN_COLUMNS = [
+    'year', 'age', 'salary', 'monthly_contribution', 'yearly_contribution',
+    'year_start_balance', 'year_end_balance', 'interest_earned'
+]
+BATCH_COLUMNS = [
+    'index', 'yearsToRetirement', 'finalBalance', 'realValue',
+    'monthlyPension20y', 'monthlyPension25y'
+]
+
+PAYROLL_COLUMNS = [
+    'row', 'employeeId', 'basicSalary', 'employeeEpfRate', 'employeeEpf',
+    'employerEpf', 'employerEtf', 'totalEpf', 'totalMonthly',
+    'yearlyContribution', 'error', 'employees', 'rejected'
+]
+
+# Payroll result fields -> calculate_monthly_contributions_batch keys
+_PAYROLL_AMOUNTS = {
+    'employeeEpf': 'employee_epf',
+    'employerEpf': 'employer_epf',
+    'employerEtf': 'employer_etf',
+    'totalEpf': 'total_epf',
+    'totalMonthly': 'total_monthly',
+    'yearlyContribution': 'yearly_contribution'
+}
+
+# Batch request fields -> calculate_retirement_savings_batch arguments
+_BATCH_FIELDS = {
+    'currentAge': ('current_ages', None),
+    'retirementAge': ('retirement_ages', None),
+    'basicSalary': ('basic_salaries', None),
+    'employeeEpfRate': ('employee_epf_rates', 10),
+    'annualIncrement': ('annual_increments', 5),
+    'epfInterestRate': ('epf_interest_rates', 9.5),
+    'currentEpfBalance': ('current_epf_balances', 0),
+    'inflationRate': ('inflation_rates', 6)
+}
+
+# Assumptions a projection can change part-way through (see resume_from_changes)
+RESUMABLE_FIELDS = ('retirementAge', 'employeeEpfRate', 'annualIncrement', 'epfInterestRate')
+
+# Sensitivity axes in result tensor order: request field -> default value
+SENSITIVITY_AXES = {
+    'epfInterestRate': 9.5,
+    'annualIncrement': 5,
+    'inflationRate': 6,
+    'retirementAge': 60
+}
+
+
+def _compare_scenario(indexed_scenario):
+    """
+    Calculate one entry of a scenario comparison
+
+    Kept at module level so it can be shipped to process-pool workers.
+
+    Args:
+        indexed_scenario: (position, scenario dict) tuple
+
+    Returns:
+        Scenario summary, or the scenario name with an error message
+    """
+    index, scenario = indexed_scenario
+    name = f"Scenario {index + 1}"
+
+    try:
+        if not isinstance(scenario, dict):
+            raise ValueError('Scenario must be an object')
+        name = scenario.get('name', name)
+
+        for field in ('currentAge', 'retirementAge', 'basicSalary'):
+            if field not in scenario:
+                raise ValueError(f'{field} is required')
+
+        savings_result = cached_retirement_savings(
+            current_age=scenario['currentAge'],
+            retirement_age=scenario['retirementAge'],
+            basic_salary=scenario['basicSalary'],
+            employee_epf_rate=scenario.get('employeeEpfRate', 10),
+            annual_increment=scenario.get('annualIncrement', 5),
+            epf_interest_rate=scenario.get('epfInterestRate', 9.5),
+            current_epf_balance=scenario.get('currentEpfBalance', 0)
+        )
+
+        years_to_retirement = scenario['retirementAge'] - scenario['currentAge']
+        purchasing_power = cached_purchasing_power(
+            savings_result['final_balance'],
+            years_to_retirement,
+            scenario.get('inflationRate', 6)
+        )
+
+        return {
+            'name': name,
+            'finalBalance': savings_result['final_balance'],
+            'realValue': purchasing_power['real_value'],
+            'yearsToRetirement': years_to_retirement
+        }
+    except Exception as e:
+        return {
+            'name': name,
+            'error': str(e)
+        }
+
+
+def _is_number(value):
+    """True for JSON numbers (bool is an int subclass but not a number here)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _whole_number(value, name):
+    """
+    Return value as an int if it is a whole number (e.g. 40 or 40.0)
+
+    Raises:
+        ValueError: Otherwise
+    """
+    if not _is_number(value) or not float(value).is_integer():
+        raise ValueError(f'{name} must be a whole number')
+    return int(value)
+
+
+def resume_from_changes(yearly_breakdown, inputs, changes):
+    """
+    Re-run an earlier projection from the year its assumptions change
+
+    Args:
+        yearly_breakdown: yearly_breakdown of the earlier projection (a
+            ColumnarTable, its JSON form or legacy rows)
+        inputs: The earlier projection's request fields (camelCase)
+        changes: {"fromAge": 40} or {"fromYear": 13} (whole numbers), plus
+            new values for any of RESUMABLE_FIELDS
+
+    Returns:
+        tuple: (resume_retirement_savings result, inputs with the changes
+        applied)
+
+    Raises:
+        ValueError: If the changes or the checkpoint are invalid
+    """
+    if not isinstance(changes, dict):
+        raise ValueError('changes must be an object')
+    for field in ('currentAge', 'retirementAge'):
+        if field not in inputs:
+            raise ValueError(f'{field} is required')
+    for field in ('fromAge', 'fromYear') + RESUMABLE_FIELDS:
+        if field in changes and not _is_number(changes[field]):
+            raise ValueError(f'changes.{field} must be a number')
+
+    effective = dict(inputs)
+    effective.update({field: changes[field] for field in RESUMABLE_FIELDS if field in changes})
+
+    current_age = _whole_number(effective['currentAge'], 'currentAge')
+    retirement_age = _whole_number(effective['retirementAge'], 'retirementAge')
+    if changes.get('fromYear') is not None:
+        from_year = _whole_number(changes['fromYear'], 'changes.fromYear')
+    elif changes.get('fromAge') is not None:
+        from_year = _whole_number(changes['fromAge'], 'changes.fromAge') - current_age
+    else:
+        raise ValueError('changes.fromAge or changes.fromYear is required')
+
+    result = resume_retirement_savings(
+        yearly_breakdown,
+        from_year=from_year,
+        current_age=current_age,
+        retirement_age=retirement_age,
+        employee_epf_rate=effective.get('employeeEpfRate', 10),
+        annual_increment=effective.get('annualIncrement', 5),
+        epf_interest_rate=effective.get('epfInterestRate', 9.5)
+    )
+    return result, effective
+
+
+def _sweep_length(spec):
+    """
+    Validate one sensitivity axis specification and count its values
+
+    Ranges are counted without being expanded, so a tiny step cannot make
+    the server build a huge list before the grid size is checked.
+
+    Args:
+        spec: None, a single number, a list of values, or
+            {"start": ..., "stop": ..., "step": ...} with stop included
+
+    Returns:
+        int: Number of values the axis expands to
+
+    Raises:
+        ValueError: If spec is not a valid axis
+    """
+    if spec is None or isinstance(spec, (int, float)):
+        return 1
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError('Axis value lists must not be empty')
+        return len(spec)
+    if isinstance(spec, dict):
+        start, stop, step = spec.get('start'), spec.get('stop'), spec.get('step')
+        if start is None or stop is None or step is None:
+            raise ValueError('Axis ranges need start, stop and step')
+        if step <= 0 or stop < start:
+            raise ValueError('Axis ranges need step > 0 and stop >= start')
+        try:
+            return math.floor((stop - start) / step + 1e-9) + 1
+        except OverflowError:
+            raise ValueError('Axis range has too many values')
+    raise ValueError('Axis must be a number, a list or a {start, stop, step} range')
+
+
+def _sweep_values(spec, default):
+    """
+    Expand one sensitivity axis specification into its values
+
+    Args:
+        spec: As for _sweep_length; None uses default
+        default: Value used when spec is None
+
+    Returns:
+        list of axis values
+    """
+    count = _sweep_length(spec)
+    if spec is None:
+        return [default]
+    if isinstance(spec, (int, float)):
+        return [spec]
+    if isinstance(spec, list):
+        return spec
+    return np.round(spec['start'] + spec['step'] * np.arange(count), 10).tolist()
+
+
+# Admission cost weights: a cost unit is about one scenario-year of a scalar
+# projection (as in /scenarios/compare); the vectorized routes do that much
+# work for this many path/profile/cell-years (measured with the benchmarks)
+MONTE_CARLO_YEARS_PER_UNIT = 20
+BATCH_YEARS_PER_UNIT = 25
+SENSITIVITY_YEARS_PER_UNIT = 100
+# A payroll row (parsed, computed and streamed back) costs about this many
+# units; uploads are costed by size, at the bytes of a short CSV row
+PAYROLL_UNITS_PER_ROW = 5
+PAYROLL_ROW_BYTES = 16
+
+
+def _horizon(current_age, retirement_age):
+    """
+    Years projected between two ages (at least 1)
+
+    Raises:
+        RequestRejected: Beyond MAX_PROJECTION_YEARS, so the request is
+            refused before it is admitted rather than costed
+    """
+    years = float(retirement_age) - float(current_age)
+    max_years = current_app.config['MAX_PROJECTION_YEARS']
+    if years > max_years:
+        raise RequestRejected(f'Projections are limited to {max_years} years before retirement')
+    return max(years, 1)
+
+
+def _axis_length(spec):
+    """Number of values a sensitivity axis spec expands to (1 if invalid)"""
+    try:
+        return _sweep_length(spec)
+    except (TypeError, ValueError):
+        return 1  # The view rejects it cheaply
+
+
+def _projection_cost(data):
+    return _horizon(data.get('currentAge', 0), data.get('retirementAge', 60))
+
+
+def _batch_cost(data):
+    profiles = data.get('profiles') or {}
+    try:
+        count = _batch_profile_count(profiles)
+    except ValueError:
+        return 1  # Mismatched columns; the view rejects them cheaply
+    # Every profile is padded to the longest horizon in the batch
+    years = (np.asarray(profiles.get('retirementAge', 60), dtype=np.float64)
+             - np.asarray(profiles.get('currentAge', 0), dtype=np.float64))
+    return count * _horizon(0, np.max(years)) / BATCH_YEARS_PER_UNIT
+
+
+def _monte_carlo_cost(data):
+    paths = int(data.get('paths', current_app.config['MONTE_CARLO_DEFAULT_PATHS']))
+    return paths * _projection_cost(data) / MONTE_CARLO_YEARS_PER_UNIT
+
+
+def _sensitivity_cost(data):
+    ranges = data.get('ranges') or {}
+    cells = 1
+    for field in SENSITIVITY_AXES:
+        cells *= _axis_length(ranges.get(field))
+    ages = ranges.get('retirementAge')
+    if isinstance(ages, list) and ages:
+        oldest = max(ages)
+    elif isinstance(ages, dict) and ages.get('stop') is not None:
+        oldest = ages['stop']
+    else:
+        oldest = ages if isinstance(ages, (int, float)) else data.get('retirementAge', 60)
+    return cells * _horizon(data.get('currentAge', 0), oldest) / SENSITIVITY_YEARS_PER_UNIT
+
+
+def _payroll_cost(data):
+    # The upload is not JSON; its rows can only be estimated from its size
+    if request.content_length is None:
+        raise RequestRejected('Payroll uploads must be sent with a Content-Length')
+    return request.content_length / PAYROLL_ROW_BYTES * PAYROLL_UNITS_PER_ROW
+
+
+def _compare_cost(data):
+    scenarios = data.get('scenarios') or []
+    return sum(_projection_cost(scenario) if isinstance(scenario, dict) else 1 for scenario in scenarios)
+
 
 @bp.route('/contributions', methods=['POST'])
+@coalesce_requests
 def contributions():
     """
     Calculate monthly EPF/ETF contributions
@@ -41,7 +383,7 @@ def contributions():
                 'message': 'basicSalary is required'
             }), 400
 
-        result = calculate_monthly_contributions(basic_salary, employee_rate)
+        result = cached_monthly_contributions(basic_salary, employee_rate)
 
         return jsonify({
             'success': True,
@@ -56,7 +398,162 @@ def contributions():
         }), 500
 
 
+def _payroll_number(record, field, default=None):
+    """Read a finite number from an upload record (CSV values are strings)"""
+    value = record.get(field)
+    if value is None or value == '':
+        if default is None:
+            raise ValueError(f'{field} is required')
+        return float(default)
+    if isinstance(value, bool):
+        raise ValueError(f'{field} must be a number')
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be a number')
+    if not math.isfinite(number):
+        raise ValueError(f'{field} must be a finite number')
+    return number
+
+
+def _parse_payroll_record(record):
+    """
+    Validate one upload record
+
+    Returns:
+        (employee_id, basic_salary, employee_epf_rate)
+
+    Raises:
+        ValueError: With a message for the row's error column
+    """
+    if isinstance(record, Exception):
+        raise ValueError(str(record))
+    basic_salary = _payroll_number(record, 'basicSalary')
+    employee_rate = _payroll_number(record, 'employeeEpfRate', default=10)
+    if basic_salary <= 0:
+        raise ValueError('basicSalary must be greater than 0')
+    if not 0 <= employee_rate <= 100:
+        raise ValueError('employeeEpfRate must be between 0 and 100')
+    return record.get('employeeId'), basic_salary, employee_rate
+
+
+def _iter_payroll_rows(records, chunk_size):
+    """
+    Yield one result row per upload record, then a payroll totals row
+
+    Records are read chunk_size at a time and each chunk is computed with
+    one vectorized call, so memory does not grow with the payroll. Invalid
+    records get a row with only an error message and are left out of the
+    totals. Totals are summed in integer cents, so they equal the sum of
+    the rounded rows exactly.
+    """
+    totals_cents = dict.fromkeys(['basicSalary', *_PAYROLL_AMOUNTS], 0)
+    employees = rejected = 0
+    row_number = 0
+
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        parsed = []
+        for record in chunk:
+            try:
+                parsed.append(_parse_payroll_record(record))
+            except ValueError as e:
+                parsed.append(e)
+        valid = [item for item in parsed if not isinstance(item, Exception)]
+
+        if valid:
+            _, salaries, rates = zip(*valid)
+            salaries = np.array(salaries)
+            result = calculate_monthly_contributions_batch(salaries, np.array(rates))
+            columns = {'basicSalary': np.round(salaries, 2)}
+            columns.update({field: result[key] for field, key in _PAYROLL_AMOUNTS.items()})
+            for field, values in columns.items():
+                totals_cents[field] += int(np.rint(values * 100).astype(np.int64).sum())
+            amounts = zip(*(values.tolist() for values in columns.values()))
+            employees += len(valid)
+
+        for item in parsed:
+            row_number += 1
+            if isinstance(item, Exception):
+                rejected += 1
+                yield {'row': row_number, 'error': str(item)}
+                continue
+            employee_id, _, employee_rate = item
+            basic_salary, *values = next(amounts)
+            row = {
+                'row': row_number,
+                'employeeId': employee_id,
+                'basicSalary': basic_salary,
+                'employeeEpfRate': int(employee_rate) if employee_rate.is_integer() else employee_rate
+            }
+            row.update(zip(_PAYROLL_AMOUNTS, values))
+            yield row
+
+    totals = {'row': 'total', 'employees': employees, 'rejected': rejected}
+    totals.update({field: cents / 100 for field, cents in totals_cents.items()})
+    yield totals
+
+
+@bp.route('/contributions/bulk', methods=['POST'])
+@request_cost(_payroll_cost)
+def bulk_contributions():
+    """
+    Calculate monthly EPF/ETF contributions for a whole payroll run
+
+    Upload a CSV with a header row, or NDJSON with one object per line, as
+    the request body (Content-Type text/csv or application/x-ndjson) or as
+    a multipart file field named "file":
+
+        employeeId,basicSalary,employeeEpfRate
+        E001,75000,10
+        E002,120000,8
+
+    employeeId is optional and echoed back; employeeEpfRate defaults to 10.
+    The upload is parsed and computed STREAM_CHUNK_SIZE rows at a time, so
+    memory stays flat for any payroll size.
+
+    Returns:
+        A stream with one row per employee (or an error for rows that could
+        not be read) followed by a totals row ("row": "total") with employee
+        and rejected counts. NDJSON by default; send "Accept: text/csv" or
+        ?format=csv for CSV.
+    """
+    try:
+        upload, upload_format = open_upload()
+        if upload is None:
+            return jsonify({
+                'error': 'Unsupported upload',
+                'message': 'Send a CSV or NDJSON payroll as the request body or as the "file" field'
+            }), 415
+
+        try:
+            records = read_upload_records(upload, upload_format, required=['basicSalary'])
+        except ValueError as e:
+            return jsonify({
+                'error': 'Invalid upload',
+                'message': str(e)
+            }), 400
+
+        rows = _iter_payroll_rows(records, current_app.config['STREAM_CHUNK_SIZE'])
+        response = stream_rows(rows, requested_stream_format() or 'ndjson', PAYROLL_COLUMNS,
+                               filename='payroll-contributions')
+        response.call_on_close(upload.close)
+        return response
+
+    except Exception as e:
+        logger.error(f"Bulk contributions error: {str(e)}")
+        return jsonify({
+            'error': 'Calculation failed',
+            'message': str(e)
+        }), 500
+
+
 @bp.route('/retirement-projection', methods=['POST'])
+@request_cost(_projection_cost)
+@coalesce_requests
 def retirement_projection():
     """
     Calculate retirement savings projection
@@ -73,6 +570,16 @@ def retirement_projection():
             "inflationRate": 6
         }
 
+    The yearly breakdown is columnar, {"columns": [...], "data": {...}};
+    add ?layout=rows for the legacy list of one dict per year. Send
+    "Accept: application/x-ndjson" or "Accept: text/csv" to stream only the
+    yearly breakdown, one row per year.
+
+    An optional "changes" object, e.g. {"fromAge": 40, "annualIncrement": 7},
+    applies new assumptions from that year on. The years before it come from
+    the (usually cached) projection of the request's own assumptions and
+    only the remaining years are recomputed.
+
     Returns:
         Detailed retirement projection with yearly breakdown
     """
@@ -88,8 +595,24 @@ def retirement_projection():
                     'message': f'{field} is required'
                 }), 400
 
+        # Stream the yearly breakdown when NDJSON or CSV is requested
+        changes = data.get('changes')
+        stream_format = requested_stream_format()
+        if stream_format and not changes:
+            rows = iter_yearly_breakdown(
+                current_age=data['currentAge'],
+                retirement_age=data['retirementAge'],
+                basic_salary=data['basicSalary'],
+                employee_epf_rate=data.get('employeeEpfRate', 10),
+                annual_increment=data.get('annualIncrement', 5),
+                epf_interest_rate=data.get('epfInterestRate', 9.5),
+                current_epf_balance=data.get('currentEpfBalance', 0)
+            )
+            return stream_rows(rows, stream_format, YEARLY_BREAKDOWN_COLUMNS,
+                               filename='retirement-projection')
+
         # Calculate retirement savings
-        savings_result = calculate_retirement_savings(
+        savings_result = cached_retirement_savings(
             current_age=data['currentAge'],
             retirement_age=data['retirementAge'],
             basic_salary=data['basicSalary'],
@@ -99,22 +622,38 @@ def retirement_projection():
             current_epf_balance=data.get('currentEpfBalance', 0)
         )
 
+        # Splice in the changed years, keeping the cached prefix
+        if changes:
+            try:
+                savings_result, data = resume_from_changes(
+                    savings_result['yearly_breakdown'], data, changes
+                )
+            except ValueError as e:
+                return jsonify({
+                    'error': 'Invalid changes',
+                    'message': str(e)
+                }), 400
+
+            if stream_format:
+                return stream_rows(savings_result['yearly_breakdown'].iter_rows(), stream_format,
+                                   YEARLY_BREAKDOWN_COLUMNS, filename='retirement-projection')
+
         # Calculate purchasing power
         years_to_retirement = data['retirementAge'] - data['currentAge']
-        purchasing_power = calculate_purchasing_power(
+        purchasing_power = cached_purchasing_power(
             savings_result['final_balance'],
             years_to_retirement,
             data.get('inflationRate', 6)
         )
 
         # Calculate monthly pension options
-        monthly_pension_20y = calculate_monthly_pension(
+        monthly_pension_20y = cached_monthly_pension(
             savings_result['final_balance'],
             data.get('epfInterestRate', 9.5),
             20
         )
 
-        monthly_pension_25y = calculate_monthly_pension(
+        monthly_pension_25y = cached_monthly_pension(
             savings_result['final_balance'],
             data.get('epfInterestRate', 9.5),
             25
@@ -124,7 +663,7 @@ def retirement_projection():
             'success': True,
             'data': {
                 'finalBalance': savings_result['final_balance'],
-                'yearlyBreakdown': savings_result['yearly_breakdown'],
+                'yearlyBreakdown': savings_result['yearly_breakdown'].serialize(requested_layout()),
                 'purchasingPower': purchasing_power,
                 'monthlyPensionOptions': {
                     'twentyYears': monthly_pension_20y,
@@ -141,7 +680,727 @@ def retirement_projection():
         }), 500
 
 
+def _batch_profile_count(profiles):
+    """
+    Number of profiles the batch columns broadcast to, without building them
+
+    Raises:
+        ValueError: If list-valued columns have different lengths
+    """
+    shapes = [
+        (len(values),) if isinstance(values, list) else ()
+        for values in (profiles.get(field) for field in _BATCH_FIELDS)
+    ]
+    shape = np.broadcast_shapes(*shapes)
+    return shape[0] if shape else 1
+
+
+def _batch_columns(profiles):
+    """
+    Validate batch profile columns
+
+    Ages must be whole numbers, and no profile may be projected over more
+    than MAX_PROJECTION_YEARS years, since every profile's row is padded
+    to the longest horizon.
+
+    Returns:
+        (columns, count): calculate_retirement_savings_batch arguments as
+        arrays (0-d for single values) and the number of profiles
+
+    Raises:
+        ValueError: If the columns do not describe a valid batch
+    """
+    columns = {
+        argument: np.asarray(profiles.get(field, default), dtype=np.float64)
+        for field, (argument, default) in _BATCH_FIELDS.items()
+    }
+    shape = np.broadcast_shapes(*(column.shape for column in columns.values()))
+    if len(shape) != 1 or shape[0] == 0:
+        raise ValueError("Profile columns must be non-empty one-dimensional arrays")
+    current_ages, retirement_ages = columns['current_ages'], columns['retirement_ages']
+    if (np.any(current_ages != np.floor(current_ages))
+            or np.any(retirement_ages != np.floor(retirement_ages))):
+        raise ValueError("Ages must be whole numbers")
+    years = retirement_ages - current_ages
+    if np.any(years <= 0):
+        raise ValueError("Retirement age must be greater than current age")
+    max_years = current_app.config['MAX_PROJECTION_YEARS']
+    if np.any(years > max_years):
+        raise ValueError(f"Projections are limited to {max_years} years before retirement")
+    return columns, shape[0]
+
+
+def _iter_batch_chunks(columns, count, chunk_size):
+    """Yield (start, batch result) for consecutive chunks of profiles"""
+    for start in range(0, count, chunk_size):
+        chunk = {
+            argument: column[start:start + chunk_size] if column.ndim else column
+            for argument, column in columns.items()
+        }
+        yield start, calculate_retirement_savings_batch(**chunk)
+
+
+def _iter_batch_rows(profiles, chunk_size):
+    """
+    Validate batch columns, then return a generator of per-profile rows
+
+    Profiles are projected chunk by chunk so only chunk_size x years values
+    are held at once.
+    """
+    columns, count = _batch_columns(profiles)
+
+    def rows():
+        for start, batch in _iter_batch_chunks(columns, count, chunk_size):
+            values = zip(
+                batch['years_to_retirement'].tolist(),
+                np.round(batch['final_balances'], 2).tolist(),
+                np.round(batch['real_values'], 2).tolist(),
+                np.round(batch['monthly_pension_20y'], 2).tolist(),
+                np.round(batch['monthly_pension_25y'], 2).tolist()
+            )
+            for offset, (years, final_balance, real_value, pension_20y, pension_25y) in enumerate(values):
+                yield {
+                    'index': start + offset,
+                    'yearsToRetirement': years,
+                    'finalBalance': final_balance,
+                    'realValue': real_value,
+                    'monthlyPension20y': pension_20y,
+                    'monthlyPension25y': pension_25y
+                }
+
+    return rows()
+
+
+def store_batch_run(profiles, chunk_size):
+    """
+    Project a batch chunk by chunk straight into a memory-mapped run
+
+    Returns:
+        dict: The stored run's manifest
+
+    Raises:
+        ValueError: If the profiles are invalid
+    """
+    columns, count = _batch_columns(profiles)
+    years = int(np.max(columns['retirement_ages'] - columns['current_ages']))
+    return get_result_store().create_run(
+        _iter_batch_chunks(columns, count, chunk_size), profiles=count, years=years
+    )
+
+
+@bp.route('/retirement-projection/batch', methods=['POST'])
+@request_cost(_batch_cost)
+@coalesce_requests
+def retirement_projection_batch():
+    """
+    Calculate retirement projections for many profiles at once
+
+    Profiles are passed as columns. Optional columns may be a single value
+    applied to every profile.
+
+    Request body:
+        {
+            "profiles": {
+                "currentAge": [28, 35, 42],
+                "retirementAge": [60, 60, 55],
+                "basicSalary": [75000, 120000, 90000],
+                "employeeEpfRate": 10,
+                "annualIncrement": [5, 4, 3],
+                "epfInterestRate": 9.5,
+                "currentEpfBalance": [500000, 1500000, 0],
+                "inflationRate": 6
+            },
+            "includeYearlyBalances": false
+        }
+
+    Send "Accept: application/x-ndjson" or "Accept: text/csv" to stream one
+    row per profile instead; profiles are then computed in chunks of
+    STREAM_CHUNK_SIZE so memory stays flat for any batch size.
+
+    Send "store": true to write the full results, including every year's
+    balance, to a memory-mapped run on disk instead (also in chunks). The
+    response is then the run's manifest; page through it with
+    GET /batch-runs/<runId>/results.
+
+    Returns:
+        Per-profile final balances, real values and pension options; 400 if
+        an age is not a whole number or a horizon exceeds
+        MAX_PROJECTION_YEARS, 413 if the batch has more than
+        BATCH_MAX_PROFILES profiles
+    """
+    try:
+        data = request.get_json() or {}
+        profiles = data.get('profiles') or {}
+
+        required_fields = ['currentAge', 'retirementAge', 'basicSalary']
+        for field in required_fields:
+            if field not in profiles:
+                return jsonify({
+                    'error': 'Missing required field',
+                    'message': f'profiles.{field} is required'
+                }), 400
+
+        try:
+            count = _batch_profile_count(profiles)
+        except ValueError as e:
+            return jsonify({
+                'error': 'Invalid profiles',
+                'message': str(e)
+            }), 400
+        max_profiles = current_app.config['BATCH_MAX_PROFILES']
+        if count > max_profiles:
+            return jsonify({
+                'error': 'Too many profiles',
+                'message': f'The batch has {count} profiles; the limit is {max_profiles}'
+            }), 413
+
+        if data.get('store'):
+            try:
+                manifest = store_batch_run(profiles, current_app.config['STREAM_CHUNK_SIZE'])
+            except ValueError as e:
+                return jsonify({
+                    'error': 'Invalid profiles',
+                    'message': str(e)
+                }), 400
+            return jsonify({
+                'success': True,
+                'data': manifest
+            }), 201
+
+        stream_format = requested_stream_format()
+        if stream_format:
+            try:
+                rows = _iter_batch_rows(profiles, current_app.config['STREAM_CHUNK_SIZE'])
+            except ValueError as e:
+                return jsonify({
+                    'error': 'Invalid profiles',
+                    'message': str(e)
+                }), 400
+            return stream_rows(rows, stream_format, BATCH_COLUMNS,
+                               filename='retirement-projection-batch')
+
+        try:
+            columns, _ = _batch_columns(profiles)
+            batch = calculate_retirement_savings_batch(**columns)
+        except ValueError as e:
+            return jsonify({
+                'error': 'Invalid profiles',
+                'message': str(e)
+            }), 400
+
+        # Arrays are written by the app's JSON provider; rounding happens once
+        # per column here rather than per value
+        years_to_retirement = batch['years_to_retirement']
+        result = {
+            'count': len(years_to_retirement),
+            'yearsToRetirement': years_to_retirement,
+            'finalBalance': np.round(batch['final_balances'], 2),
+            'realValue': np.round(batch['real_values'], 2),
+            'monthlyPensionOptions': {
+                'twentyYears': np.round(batch['monthly_pension_20y'], 2),
+                'twentyFiveYears': np.round(batch['monthly_pension_25y'], 2)
+            }
+        }
+
+        if data.get('includeYearlyBalances'):
+            # Drop the NaN padding so each profile gets only its own horizon
+            yearly_balances = np.round(batch['yearly_balances'], 2)
+            result['yearlyBalances'] = [
+                row[:years] for row, years in zip(yearly_balances, years_to_retirement.tolist())
+            ]
+
+        return jsonify({
+            'success': True,
+            'data': result
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Batch retirement projection error: {str(e)}")
+        return jsonify({
+            'error': 'Calculation failed',
+            'message': str(e)
+        }), 500
+
+
+def _run_page_args(manifest, args):
+    """
+    Parse and check the paging query parameters for a stored run
+
+    Returns:
+        (offset, stop, from_year, to_year, names)
+
+    Raises:
+        ValueError: With a message for the 400 response
+    """
+    profiles, years = manifest['profiles'], manifest['years']
+    try:
+        offset = int(args.get('offset', 0))
+        if args.get('format') == 'npy':
+            limit = int(args.get('limit', profiles))
+        else:
+            limit = int(args.get('limit', current_app.config['BATCH_RESULTS_PAGE_SIZE']))
+            limit = min(limit, current_app.config['BATCH_RESULTS_MAX_PAGE_SIZE'])
+        from_year = int(args.get('fromYear', 1))
+        to_year = int(args.get('toYear', years))
+    except ValueError:
+        raise ValueError('offset, limit, fromYear and toYear must be integers')
+
+    if not 0 <= offset <= profiles or limit < 1:
+        raise ValueError(f'offset must be between 0 and {profiles} and limit at least 1')
+    if not 1 <= from_year <= to_year <= years:
+        raise ValueError(f'Years must satisfy 1 <= fromYear <= toYear <= {years}')
+
+    names = args.get('columns')
+    names = [name.strip() for name in names.split(',')] if names else list(RUN_COLUMNS)
+    unknown = [name for name in names if name not in RUN_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return offset, min(offset + limit, profiles), from_year, to_year, names
+
+
+def _npy_response(view, filename):
+    """Stream an array slice as a .npy file, one block of rows at a time"""
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, {
+        'descr': np.lib.format.dtype_to_descr(view.dtype),
+        'fortran_order': False,
+        'shape': view.shape
+    })
+    header = header.getvalue()
+    row_bytes = max(1, view.itemsize * int(np.prod(view.shape[1:])))
+    rows_per_block = max(1, (1 << 20) // row_bytes)
+
+    def body():
+        yield header
+        for start in range(0, len(view), rows_per_block):
+            # No copy for whole rows; a year range is gathered per block
+            yield np.ascontiguousarray(view[start:start + rows_per_block]).tobytes()
+
+    return Response(body(), mimetype='application/octet-stream', headers={
+        'Content-Disposition': f'attachment; filename="{filename}.npy"',
+        'Content-Length': str(len(header) + view.nbytes)
+    })
+
+
+@bp.route('/batch-runs/<run_id>', methods=['GET'])
+def get_batch_run(run_id):
+    """Return the manifest of a stored batch run"""
+    try:
+        manifest = get_result_store().get_manifest(run_id)
+        if manifest is None:
+            return jsonify({'error': 'Batch run not found'}), 404
+
+        return jsonify({
+            'success': True,
+            'data': manifest
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Get batch run error: {str(e)}")
+        return jsonify({
+            'error': 'Failed to get batch run',
+            'message': str(e)
+        }), 500
+
+
+@bp.route('/batch-runs/<run_id>/results', methods=['GET'])
+def get_batch_run_results(run_id):
+    """
+    Read a page of a stored batch run
+
+    Only the requested profiles and years are read from the run's memory
+    maps, so pages cost the same however large the run is.
+
+    Query parameters:
+        offset: First profile index (default 0)
+        limit: Profiles per page (default BATCH_RESULTS_PAGE_SIZE, at most
+            BATCH_RESULTS_MAX_PAGE_SIZE; unlimited for format=npy)
+        fromYear, toYear: Years (1-based, inclusive) of yearlyBalances and
+            yearlyRealValues to return (default: all)
+        columns: Comma-separated result columns (default: all)
+        format: "npy" to download one column's slice as a NumPy .npy file
+
+    Returns:
+        The page's columns and the offset of the next page (null at the end)
+    """
+    try:
+        store = get_result_store()
+        manifest = store.get_manifest(run_id)
+        if manifest is None:
+            return jsonify({'error': 'Batch run not found'}), 404
+
+        try:
+            offset, stop, from_year, to_year, names = _run_page_args(manifest, request.args)
+            if request.args.get('format') == 'npy' and len(names) != 1:
+                raise ValueError('format=npy needs exactly one column')
+        except ValueError as e:
+            return jsonify({
+                'error': 'Invalid parameters',
+                'message': str(e)
+            }), 400
+
+        if request.args.get('format') == 'npy':
+            name = names[0]
+            view = store.open_column(run_id, name)[offset:stop]
+            if RUN_COLUMNS[name][3]:
+                view = view[:, from_year - 1:to_year]
+            return _npy_response(view, f'{run_id}-{name}')
+
+        # Rows past a profile's retirement are NaN padding; drop them
+        years_to_retirement = np.asarray(store.open_column(run_id, 'yearsToRetirement')[offset:stop])
+        lengths = np.clip(years_to_retirement - (from_year - 1), 0, to_year - from_year + 1).tolist()
+
+        columns = {}
+        for name in names:
+            values = store.open_column(run_id, name)[offset:stop]
+            if name == 'yearsToRetirement':
+                columns[name] = years_to_retirement
+            elif RUN_COLUMNS[name][3]:
+                page = np.round(values[:, from_year - 1:to_year], 2)
+                columns[name] = [row[:length] for row, length in zip(page, lengths)]
+            else:
+                columns[name] = np.round(values, 2)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'runId': run_id,
+                'offset': offset,
+                'count': stop - offset,
+                'nextOffset': stop if stop < manifest['profiles'] else None,
+                'fromYear': from_year,
+                'toYear': to_year,
+                'columns': columns
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Get batch run results error: {str(e)}")
+        return jsonify({
+            'error': 'Failed to read batch run',
+            'message': str(e)
+        }), 500
+
+
+@bp.route('/monte-carlo', methods=['POST'])
+@request_cost(_monte_carlo_cost)
+@coalesce_requests(when=lambda data: data.get('seed') is not None)
+def monte_carlo_projection():
+    """
+    Simulate retirement savings under uncertain rates
+
+    Request body:
+        {
+            "currentAge": 28,
+            "retirementAge": 60,
+            "basicSalary": 75000,
+            "employeeEpfRate": 10,
+            "annualIncrement": 5,
+            "epfInterestRate": 9.5,
+            "currentEpfBalance": 500000,
+            "inflationRate": 6,
+            "paths": 10000,
+            "seed": 42,
+            "distributions": {
+                "epfInterestRate": {"type": "normal", "std": 1.0, "min": 0},
+                "annualIncrement": {"type": "uniform", "low": 3, "high": 7},
+                "inflationRate": {"type": "normal", "std": 2.0}
+            }
+        }
+
+    Returns:
+        P5/P50/P95 bands for the final balance and its real value
+    """
+    try:
+        data = request.get_json() or {}
+
+        required_fields = ['currentAge', 'retirementAge', 'basicSalary']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({
+                    'error': 'Missing required field',
+                    'message': f'{field} is required'
+                }), 400
+
+        try:
+            paths = _whole_number(data.get('paths', current_app.config['MONTE_CARLO_DEFAULT_PATHS']), 'paths')
+        except ValueError as e:
+            return jsonify({
+                'error': 'Invalid paths',
+                'message': str(e)
+            }), 400
+        max_paths = current_app.config['MONTE_CARLO_MAX_PATHS']
+        if paths > max_paths:
+            return jsonify({
+                'error': 'Too many paths',
+                'message': f'paths must not exceed {max_paths}'
+            }), 400
+
+        distributions = data.get('distributions') or {}
+        if not isinstance(distributions, dict):
+            return jsonify({
+                'error': 'Invalid simulation parameters',
+                'message': 'distributions must be an object'
+            }), 400
+
+        try:
+            result = simulate_retirement_savings(
+                current_age=data['currentAge'],
+                retirement_age=data['retirementAge'],
+                basic_salary=data['basicSalary'],
+                employee_epf_rate=data.get('employeeEpfRate', 10),
+                annual_increment=data.get('annualIncrement', 5),
+                epf_interest_rate=data.get('epfInterestRate', 9.5),
+                current_epf_balance=data.get('currentEpfBalance', 0),
+                inflation_rate=data.get('inflationRate', 6),
+                epf_interest_distribution=distributions.get('epfInterestRate'),
+                increment_distribution=distributions.get('annualIncrement'),
+                inflation_distribution=distributions.get('inflationRate'),
+                paths=paths,
+                seed=data.get('seed'),
+                chunk_size=current_app.config['MONTE_CARLO_CHUNK_SIZE'],
+                progress=report_progress,
+                max_years=current_app.config['MAX_PROJECTION_YEARS']
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                'error': 'Invalid simulation parameters',
+                'message': str(e)
+            }), 400
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'paths': result['paths'],
+                'seed': result['seed'],
+                'yearsToRetirement': result['years_to_retirement'],
+                'deterministic': {
+                    'finalBalance': result['deterministic']['final_balance'],
+                    'realValue': result['deterministic']['real_value']
+                },
+                'finalBalance': result['final_balance'],
+                'realValue': result['real_value']
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Monte Carlo projection error: {str(e)}")
+        return jsonify({
+            'error': 'Simulation failed',
+            'message': str(e)
+        }), 500
+
+
+@bp.route('/goal-seek', methods=['POST'])
+@request_cost(_projection_cost)
+@coalesce_requests
+def goal_seek():
+    """
+    Solve for the input that reaches a target retirement balance
+
+    Request body:
+        {
+            "targetAmount": 50000000,
+            "targetType": "real",
+            "solveFor": "retirementAge",
+            "currentAge": 28,
+            "retirementAge": 60,
+            "basicSalary": 75000,
+            "employeeEpfRate": 10,
+            "annualIncrement": 5,
+            "epfInterestRate": 9.5,
+            "currentEpfBalance": 500000,
+            "inflationRate": 6
+        }
+
+    solveFor is one of retirementAge, basicSalary, epfInterestRate or
+    annualIncrement; the request's own value for that field is ignored.
+    targetType is "nominal" (default) or "real" (inflation-adjusted).
+
+    Returns:
+        The solved value, the projection it produces and whether the target
+        is reachable within the search bounds
+    """
+    try:
+        data = request.get_json() or {}
+        solve_for = data.get('solveFor')
+
+        if solve_for not in GOAL_SEEK_VARIABLES:
+            return jsonify({
+                'error': 'Invalid solveFor',
+                'message': f"solveFor must be one of: {', '.join(GOAL_SEEK_VARIABLES)}"
+            }), 400
+
+        required_fields = ['targetAmount', 'currentAge', 'retirementAge', 'basicSalary']
+        for field in required_fields:
+            if field != solve_for and field not in data:
+                return jsonify({
+                    'error': 'Missing required field',
+                    'message': f'{field} is required'
+                }), 400
+
+        target_type = data.get('targetType', 'nominal')
+        if target_type not in ('nominal', 'real'):
+            return jsonify({
+                'error': 'Invalid targetType',
+                'message': 'targetType must be "nominal" or "real"'
+            }), 400
+
+        try:
+            result = solve_retirement_goal(
+                target_amount=data['targetAmount'],
+                solve_for=solve_for,
+                current_age=data['currentAge'],
+                retirement_age=data.get('retirementAge', current_app.config['DEFAULT_RETIREMENT_AGE']),
+                basic_salary=data.get('basicSalary', 0),
+                employee_epf_rate=data.get('employeeEpfRate', 10),
+                annual_increment=data.get('annualIncrement', 5),
+                epf_interest_rate=data.get('epfInterestRate', 9.5),
+                current_epf_balance=data.get('currentEpfBalance', 0),
+                inflation_rate=data.get('inflationRate', 6),
+                real_terms=target_type == 'real',
+                max_retirement_age=current_app.config['GOAL_SEEK_MAX_RETIREMENT_AGE'],
+                max_rate=current_app.config['GOAL_SEEK_MAX_RATE']
+            )
+        except ValueError as e:
+            return jsonify({
+                'error': 'Invalid goal',
+                'message': str(e)
+            }), 400
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'solveFor': result['solve_for'],
+                'value': result['value'],
+                'achievable': result['achievable'],
+                'targetAmount': result['target_amount'],
+                'targetType': target_type,
+                'projectedValue': result['projected_value'],
+                'yearsToRetirement': result['years_to_retirement'],
+                'evaluations': result['evaluations']
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Goal seek error: {str(e)}")
+        return jsonify({
+            'error': 'Calculation failed',
+            'message': str(e)
+        }), 500
+
+
+@bp.route('/sensitivity', methods=['POST'])
+@request_cost(_sensitivity_cost)
+@coalesce_requests
+def sensitivity():
+    """
+    Evaluate the projection over a grid of assumptions in one call
+
+    Request body:
+        {
+            "currentAge": 28,
+            "basicSalary": 75000,
+            "employeeEpfRate": 10,
+            "currentEpfBalance": 500000,
+            "pensionYears": 20,
+            "ranges": {
+                "epfInterestRate": {"start": 8, "stop": 11, "step": 0.5},
+                "annualIncrement": [3, 5, 7],
+                "inflationRate": 6,
+                "retirementAge": [55, 60, 65]
+            }
+        }
+
+    Each axis is a single value, a list, or an inclusive start/stop/step
+    range; axes left out use the request's own field (e.g. "inflationRate")
+    or the usual default. The grid may not exceed SENSITIVITY_MAX_CELLS.
+
+    Returns:
+        The axis values and finalBalance, realValue and monthlyPension as
+        nested lists indexed [epfInterestRate][annualIncrement]
+        [inflationRate][retirementAge]
+    """
+    try:
+        data = request.get_json() or {}
+
+        required_fields = ['currentAge', 'basicSalary']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({
+                    'error': 'Missing required field',
+                    'message': f'{field} is required'
+                }), 400
+
+        ranges = data.get('ranges') or {}
+        try:
+            cells = 1
+            for field in SENSITIVITY_AXES:
+                cells *= _sweep_length(ranges.get(field))
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                'error': 'Invalid range',
+                'message': str(e)
+            }), 400
+
+        # Checked before any axis is expanded
+        max_cells = current_app.config['SENSITIVITY_MAX_CELLS']
+        if cells > max_cells:
+            return jsonify({
+                'error': 'Grid too large',
+                'message': f'The grid has {cells} cells; the limit is {max_cells}'
+            }), 400
+
+        axes = {
+            field: _sweep_values(ranges.get(field), data.get(field, default))
+            for field, default in SENSITIVITY_AXES.items()
+        }
+
+        try:
+            result = calculate_sensitivity_grid(
+                current_age=data['currentAge'],
+                basic_salary=data['basicSalary'],
+                epf_interest_rates=axes['epfInterestRate'],
+                annual_increments=axes['annualIncrement'],
+                inflation_rates=axes['inflationRate'],
+                retirement_ages=axes['retirementAge'],
+                employee_epf_rate=data.get('employeeEpfRate', 10),
+                current_epf_balance=data.get('currentEpfBalance', 0),
+                pension_years=data.get('pensionYears', 20)
+            )
+        except ValueError as e:
+            return jsonify({
+                'error': 'Invalid parameters',
+                'message': str(e)
+            }), 400
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'axes': {
+                    'epfInterestRate': result['epf_interest_rates'],
+                    'annualIncrement': result['annual_increments'],
+                    'inflationRate': result['inflation_rates'],
+                    'retirementAge': result['retirement_ages']
+                },
+                'shape': list(result['final_balance'].shape),
+                'finalBalance': np.round(result['final_balance'], 2),
+                'realValue': np.round(result['real_value'], 2),
+                'monthlyPension': np.round(result['monthly_pension'], 2)
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Sensitivity grid error: {str(e)}")
+        return jsonify({
+            'error': 'Calculation failed',
+            'message': str(e)
+        }), 500
+
+
 @bp.route('/scenarios/compare', methods=['POST'])
+@request_cost(_compare_cost)
+@coalesce_requests
 def compare_scenarios():
     """
     Compare multiple retirement scenarios
@@ -163,6 +1422,10 @@ def compare_scenarios():
             ]
         }
 
+    Large scenario lists (SCENARIO_PARALLEL_THRESHOLD or more) are sharded
+    across a process pool. Results keep the input order; a scenario that
+    fails carries an "error" message instead of figures.
+
     Returns:
         Comparison of all scenarios
     """
@@ -176,32 +1439,17 @@ def compare_scenarios():
                 'message': 'At least one scenario is required'
             }), 400
 
-        results = []
-
-        for scenario in scenarios:
-            savings_result = calculate_retirement_savings(
-                current_age=scenario['currentAge'],
-                retirement_age=scenario['retirementAge'],
-                basic_salary=scenario['basicSalary'],
-                employee_epf_rate=scenario.get('employeeEpfRate', 10),
-                annual_increment=scenario.get('annualIncrement', 5),
-                epf_interest_rate=scenario.get('epfInterestRate', 9.5),
-                current_epf_balance=scenario.get('currentEpfBalance', 0)
-            )
-
-            years_to_retirement = scenario['retirementAge'] - scenario['currentAge']
-            purchasing_power = calculate_purchasing_power(
-                savings_result['final_balance'],
-                years_to_retirement,
-                scenario.get('inflationRate', 6)
-            )
+        indexed = list(enumerate(scenarios))
+        threshold = current_app.config['SCENARIO_PARALLEL_THRESHOLD']
+        max_workers = current_app.config['SCENARIO_MAX_WORKERS']
 
-            results.append({
-                'name': scenario.get('name', f"Scenario {len(results) + 1}"),
-                'finalBalance': savings_result['final_balance'],
-                'realValue': purchasing_power['real_value'],
-                'yearsToRetirement': years_to_retirement
-            })
+        if max_workers > 1 and len(indexed) >= threshold:
+            results = map_sharded(_compare_scenario, indexed, max_workers, progress=report_progress)
+        else:
+            results = []
+            for item in indexed:
+                results.append(_compare_scenario(item))
+                report_progress(len(results), len(indexed))
 
         return jsonify({
             'success': True,
@@ -0,0 +1,258 @@
+"""
+Background job routes for long-running calculations
+"""
+from flask import Blueprint, current_app, request, jsonify, url_for
+from app.auth import require_auth
+from app.jobs import JOB_TYPES, JobLimitError, QueueFullError, get_job_manager
+from app.ratelimit import RequestRejected, estimate_cost
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Page size for GET /api/jobs
+MAX_JOB_LIST_LIMIT = 100
+
+bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+
+def _with_links(job):
+    """Add the status and (once finished) result URLs to a job dict"""
+    job = dict(job, statusUrl=url_for('jobs.get_job', job_id=job['id']))
+    if job['finishedAt'] is not None and job['status'] != 'cancelled':
+        job['resultUrl'] = url_for('jobs.get_job_result', job_id=job['id'])
+    return job
+
+
+@bp.route('', methods=['POST'])
+@require_auth
+def submit_job(current_user):
+    """
+    Submit a calculation to run in the background
+
+    Request body:
+        {
+            "type": "compare",
+            "payload": {"scenarios": [...]}
+        }
+
+    `type` is one of retirementProjection, batch, monteCarlo, goalSeek,
+    sensitivity or compare; `payload` is the body the matching
+    /api/calculator route takes.
+
+    Returns:
+        202 with the queued job and a Location header to poll; 413 if the
+        payload is estimated above JOBS_MAX_COST, 429 if the user already
+        has JOBS_MAX_PER_USER active jobs, 503 if the queue is full (both
+        with Retry-After)
+    """
+    try:
+        uid = current_user.get('uid')
+
+        if not uid:
+            return jsonify({'error': 'User not found'}), 404
+
+        data = request.get_json(silent=True) or {}
+        job_type = data.get('type')
+        payload = data.get('payload')
+
+        if job_type not in JOB_TYPES:
+            return jsonify({
+                'error': 'Invalid job type',
+                'message': f"type must be one of: {', '.join(JOB_TYPES)}"
+            }), 400
+        if not isinstance(payload, dict):
+            return jsonify({
+                'error': 'Missing payload',
+                'message': 'payload must be a JSON object'
+            }), 400
+
+        # Same estimate the admission check applies to the calculator route
+        try:
+            cost = estimate_cost(JOB_TYPES[job_type], payload)
+        except RequestRejected as e:
+            return jsonify({
+                'error': 'Invalid payload',
+                'message': str(e)
+            }), 400
+        max_cost = current_app.config['JOBS_MAX_COST']
+        if cost > max_cost:
+            return jsonify({
+                'error': 'Job too expensive',
+                'message': f'This job is estimated at {cost} cost units; the limit is {max_cost:.0f}'
+            }), 413
+
+        manager = get_job_manager()
+        retry_after = str(current_app.config['JOBS_RETRY_AFTER'])
+        try:
+            job_id = manager.submit(uid, job_type, payload)
+        except JobLimitError as e:
+            return jsonify({
+                'error': 'Too many jobs',
+                'message': str(e)
+            }), 429, {'Retry-After': retry_after}
+        except QueueFullError as e:
+            return jsonify({
+                'error': 'Job queue full',
+                'message': str(e)
+            }), 503, {'Retry-After': retry_after}
+
+        job = _with_links(manager.store.get(uid, job_id))
+        return jsonify({
+            'success': True,
+            'data': job
+        }), 202, {'Location': job['statusUrl']}
+
+    except Exception as e:
+        logger.error(f"Job submission error: {str(e)}")
+        return jsonify({'error': 'Failed to submit job', 'message': str(e)}), 500
+
+
+@bp.route('', methods=['GET'])
+@require_auth
+def list_jobs(current_user):
+    """
+    List the user's recent jobs, newest first
+
+    Query parameters:
+        limit: Jobs to return (default and maximum 100)
+    """
+    try:
+        uid = current_user.get('uid')
+
+        if not uid:
+            return jsonify({'error': 'User not found'}), 404
+
+        try:
+            limit = int(request.args.get('limit', MAX_JOB_LIST_LIMIT))
+        except ValueError:
+            return jsonify({'error': 'Invalid limit', 'message': 'limit must be an integer'}), 400
+        limit = max(1, min(limit, MAX_JOB_LIST_LIMIT))
+
+        store = get_job_manager().store
+        store.purge()
+        return jsonify({
+            'success': True,
+            'data': [_with_links(job) for job in store.list_jobs(uid, limit)]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"List jobs error: {str(e)}")
+        return jsonify({'error': 'Failed to list jobs', 'message': str(e)}), 500
+
+
+@bp.route('/<job_id>', methods=['GET'])
+@require_auth
+def get_job(current_user, job_id):
+    """
+    Get a job's status and progress
+
+    Returns:
+        The job with status (queued, running, succeeded, failed or
+        cancelled), progress from 0 to 1, timestamps and, once finished,
+        resultUrl; 404 if it does not exist or its result expired
+    """
+    try:
+        uid = current_user.get('uid')
+
+        if not uid:
+            return jsonify({'error': 'User not found'}), 404
+
+        store = get_job_manager().store
+        store.purge()
+        job = store.get(uid, job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+
+        return jsonify({
+            'success': True,
+            'data': _with_links(job)
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Get job error: {str(e)}")
+        return jsonify({'error': 'Failed to get job', 'message': str(e)}), 500
+
+
+@bp.route('/<job_id>/result', methods=['GET'])
+@require_auth
+def get_job_result(current_user, job_id):
+    """
+    Get a finished job's result
+
+    Returns:
+        The calculator route's response body and status code as if it had
+        been called directly; 409 while the job is queued or running, 404
+        if it does not exist, was cancelled or its result expired
+    """
+    try:
+        uid = current_user.get('uid')
+
+        if not uid:
+            return jsonify({'error': 'User not found'}), 404
+
+        store = get_job_manager().store
+        store.purge()
+        job = store.get(uid, job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if job['status'] in ('queued', 'running'):
+            return jsonify({
+                'error': 'Job not finished',
+                'message': f"Job is {job['status']}",
+                'data': _with_links(job)
+            }), 409
+
+        result = store.get_result(uid, job_id)
+        if result is None:
+            return jsonify({
+                'error': 'Job has no result',
+                'message': job['error'] or f"Job was {job['status']}"
+            }), 404
+
+        status, body = result
+        return current_app.response_class(body, status=status, mimetype='application/json')
+
+    except Exception as e:
+        logger.error(f"Get job result error: {str(e)}")
+        return jsonify({'error': 'Failed to get job result', 'message': str(e)}), 500
+
+
+@bp.route('/<job_id>', methods=['DELETE'])
+@require_auth
+def delete_job(current_user, job_id):
+    """
+    Cancel a queued job, or delete a finished job and its result
+
+    Running jobs cannot be interrupted; they return 409.
+    """
+    try:
+        uid = current_user.get('uid')
+
+        if not uid:
+            return jsonify({'error': 'User not found'}), 404
+
+        store = get_job_manager().store
+        if store.cancel(uid, job_id):
+            return jsonify({
+                'success': True,
+                'message': 'Job cancelled'
+            }), 200
+
+        job = store.get(uid, job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if job['status'] == 'running':
+            return jsonify({
+                'error': 'Job is running',
+                'message': 'Running jobs cannot be cancelled'
+            }), 409
+
+        store.delete(uid, job_id)
+        return jsonify({
+            'success': True,
+            'message': 'Job deleted successfully'
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Delete job error: {str(e)}")
+        return jsonify({'error': 'Failed to delete job', 'message': str(e)}), 500
@@ -3,18 +3,92 @@ User profile and calculation history routes
 """
 from flask import Blueprint, request, jsonify
 from app.auth import require_auth
+from app.storage import get_storage
+from app.cache import get_cache, get_generations, user_cache_enabled
+from app.routes.calculator import resume_from_changes
+from app.columnar import ColumnarTable, LAYOUT_ROWS, is_columnar, requested_layout
+from app.streaming import requested_stream_format, stream_rows
 from datetime import datetime
 import logging
 import json
 
-# In-memory stores (non-persistent). Removing SQLAlchemy persistence as requested.
-# Keyed by Firebase UID. These reset when the app restarts.
-salary_profiles = {}  # uid -> profile dict
-calculations_store = {}  # uid -> list of calculation dicts
-_calc_id_counter = 1
+# Profiles and history live in the backend selected by STORAGE_BACKEND
+# (in-memory by default, or SQLite shared by all workers). Keyed by Firebase UID.
+
+# Page size limits for GET /calculations
+DEFAULT_HISTORY_LIMIT = 50
+MAX_HISTORY_LIMIT = 200
+
+HISTORY_EXPORT_COLUMNS = ['id', 'calculationType', 'createdAt', 'inputs', 'results']
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+
+def _store_columnar(results):
+    """Convert a row-form results.yearlyBreakdown to columnar before saving"""
+    breakdown = results.get('yearlyBreakdown') if isinstance(results, dict) else None
+    if not breakdown or is_columnar(breakdown):
+        return results
+    try:
+        table = ColumnarTable.from_json(breakdown)
+    except (KeyError, TypeError, ValueError):
+        return results  # Not a uniform row list; keep it as sent
+    return dict(results, yearlyBreakdown=table.to_json())
+
+
+def _with_layout(record, layout):
+    """Return a history record with its yearly breakdown in the given layout"""
+    results = record.get('results')
+    breakdown = results.get('yearlyBreakdown') if isinstance(results, dict) else None
+    if layout != LAYOUT_ROWS or not is_columnar(breakdown):
+        return record
+    return dict(record, results=dict(
+        results, yearlyBreakdown=ColumnarTable.from_json(breakdown).to_rows()
+    ))
+
+
+def _read_through(key, load):
+    """
+    Return the "users" cache entry for key, loading it on a miss
+
+    Entries are tagged with the key's generation as read before loading.
+    A load that raced with a write therefore stores an entry tagged with
+    the old generation, which _invalidate has already advanced, and the
+    next read reloads instead of serving it. Generations are kept outside
+    the cache (see get_generations), so evicting entries never resets them.
+    """
+    if not user_cache_enabled():
+        return load()
+    cache = get_cache('users')
+    generation = get_generations().current(key)
+    if generation is None:
+        return load()  # Cannot tell whether an entry is current
+    entry = cache.get(key, _MISSING)
+    if isinstance(entry, tuple) and entry[0] == generation:
+        return entry[1]
+    value = load()
+    cache.set(key, (generation, value))
+    return value
+
+
+def _invalidate(*keys):
+    """
+    Drop cached reads after a write
+
+    Call it after the write is stored. The "users" cache is shared by all
+    workers whenever the storage is (see user_cache_enabled), so the next
+    read in any worker loads the new data.
+    """
+    if user_cache_enabled():
+        cache = get_cache('users')
+        generations = get_generations()
+        for key in keys:
+            generations.bump(key)
+            cache.delete(key)
+
+
 bp = Blueprint('user', __name__, url_prefix='/api/user')
 
 
@@ -28,7 +102,7 @@ def get_profile(current_user):
         if not uid:
             return jsonify({'error': 'User not found'}), 404
 
-        profile = salary_profiles.get(uid)
+        profile = _read_through(('profile', uid), lambda: get_storage().get_profile(uid))
 
         return jsonify({
             'success': True,
@@ -60,9 +134,10 @@ def update_profile(current_user):
 
         data = request.get_json() or {}
 
-        # Build or update in-memory profile
+        # Build or update the stored profile
         now = datetime.utcnow()
-        profile = salary_profiles.get(uid, {
+        storage = get_storage()
+        profile = storage.get_profile(uid) or {
             'id': None,
             'currentBasicSalary': None,
             'age': None,
@@ -73,7 +148,7 @@ def update_profile(current_user):
             'currentEpfBalance': 0.0,
             'createdAt': now.isoformat(),
             'updatedAt': now.isoformat()
-        })
+        }
 
         # Update fields
         if 'currentBasicSalary' in data:
@@ -92,7 +167,8 @@ def update_profile(current_user):
             profile['currentEpfBalance'] = data['currentEpfBalance']
 
         profile['updatedAt'] = datetime.utcnow().isoformat()
-        salary_profiles[uid] = profile
+        storage.save_profile(uid, profile)
+        _invalidate(('profile', uid))
 
         return jsonify({
             'success': True,
@@ -107,20 +183,50 @@ def update_profile(current_user):
 @bp.route('/calculations', methods=['GET'])
 @require_auth
 def get_calculations(current_user):
-    """Get user's calculation history"""
+    """
+    Get user's calculation history, newest first
+
+    Query parameters:
+        limit: Page size (default 50, max 200)
+        cursor: nextCursor value from the previous page
+        layout: "rows" to return saved yearly breakdowns as row dicts
+            instead of the stored columnar form
+    """
     try:
         uid = current_user.get('uid')
 
         if not uid:
             return jsonify({'error': 'User not found'}), 404
 
-        items = calculations_store.get(uid, [])
-        # sort by createdAt desc and limit 50
-        sorted_items = sorted(items, key=lambda x: x.get('createdAt', ''), reverse=True)[:50]
+        try:
+            limit = int(request.args.get('limit', DEFAULT_HISTORY_LIMIT))
+            cursor = request.args.get('cursor')
+            cursor = int(cursor) if cursor else None
+        except ValueError:
+            return jsonify({
+                'error': 'Invalid pagination parameters',
+                'message': 'limit and cursor must be integers'
+            }), 400
+
+        limit = max(1, min(limit, MAX_HISTORY_LIMIT))
+        if cursor is None and limit == DEFAULT_HISTORY_LIMIT:
+            # The first page is what the dashboard loads on every visit
+            items, next_cursor = _read_through(
+                ('calculations', uid),
+                lambda: get_storage().list_calculations(uid, limit=limit)
+            )
+        else:
+            items, next_cursor = get_storage().list_calculations(uid, limit=limit, cursor=cursor)
+        layout = requested_layout()
+        items = [_with_layout(item, layout) for item in items]
 
         return jsonify({
             'success': True,
-            'data': sorted_items
+            'data': items,
+            'pagination': {
+                'limit': limit,
+                'nextCursor': str(next_cursor) if next_cursor is not None else None
+            }
         }), 200
 
     except Exception as e:
@@ -128,12 +234,52 @@ def get_calculations(current_user):
         return jsonify({'error': 'Failed to get calculations', 'message': str(e)}), 500
 
 
+@bp.route('/calculations/export', methods=['GET'])
+@require_auth
+def export_calculations(current_user):
+    """
+    Stream the user's full calculation history, newest first
+
+    Format is chosen with "Accept: application/x-ndjson" / "text/csv" or
+    ?format=ndjson|csv (NDJSON by default). History is read one page at a
+    time, so memory stays flat however long it is. ?layout=rows works as
+    for GET /calculations.
+    """
+    try:
+        uid = current_user.get('uid')
+
+        if not uid:
+            return jsonify({'error': 'User not found'}), 404
+
+        storage = get_storage()
+        layout = requested_layout()
+
+        def rows():
+            cursor = None
+            while True:
+                page, cursor = storage.list_calculations(uid, limit=MAX_HISTORY_LIMIT, cursor=cursor)
+                for record in page:
+                    yield _with_layout(record, layout)
+                if cursor is None:
+                    break
+
+        return stream_rows(rows(), requested_stream_format() or 'ndjson',
+                           HISTORY_EXPORT_COLUMNS, filename='calculations')
+
+    except Exception as e:
+        logger.error(f"Export calculations error: {str(e)}")
+        return jsonify({'error': 'Failed to export calculations', 'message': str(e)}), 500
+
+
 @bp.route('/calculations', methods=['POST'])
 @require_auth
 def save_calculation(current_user):
-    """Save a calculation to history"""
+    """
+    Save a calculation to history
+
+    A results.yearlyBreakdown sent as row dicts is stored in columnar form.
+    """
     try:
-        global _calc_id_counter
         uid = current_user.get('uid')
 
         if not uid:
@@ -141,18 +287,13 @@ def save_calculation(current_user):
 
         data = request.get_json() or {}
 
-        calc = {
-            'id': _calc_id_counter,
-            'userId': None,
-            'calculationType': data.get('calculationType', 'retirement_projection'),
-            'inputs': data.get('inputs', {}),
-            'results': data.get('results', {}),
-            'createdAt': datetime.utcnow().isoformat()
-        }
-
-        _calc_id_counter += 1
-
-        calculations_store.setdefault(uid, []).append(calc)
+        calc = get_storage().add_calculation(
+            uid,
+            calculation_type=data.get('calculationType', 'retirement_projection'),
+            inputs=data.get('inputs', {}),
+            results=_store_columnar(data.get('results', {}))
+        )
+        _invalidate(('calculations', uid))
 
         return jsonify({
             'success': True,
@@ -174,17 +315,9 @@ def delete_calculation(current_user, calc_id):
         if not uid:
             return jsonify({'error': 'User not found'}), 404
 
-        items = calculations_store.get(uid, [])
-        match = None
-        for item in items:
-            if int(item.get('id')) == int(calc_id):
-                match = item
-                break
-
-        if not match:
+        if not get_storage().delete_calculation(uid, calc_id):
             return jsonify({'error': 'Calculation not found'}), 404
-
-        items.remove(match)
+        _invalidate(('calculations', uid))
 
         return jsonify({
             'success': True,
@@ -194,3 +327,65 @@ def delete_calculation(current_user, calc_id):
     except Exception as e:
         logger.error(f"Delete calculation error: {str(e)}")
         return jsonify({'error': 'Failed to delete calculation', 'message': str(e)}), 500
+
+
+@bp.route('/calculations/<int:calc_id>/resume', methods=['POST'])
+@require_auth
+def resume_calculation(current_user, calc_id):
+    """
+    Re-run a saved projection with assumptions that change part-way
+
+    Request body:
+        {
+            "fromAge": 40,
+            "annualIncrement": 7,
+            "epfInterestRate": 10
+        }
+
+    Years before fromAge (or fromYear) are taken from the saved yearly
+    breakdown; only the later years are recomputed.
+    """
+    try:
+        uid = current_user.get('uid')
+
+        if not uid:
+            return jsonify({'error': 'User not found'}), 404
+
+        calc = get_storage().get_calculation(uid, calc_id)
+        if calc is None:
+            return jsonify({'error': 'Calculation not found'}), 404
+
+        results = calc.get('results') or {}
+        yearly_breakdown = results.get('yearlyBreakdown')
+        if not yearly_breakdown:
+            return jsonify({
+                'error': 'Cannot resume calculation',
+                'message': 'The saved calculation has no yearly breakdown'
+            }), 400
+
+        try:
+            result, inputs = resume_from_changes(
+                yearly_breakdown, calc.get('inputs') or {}, request.get_json() or {}
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({
+                'error': 'Invalid changes',
+                'message': str(e)
+            }), 400
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'calculationId': calc_id,
+                'inputs': inputs,
+                'finalBalance': result['final_balance'],
+                'yearsToRetirement': result['years_to_retirement'],
+                'totalContributions': result['total_contributions'],
+                'totalInterest': result['total_interest'],
+                'yearlyBreakdown': result['yearly_breakdown'].serialize(requested_layout())
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Resume calculation error: {str(e)}")
+        return jsonify({'error': 'Failed to resume calculation', 'message': str(e)}), 500
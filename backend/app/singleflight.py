@@ -0,0 +1,330 @@
+"""
+Single-flight coalescing of identical concurrent calculator requests
+
+When many clients send the same payload at once (payroll week: identical
+grade salaries and default assumptions), only one request computes the
+response and the others wait for it and receive a copy.
+
+Requests are matched on endpoint, query string and JSON body, with floats
+rounded to CALCULATION_CACHE_PRECISION decimals. Within a worker, waiting
+threads share the leader's result directly. With SINGLE_FLIGHT_SHARED,
+workers also coordinate through a small SQLite file: one worker's leader
+computes, and the others poll for the finished response.
+"""
+from functools import wraps
+from flask import current_app, request
+from app.streaming import requested_stream_format
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run a function once per key among concurrent callers in this process
+
+    The first caller for a key (the leader) runs it; callers arriving while
+    it runs wait and get the same result or exception. Nothing is kept
+    once the call finishes, so this is not a cache.
+    """
+
+    def __init__(self, timeout=30.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, func):
+        """
+        Return func() for key, sharing an in-flight call if there is one
+
+        A follower that waits longer than `timeout` runs func itself.
+
+        Returns:
+            tuple: (result, shared) where shared is True for followers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                logger.warning("Single-flight wait timed out; computing locally")
+                return func(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Return leader/follower counters and the number of calls in flight"""
+        with self._lock:
+            return {
+                'inFlight': len(self._calls),
+                'leaders': self.leaders,
+                'followers': self.followers
+            }
+
+
+class SQLiteFlightStore:
+    """
+    Cross-worker coordination for SingleFlight through an SQLite file
+
+    A worker becomes the leader for a key by inserting its row. It then
+    publishes the finished response, which stays readable for `result_ttl`
+    seconds so polling workers can pick it up. A leader that has not
+    finished within `lease` seconds is presumed dead and its row replaced.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS flights (
+            key TEXT PRIMARY KEY,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            status INTEGER,
+            headers TEXT,
+            body BLOB
+        )
+    """
+    PURGE = (
+        "DELETE FROM flights WHERE (finished_at IS NULL AND started_at < ?) "
+        "OR finished_at < ?"
+    )
+    ACQUIRE = "INSERT OR IGNORE INTO flights (key, started_at) VALUES (?, ?)"
+    PUBLISH = (
+        "UPDATE flights SET finished_at = ?, status = ?, headers = ?, body = ? "
+        "WHERE key = ?"
+    )
+    ABANDON = "DELETE FROM flights WHERE key = ? AND finished_at IS NULL"
+    SELECT = "SELECT finished_at, status, headers, body FROM flights WHERE key = ?"
+
+    def __init__(self, path, lease=30.0, result_ttl=1.0, poll_interval=0.005):
+        self.path = path
+        self.lease = lease
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = self._connect()
+        try:
+            connection.execute(self.SCHEMA)
+        finally:
+            connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")  # Rows are only transient
+        return connection
+
+    @property
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def try_acquire(self, key):
+        """Return True if this worker is now the leader for key"""
+        now = time.time()
+        connection = self._connection
+        connection.execute(self.PURGE, (now - self.lease, now - self.result_ttl))
+        return connection.execute(self.ACQUIRE, (key, now)).rowcount == 1
+
+    def publish(self, key, response):
+        """Store the leader's (status, headers, body) for other workers"""
+        status, headers, body = response
+        self._connection.execute(
+            self.PUBLISH, (time.time(), status, json.dumps(headers), body, key)
+        )
+
+    def abandon(self, key):
+        """Drop an unfinished row so another worker can take over"""
+        self._connection.execute(self.ABANDON, (key,))
+
+    def wait(self, key, timeout):
+        """
+        Poll for another worker's published response
+
+        Returns:
+            (status, headers, body), or None if the leader disappeared or
+            the wait timed out
+        """
+        deadline = time.monotonic() + timeout
+        interval = self.poll_interval
+        while time.monotonic() < deadline:
+            row = self._connection.execute(self.SELECT, (key,)).fetchone()
+            if row is None:
+                return None
+            finished_at, status, headers, body = row
+            if finished_at is not None:
+                return status, [tuple(header) for header in json.loads(headers)], body
+            time.sleep(interval)
+            interval = min(interval * 2, 0.05)
+        return None
+
+
+flights = SingleFlight()
+_settings = {'enabled': True, 'precision': 4, 'store': None, 'store_config': None}
+_store_lock = threading.Lock()
+
+
+def init_singleflight(app):
+    """Apply single-flight settings from the Flask app config"""
+    flights.timeout = app.config['SINGLE_FLIGHT_TIMEOUT']
+    _settings['enabled'] = app.config['SINGLE_FLIGHT_ENABLED']
+    _settings['precision'] = app.config['CALCULATION_CACHE_PRECISION']
+    _settings['store'] = None
+    _settings['store_config'] = None
+    if app.config['SINGLE_FLIGHT_SHARED']:
+        # Opened on first use, after any pre-fork
+        _settings['store_config'] = (
+            app.config['SINGLE_FLIGHT_SHARED_PATH'],
+            app.config['SINGLE_FLIGHT_TIMEOUT'],
+            app.config['SINGLE_FLIGHT_RESULT_TTL']
+        )
+
+
+def _shared_store():
+    if _settings['store'] is None and _settings['store_config'] is not None:
+        with _store_lock:
+            if _settings['store'] is None:
+                path, lease, result_ttl = _settings['store_config']
+                _settings['store'] = SQLiteFlightStore(path, lease=lease, result_ttl=result_ttl)
+    return _settings['store']
+
+
+def _normalize_json(value, precision):
+    """Round floats (and drop .0) so equivalent payloads serialize equally"""
+    if isinstance(value, float):
+        value = round(value, precision)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, dict):
+        return {key: _normalize_json(item, precision) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize_json(item, precision) for item in value]
+    return value
+
+
+def _request_key():
+    """Hash the normalized request, or None if the body is not JSON"""
+    data = request.get_json(silent=True)
+    if data is None and request.get_data():
+        return None
+
+    canonical = json.dumps(
+        {
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'args': sorted(request.args.items(multi=True)),
+            'body': _normalize_json(data, _settings['precision'])
+        },
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _capture(view, args, kwargs):
+    """Run the view and return its response as (status, headers, body)"""
+    response = current_app.make_response(view(*args, **kwargs))
+    return response.status_code, list(response.headers.items()), response.get_data()
+
+
+def _compute(key, view, args, kwargs):
+    store = _shared_store()
+    if store is None:
+        return _capture(view, args, kwargs)
+
+    try:
+        leader = store.try_acquire(key)
+        if not leader:
+            shared = store.wait(key, flights.timeout)
+            if shared is not None:
+                return shared
+    except sqlite3.Error as e:
+        logger.warning(f"Shared single-flight store unavailable: {str(e)}")
+        return _capture(view, args, kwargs)
+
+    try:
+        response = _capture(view, args, kwargs)
+    except BaseException:
+        if leader:
+            store.abandon(key)
+        raise
+    if leader:
+        try:
+            store.publish(key, response)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to publish single-flight result: {str(e)}")
+    return response
+
+
+def coalesce_requests(view=None, *, when=None):
+    """
+    Share one computation among identical concurrent requests to a view
+
+    Streamed (NDJSON/CSV) requests and non-JSON bodies always run on their
+    own. Each waiting request gets a fresh response object, so
+    after_request hooks (CORS, metrics) still run per request.
+
+    Args:
+        view: The view function
+        when: Optional predicate on the parsed JSON body; requests for which
+            it returns False are not coalesced (e.g. unseeded Monte Carlo)
+    """
+    if view is None:
+        return lambda func: coalesce_requests(func, when=when)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _settings['enabled'] or requested_stream_format():
+            return view(*args, **kwargs)
+        if when is not None:
+            data = request.get_json(silent=True)
+            if not (isinstance(data, dict) and when(data)):
+                return view(*args, **kwargs)
+
+        key = _request_key()
+        if key is None:
+            return view(*args, **kwargs)
+
+        (status, headers, body), _ = flights.do(key, lambda: _compute(key, view, args, kwargs))
+        return current_app.response_class(body, status=status, headers=headers)
+
+    return wrapper
@@ -0,0 +1,316 @@
+"""
+Salary profile and calculation history storage
+
+Two interchangeable backends are provided, selected with STORAGE_BACKEND:
+
+- "memory": per-process dicts (non-persistent, reset on restart)
+- "sqlite": an SQLite database in WAL mode shared by all gunicorn workers
+
+Both keep calculation history ordered by creation, so the newest-first read
+needs no sort, and delete by id without scanning a user's history.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import itertools
+import json
+import os
+import sqlite3
+import threading
+
+
+class MemoryStorage:
+    """
+    Thread-safe in-memory storage (non-persistent, per process)
+
+    Ids come from a single counter guarded by the store lock, so concurrent
+    requests under threaded gunicorn never receive the same id.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._profiles = {}  # uid -> profile dict
+        self._by_user = {}  # uid -> OrderedDict(id -> record), oldest first
+        self._owners = {}  # id -> uid
+
+    def get_profile(self, uid):
+        """Return the user's salary profile, or None"""
+        with self._lock:
+            return self._profiles.get(uid)
+
+    def save_profile(self, uid, profile):
+        """Create or replace the user's salary profile"""
+        with self._lock:
+            self._profiles[uid] = profile
+            return profile
+
+    def add_calculation(self, uid, calculation_type, inputs, results):
+        """
+        Save a calculation for a user
+
+        Returns:
+            dict: The stored record including its id and createdAt
+        """
+        with self._lock:
+            calc_id = next(self._ids)
+            record = {
+                'id': calc_id,
+                'userId': None,
+                'calculationType': calculation_type,
+                'inputs': inputs,
+                'results': results,
+                'createdAt': datetime.utcnow().isoformat()
+            }
+            self._by_user.setdefault(uid, OrderedDict())[calc_id] = record
+            self._owners[calc_id] = uid
+            return record
+
+    def list_calculations(self, uid, limit=50, cursor=None):
+        """
+        Return a page of a user's calculations, newest (highest id) first
+
+        Args:
+            uid: Firebase user ID
+            limit: Maximum number of records to return
+            cursor: Id of the last record of the previous page; only older
+                records are returned
+
+        Returns:
+            tuple: (records, next_cursor) where next_cursor is None on the
+            last page
+        """
+        with self._lock:
+            records = self._by_user.get(uid)
+            if not records:
+                return [], None
+
+            page = []
+            for calc_id in reversed(records):
+                if cursor is not None and calc_id >= cursor:
+                    continue
+                if len(page) == limit:
+                    return page, page[-1]['id']
+                page.append(records[calc_id])
+            return page, None
+
+    def get_calculation(self, uid, calc_id):
+        """Return one of a user's calculations, or None"""
+        with self._lock:
+            if self._owners.get(calc_id) != uid:
+                return None
+            return self._by_user[uid][calc_id]
+
+    def delete_calculation(self, uid, calc_id):
+        """
+        Delete one of a user's calculations
+
+        Returns:
+            bool: True if the record existed and belonged to the user
+        """
+        with self._lock:
+            if self._owners.get(calc_id) != uid:
+                return False
+            del self._owners[calc_id]
+            del self._by_user[uid][calc_id]
+            return True
+
+
+class SQLiteStorage:
+    """
+    SQLite storage in WAL mode, shared by every worker process
+
+    Each thread gets its own connection (sqlite3 connections must not be
+    shared across threads), opened lazily so no connection is inherited
+    across a fork. Statements are constant strings, so they are prepared once
+    per connection and reused from sqlite3's statement cache.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS salary_profiles (
+            uid TEXT PRIMARY KEY,
+            profile TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS calculations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            uid TEXT NOT NULL,
+            calculation_type TEXT NOT NULL,
+            inputs TEXT NOT NULL,
+            results TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """,
+        # History pages are ordered and keyed by id alone (insertion order),
+        # so the id cursor can never skip or repeat a record
+        "DROP INDEX IF EXISTS idx_calculations_uid_created_at",
+        "CREATE INDEX IF NOT EXISTS idx_calculations_uid_id ON calculations (uid, id)"
+    )
+
+    SELECT_PROFILE = "SELECT profile FROM salary_profiles WHERE uid = ?"
+    UPSERT_PROFILE = (
+        "INSERT INTO salary_profiles (uid, profile) VALUES (?, ?) "
+        "ON CONFLICT(uid) DO UPDATE SET profile = excluded.profile"
+    )
+    INSERT_CALCULATION = (
+        "INSERT INTO calculations (uid, calculation_type, inputs, results, created_at) "
+        "VALUES (?, ?, ?, ?, ?)"
+    )
+    SELECT_CALCULATIONS = (
+        "SELECT id, calculation_type, inputs, results, created_at FROM calculations "
+        "WHERE uid = ? AND id < ? ORDER BY id DESC LIMIT ?"
+    )
+    SELECT_CALCULATION = (
+        "SELECT id, calculation_type, inputs, results, created_at FROM calculations "
+        "WHERE id = ? AND uid = ?"
+    )
+    DELETE_CALCULATION = "DELETE FROM calculations WHERE id = ? AND uid = ?"
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Create the schema with a throwaway connection so nothing is left
+        # open in a process that may fork workers afterwards
+        connection = self._connect()
+        try:
+            with connection:
+                for statement in self.SCHEMA:
+                    connection.execute(statement)
+        finally:
+            connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,  # Autocommit; `with connection` wraps writes
+            check_same_thread=True,
+            cached_statements=64
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @property
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get_profile(self, uid):
+        """Return the user's salary profile, or None"""
+        row = self._connection.execute(self.SELECT_PROFILE, (uid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_profile(self, uid, profile):
+        """Create or replace the user's salary profile"""
+        self._connection.execute(self.UPSERT_PROFILE, (uid, json.dumps(profile)))
+        return profile
+
+    def add_calculation(self, uid, calculation_type, inputs, results):
+        """
+        Save a calculation for a user
+
+        Returns:
+            dict: The stored record including its id and createdAt
+        """
+        created_at = datetime.utcnow().isoformat()
+        cursor = self._connection.execute(
+            self.INSERT_CALCULATION,
+            (uid, calculation_type, json.dumps(inputs), json.dumps(results), created_at)
+        )
+        return {
+            'id': cursor.lastrowid,
+            'userId': None,
+            'calculationType': calculation_type,
+            'inputs': inputs,
+            'results': results,
+            'createdAt': created_at
+        }
+
+    def list_calculations(self, uid, limit=50, cursor=None):
+        """
+        Return a page of a user's calculations, newest first
+
+        See MemoryStorage.list_calculations.
+        """
+        # Fetch one extra row to know whether another page exists
+        rows = self._connection.execute(
+            self.SELECT_CALCULATIONS,
+            (uid, cursor if cursor is not None else 2 ** 63 - 1, limit + 1)
+        ).fetchall()
+
+        page = [
+            {
+                'id': calc_id,
+                'userId': None,
+                'calculationType': calculation_type,
+                'inputs': json.loads(inputs),
+                'results': json.loads(results),
+                'createdAt': created_at
+            }
+            for calc_id, calculation_type, inputs, results, created_at in rows[:limit]
+        ]
+        next_cursor = page[-1]['id'] if len(rows) > limit else None
+        return page, next_cursor
+
+    def get_calculation(self, uid, calc_id):
+        """Return one of a user's calculations, or None"""
+        row = self._connection.execute(self.SELECT_CALCULATION, (calc_id, uid)).fetchone()
+        if row is None:
+            return None
+        calc_id, calculation_type, inputs, results, created_at = row
+        return {
+            'id': calc_id,
+            'userId': None,
+            'calculationType': calculation_type,
+            'inputs': json.loads(inputs),
+            'results': json.loads(results),
+            'createdAt': created_at
+        }
+
+    def delete_calculation(self, uid, calc_id):
+        """
+        Delete one of a user's calculations
+
+        Returns:
+            bool: True if the record existed and belonged to the user
+        """
+        cursor = self._connection.execute(self.DELETE_CALCULATION, (calc_id, uid))
+        return cursor.rowcount > 0
+
+
+_storage = None
+
+
+def init_storage(app):
+    """Create the storage backend selected by STORAGE_BACKEND"""
+    global _storage
+
+    backend = app.config['STORAGE_BACKEND']
+    if backend == 'sqlite':
+        _storage = SQLiteStorage(app.config['SQLITE_PATH'])
+    elif backend == 'memory':
+        _storage = MemoryStorage()
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return _storage
+
+
+def get_storage():
+    """Return the active storage backend (in-memory until init_storage runs)"""
+    global _storage
+
+    if _storage is None:
+        _storage = MemoryStorage()
+    return _storage
@@ -0,0 +1,193 @@
+"""
+Streaming NDJSON/CSV responses for large tabular results, and incremental
+reading of NDJSON/CSV uploads
+"""
+from flask import Response, request, stream_with_context
+import csv
+import io
+import json
+import shutil
+import tempfile
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+CSV_MIMETYPE = 'text/csv'
+
+_FORMATS = {
+    'ndjson': NDJSON_MIMETYPE,
+    'csv': CSV_MIMETYPE
+}
+
+# Upload content types and file extensions accepted for each format
+_UPLOAD_MIMETYPES = {
+    CSV_MIMETYPE: 'csv',
+    'application/csv': 'csv',
+    NDJSON_MIMETYPE: 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/x-jsonlines': 'ndjson'
+}
+_UPLOAD_EXTENSIONS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson'
+}
+
+# Uploads larger than this are spooled to a temporary file
+UPLOAD_SPOOL_SIZE = 1024 * 1024
+
+
+def requested_stream_format():
+    """
+    Return 'ndjson' or 'csv' if the client asked for a streamed response
+
+    A `format` query parameter wins over the Accept header. Plain JSON (or no
+    preference) returns None so routes keep their regular response.
+    """
+    fmt = request.args.get('format')
+    if fmt in _FORMATS:
+        return fmt
+
+    best = request.accept_mimetypes.best_match(
+        ['application/json', NDJSON_MIMETYPE, CSV_MIMETYPE],
+        default='application/json'
+    )
+    if best == NDJSON_MIMETYPE:
+        return 'ndjson'
+    if best == CSV_MIMETYPE:
+        return 'csv'
+    return None
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, separators=(',', ':')) + '\n'
+
+
+def _csv_lines(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(columns)
+    yield flush()
+    for row in rows:
+        writer.writerow([
+            json.dumps(value) if isinstance(value, (dict, list)) else value
+            for value in (row.get(column) for column in columns)
+        ])
+        yield flush()
+
+
+def stream_rows(rows, fmt, columns, filename=None):
+    """
+    Build a streamed response that writes rows as they are produced
+
+    Args:
+        rows: Iterable (ideally a generator) of flat dicts
+        fmt: 'ndjson' or 'csv'
+        columns: Column order for CSV output (dict/list values are written
+            as JSON strings)
+        filename: Optional download name sent in Content-Disposition
+
+    Returns:
+        flask.Response streaming the rows
+    """
+    if fmt == 'csv':
+        body = _csv_lines(rows, columns)
+    else:
+        body = _ndjson_lines(rows)
+
+    headers = {}
+    if filename:
+        headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+
+    return Response(
+        stream_with_context(body),
+        mimetype=_FORMATS[fmt],
+        headers=headers
+    )
+
+
+def open_upload(field='file'):
+    """
+    Return the uploaded table as a binary file and its format
+
+    The upload is either the raw request body (Content-Type text/csv or
+    application/x-ndjson) or a multipart file field named `field`, whose
+    format comes from its content type or file extension. A raw body is
+    copied to a spooled temporary file before parsing, so memory stays flat
+    and clients that send the whole body before reading the response
+    cannot deadlock against a streamed reply.
+
+    Returns:
+        (file, fmt) with fmt 'csv' or 'ndjson', or (None, None) if the
+        request holds no upload in a supported format
+    """
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get(field)
+        if upload is None:
+            return None, None
+        fmt = _UPLOAD_MIMETYPES.get(upload.mimetype)
+        if fmt is None:
+            filename = (upload.filename or '').lower()
+            fmt = next((f for ext, f in _UPLOAD_EXTENSIONS.items() if filename.endswith(ext)), None)
+        # Copied because Flask closes request.files when the view returns,
+        # before a streamed response has read them
+        return (_spool(upload.stream), fmt) if fmt else (None, None)
+
+    fmt = _UPLOAD_MIMETYPES.get(request.mimetype)
+    if fmt is None:
+        return None, None
+    return _spool(request.stream), fmt
+
+
+def _spool(stream):
+    spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+    shutil.copyfileobj(stream, spool, 64 * 1024)
+    spool.seek(0)
+    return spool
+
+
+def read_upload_records(file, fmt, required=()):
+    """
+    Iterate over the records of a CSV or NDJSON upload, one at a time
+
+    CSV needs a header row; its records are dicts of strings. NDJSON
+    records are the parsed objects, and blank lines are skipped. A line
+    that is not a JSON object is yielded as a ValueError, so one bad line
+    can be reported without abandoning the rest of the file.
+
+    Args:
+        file: Binary file positioned at the start of the upload
+        fmt: 'csv' or 'ndjson'
+        required: CSV columns that must appear in the header
+
+    Raises:
+        ValueError: If a CSV upload has no header or lacks a required column
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        if reader.fieldnames is None:
+            raise ValueError('The CSV upload is empty')
+        missing = [column for column in required if column not in reader.fieldnames]
+        if missing:
+            raise ValueError(f"CSV header is missing: {', '.join(missing)}")
+        return reader
+    return _ndjson_records(text)
+
+
+def _ndjson_records(text):
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f'Invalid JSON: {str(e)}')
+            continue
+        yield record if isinstance(record, dict) else ValueError('Each line must be a JSON object')
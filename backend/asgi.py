@@ -0,0 +1,10 @@
+"""
+Run the Flask application under an ASGI server
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker -w 4
+"""
+from app.asgi import AsgiAdapter
+from run import app as flask_app
+
+app = AsgiAdapter(flask_app)
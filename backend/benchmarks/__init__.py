@@ -0,0 +1,9 @@
+"""
+Offline benchmark suite for the calculation engine and HTTP endpoints
+
+Run from the backend folder:
+
+    python -m benchmarks --output benchmark-results.json
+
+See benchmarks/runner.py for options.
+"""
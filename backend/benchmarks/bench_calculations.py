@@ -0,0 +1,123 @@
+"""
+Benchmarks for every function in app/calculations.py
+"""
+import numpy as np
+from app import calculations
+from benchmarks.registry import benchmark
+
+HORIZONS = (1, 10, 25, 45)
+BATCH_SIZES = (1, 100, 10000, 100000)
+PATH_COUNTS = (1000, 10000, 100000)
+# (rates, increments, inflation rates, retirement ages) per sensitivity grid
+GRID_SHAPES = ((5, 5, 2, 2), (20, 10, 5, 10), (25, 20, 5, 20))
+
+
+def _profile(years):
+    return {
+        'current_age': 60 - years,
+        'retirement_age': 60,
+        'basic_salary': 75000,
+        'employee_epf_rate': 10,
+        'annual_increment': 5.0,
+        'epf_interest_rate': 9.5,
+        'current_epf_balance': 500000
+    }
+
+
+@benchmark('calculations', 'monthly_contributions')
+def monthly_contributions(_):
+    return lambda: calculations.calculate_monthly_contributions(75000, 10)
+
+
+@benchmark('calculations', 'monthly_contributions_batch', params=[f'employees={n}' for n in BATCH_SIZES])
+def monthly_contributions_batch(param):
+    count = int(param.split('=')[1])
+    rng = np.random.default_rng(0)
+    salaries = np.round(rng.uniform(30000, 500000, count), 2)
+    rates = rng.choice([8, 10], count)
+    return lambda: calculations.calculate_monthly_contributions_batch(salaries, rates)
+
+
+@benchmark('calculations', 'retirement_savings', params=[f'years={y}' for y in HORIZONS])
+def retirement_savings(param):
+    profile = _profile(int(param.split('=')[1]))
+    return lambda: calculations.calculate_retirement_savings(**profile)
+
+
+@benchmark('calculations', 'resume_retirement_savings', params=['from_year=2', 'from_year=40'])
+def resume_retirement_savings(param):
+    profile = _profile(45)
+    breakdown = calculations.calculate_retirement_savings(**profile)['yearly_breakdown']
+    from_year = int(param.split('=')[1])
+    return lambda: calculations.resume_retirement_savings(
+        breakdown, from_year, profile['current_age'], profile['retirement_age'],
+        annual_increment=7.0, epf_interest_rate=10.0
+    )
+
+
+@benchmark('calculations', 'iter_yearly_breakdown', params=[f'years={y}' for y in HORIZONS])
+def iter_yearly_breakdown(param):
+    profile = _profile(int(param.split('=')[1]))
+    return lambda: list(calculations.iter_yearly_breakdown(**profile))
+
+
+@benchmark('calculations', 'retirement_savings_batch', params=[f'profiles={n}' for n in BATCH_SIZES])
+def retirement_savings_batch(param):
+    count = int(param.split('=')[1])
+    rng = np.random.default_rng(0)
+    current_ages = rng.integers(18, 59, count)
+    salaries = rng.uniform(30000, 300000, count)
+    return lambda: calculations.calculate_retirement_savings_batch(
+        current_ages, 60, salaries, 10, 5.0, 9.5, 0, 6.0
+    )
+
+
+@benchmark('calculations', 'simulate_retirement_savings', params=[f'paths={n}' for n in PATH_COUNTS])
+def simulate_retirement_savings(param):
+    paths = int(param.split('=')[1])
+    profile = _profile(32)
+    return lambda: calculations.simulate_retirement_savings(**profile, paths=paths, seed=1)
+
+
+@benchmark('calculations', 'purchasing_power', params=[f'years={y}' for y in HORIZONS])
+def purchasing_power(param):
+    years = int(param.split('=')[1])
+    return lambda: calculations.calculate_purchasing_power(25_000_000, years, 6.0)
+
+
+@benchmark('calculations', 'monthly_pension', params=['years=20', 'years=25'])
+def monthly_pension(param):
+    years = int(param.split('=')[1])
+    return lambda: calculations.calculate_monthly_pension(25_000_000, 9.5, years)
+
+
+@benchmark('calculations', 'required_savings', params=[f'years={y}' for y in HORIZONS])
+def required_savings(param):
+    years = int(param.split('=')[1])
+    return lambda: calculations.calculate_required_savings(50_000_000, 500000, 16500, 9.5, years)
+
+
+@benchmark('calculations', 'lump_sum_tax')
+def lump_sum_tax(_):
+    return lambda: calculations.calculate_lump_sum_tax(25_000_000)
+
+
+@benchmark('calculations', 'solve_retirement_goal', params=['solve=retirementAge', 'solve=basicSalary', 'solve=epfInterestRate'])
+def solve_retirement_goal(param):
+    solve_for = param.split('=')[1]
+    profile = _profile(32)
+    return lambda: calculations.solve_retirement_goal(50_000_000, solve_for, real_terms=True, **profile)
+
+
+@benchmark('calculations', 'sensitivity_grid', params=['x'.join(map(str, shape)) for shape in GRID_SHAPES])
+def sensitivity_grid(param):
+    rates, increments, inflation, ages = (int(n) for n in param.split('x'))
+    return lambda: calculations.calculate_sensitivity_grid(
+        current_age=28,
+        basic_salary=75000,
+        epf_interest_rates=np.linspace(6, 12, rates),
+        annual_increments=np.linspace(0, 10, increments),
+        inflation_rates=np.linspace(3, 9, inflation),
+        retirement_ages=np.arange(50, 50 + ages),
+        current_epf_balance=500000
+    )
@@ -0,0 +1,148 @@
+"""
+End-to-end route benchmarks through the Flask test client
+
+Firebase is never contacted: token verification is replaced with a local
+stub and the result cache is disabled so every request does the full work.
+"""
+import time
+from app import create_app
+from app.auth import set_token_verifier
+from app.config import TestingConfig
+from benchmarks.registry import benchmark
+
+HORIZONS = (1, 10, 25, 45)
+SCENARIO_COUNTS = (1, 10, 100, 1000, 10000)
+AUTH_HEADERS = {'Authorization': 'Bearer benchmark-user'}
+
+
+class BenchmarkConfig(TestingConfig):
+    DEBUG = False
+    CALCULATION_CACHE_ENABLED = False
+    TOKEN_CERT_REFRESH_INTERVAL = 0
+    RATE_LIMIT_ENABLED = False  # Every case comes from one client
+
+
+def _stub_verifier(token):
+    return {'uid': token, 'sub': token, 'email': f'{token}@example.com', 'exp': time.time() + 3600}
+
+
+_clients = {}
+
+
+def client(json_provider='auto'):
+    """Return a test client for a benchmark app (created once per JSON provider)"""
+    if json_provider not in _clients:
+        set_token_verifier(_stub_verifier)
+        config = type('ProviderBenchmarkConfig', (BenchmarkConfig,), {'JSON_PROVIDER': json_provider})
+        _clients[json_provider] = create_app(config).test_client()
+    return _clients[json_provider]
+
+
+def _request(method, url, json_provider='auto', **kwargs):
+    test_client = client(json_provider)
+
+    def call():
+        response = test_client.open(url, method=method, **kwargs)
+        assert response.status_code < 400, response.get_data(as_text=True)
+        return response
+
+    return call
+
+
+def _projection_body(years):
+    return {
+        'currentAge': 60 - years,
+        'retirementAge': 60,
+        'basicSalary': 75000,
+        'employeeEpfRate': 10,
+        'annualIncrement': 5,
+        'epfInterestRate': 9.5,
+        'currentEpfBalance': 500000,
+        'inflationRate': 6
+    }
+
+
+@benchmark('endpoints', 'health')
+def health(_):
+    return _request('GET', '/health')
+
+
+@benchmark('endpoints', 'contributions')
+def contributions(_):
+    return _request('POST', '/api/calculator/contributions', json={'basicSalary': 75000})
+
+
+@benchmark('endpoints', 'retirement_projection', params=[f'years={y}' for y in HORIZONS])
+def retirement_projection(param):
+    body = _projection_body(int(param.split('=')[1]))
+    return _request('POST', '/api/calculator/retirement-projection', json=body)
+
+
+@benchmark('endpoints', 'retirement_projection_rows', params=['years=45'])
+def retirement_projection_rows(param):
+    body = _projection_body(int(param.split('=')[1]))
+    return _request('POST', '/api/calculator/retirement-projection?layout=rows', json=body)
+
+
+@benchmark('endpoints', 'retirement_projection_csv', params=['years=45'])
+def retirement_projection_csv(param):
+    body = _projection_body(int(param.split('=')[1]))
+    call = _request('POST', '/api/calculator/retirement-projection', json=body,
+                    headers={'Accept': 'text/csv'})
+    return lambda: call().get_data()
+
+
+@benchmark('endpoints', 'payroll_bulk', params=['rows=10000'])
+def payroll_bulk(param):
+    count = int(param.split('=')[1])
+    body = 'employeeId,basicSalary,employeeEpfRate\n' + ''.join(
+        f'E{i},{40000 + i % 5000 * 37.5},{8 if i % 3 else 10}\n' for i in range(count)
+    )
+    call = _request('POST', '/api/calculator/contributions/bulk', data=body,
+                    content_type='text/csv')
+    return lambda: call().get_data()
+
+
+@benchmark('endpoints', 'scenarios_compare', params=[f'scenarios={n}' for n in SCENARIO_COUNTS])
+def scenarios_compare(param):
+    count = int(param.split('=')[1])
+    scenarios = [
+        dict(_projection_body(1 + i % 45), name=f'Scenario {i}', basicSalary=50000 + i)
+        for i in range(count)
+    ]
+    return _request('POST', '/api/calculator/scenarios/compare', json={'scenarios': scenarios})
+
+
+@benchmark('endpoints', 'json_provider_projection', params=['stdlib', 'orjson'])
+def json_provider_projection(provider):
+    return _request('POST', '/api/calculator/retirement-projection', json=_projection_body(45),
+                    json_provider=provider)
+
+
+@benchmark('endpoints', 'json_provider_compare', params=['stdlib', 'orjson'])
+def json_provider_compare(provider):
+    scenarios = [
+        dict(_projection_body(1 + i % 45), name=f'Scenario {i}', basicSalary=50000 + i)
+        for i in range(1000)
+    ]
+    return _request('POST', '/api/calculator/scenarios/compare', json={'scenarios': scenarios},
+                    json_provider=provider)
+
+
+@benchmark('endpoints', 'auth_me')
+def auth_me(_):
+    return _request('GET', '/api/auth/me', headers=AUTH_HEADERS)
+
+
+@benchmark('endpoints', 'save_calculation')
+def save_calculation(_):
+    body = {'calculationType': 'retirement_projection', 'inputs': _projection_body(32), 'results': {}}
+    return _request('POST', '/api/user/calculations', json=body, headers=AUTH_HEADERS)
+
+
+@benchmark('endpoints', 'get_calculations')
+def get_calculations(_):
+    call = _request('POST', '/api/user/calculations', json={'inputs': {}}, headers=AUTH_HEADERS)
+    for _ in range(100):
+        call()
+    return _request('GET', '/api/user/calculations', headers=AUTH_HEADERS)
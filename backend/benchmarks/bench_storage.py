@@ -0,0 +1,44 @@
+"""
+Storage backend benchmarks (in-memory and SQLite WAL)
+"""
+import itertools
+import os
+import tempfile
+from app.storage import MemoryStorage, SQLiteStorage
+from benchmarks.registry import benchmark
+
+BACKENDS = ('memory', 'sqlite')
+
+
+def _storage(backend):
+    if backend == 'memory':
+        return MemoryStorage()
+    directory = tempfile.mkdtemp(prefix='retireright-bench-')
+    return SQLiteStorage(os.path.join(directory, 'bench.db'))
+
+
+@benchmark('storage', 'add_calculation', params=[f'backend={b}' for b in BACKENDS])
+def add_calculation(param):
+    storage = _storage(param.split('=')[1])
+    results = {'finalBalance': 77076969.63, 'yearlyBreakdown': [{'year': y} for y in range(32)]}
+    return lambda: storage.add_calculation('bench-user', 'retirement_projection', {}, results)
+
+
+@benchmark('storage', 'list_calculations', params=[f'backend={b}' for b in BACKENDS])
+def list_calculations(param):
+    storage = _storage(param.split('=')[1])
+    for i in range(1000):
+        storage.add_calculation('bench-user', 'retirement_projection', {'i': i}, {})
+    return lambda: storage.list_calculations('bench-user', limit=50)
+
+
+@benchmark('storage', 'delete_calculation', params=[f'backend={b}' for b in BACKENDS])
+def delete_calculation(param):
+    storage = _storage(param.split('=')[1])
+    ids = itertools.count()
+
+    def call():
+        record = storage.add_calculation('bench-user', 'retirement_projection', {'i': next(ids)}, {})
+        storage.delete_calculation('bench-user', record['id'])
+
+    return call
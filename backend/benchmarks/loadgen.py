@@ -0,0 +1,183 @@
+"""
+Closed-loop HTTP load generator for comparing server modes
+
+Usage (from the backend folder, against a running benchmarks.stub_server):
+
+    python -m benchmarks.loadgen --url http://127.0.0.1:8000/api/user/profile
+                                 [--token load-user] [--concurrency 64]
+                                 [--requests 2000] [--method GET] [--json BODY]
+
+Each of `concurrency` clients sends its next request as soon as the previous
+one finishes. Throughput, latency percentiles and status counts are printed.
+Only the standard library is used, so nothing extra needs installing.
+
+With --abuse-json, `--abuse-concurrency` more clients flood --abuse-url
+(default: --url) with that body under their own --abuse-token for as long
+as the measured clients run, e.g. to check that rate limiting keeps the
+measured clients' p99 stable:
+
+    python -m benchmarks.loadgen --method POST --distinct-tokens --think-time 0.1
+        --url http://127.0.0.1:8000/api/calculator/retirement-projection
+        --json '{"currentAge": 30, "retirementAge": 60, "basicSalary": 100000}'
+        --abuse-url http://127.0.0.1:8000/api/calculator/scenarios/compare
+        --abuse-json @compare-5000.json
+
+A body starting with @ is read from that file, as with curl.
+"""
+from collections import Counter
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+
+async def _send(host, port, raw_request):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(raw_request)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()  # Connection: close, so the body ends at EOF
+        return int(status_line.split(b' ', 2)[1])
+    finally:
+        writer.close()
+
+
+def _build_request(url, method, token, body):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += f'?{parts.query}'
+    headers = [
+        f'{method} {path} HTTP/1.1',
+        f'Host: {parts.netloc}',
+        'Connection: close'
+    ]
+    if token:
+        headers.append(f'Authorization: Bearer {token}')
+    payload = body.encode('utf-8') if body else b''
+    if payload:
+        headers.append('Content-Type: application/json')
+    headers.append(f'Content-Length: {len(payload)}')
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + payload
+
+
+async def run_load(url, concurrency, total_requests, method='GET', token=None, body=None,
+                   until=None, think_time=0.0, distinct_tokens=False):
+    """
+    Drive `total_requests` requests through `concurrency` parallel clients
+
+    Args:
+        until: Optional asyncio.Event; if given, clients keep sending until
+            it is set instead of stopping after total_requests
+        think_time: Seconds each client waits between its requests
+        distinct_tokens: Give client i the token "<token>-<i>", so each is
+            a separate user to per-user limits
+
+    Returns:
+        dict with throughput, latency percentiles (ms) and status counts
+    """
+    parts = urlsplit(url)
+    latencies = []
+    statuses = Counter()
+    remaining = [total_requests]
+
+    def more():
+        return not until.is_set() if until is not None else remaining[0] > 0
+
+    async def client(index):
+        client_token = f'{token}-{index}' if token and distinct_tokens else token
+        raw_request = _build_request(url, method, client_token, body)
+        while more():
+            remaining[0] -= 1
+            start = time.perf_counter()
+            try:
+                status = await _send(parts.hostname, parts.port or 80, raw_request)
+            except OSError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if think_time:
+                await asyncio.sleep(think_time)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    if not latencies:
+        return {'requests': 0, 'concurrency': concurrency, 'statuses': {}}
+
+    def percentile(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(0.50),
+        'p90_ms': percentile(0.90),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(latencies[-1] * 1000, 2),
+        'statuses': {str(status): count for status, count in statuses.items()}
+    }
+
+
+def _body(value):
+    """Return a request body, reading it from a file if it starts with @"""
+    if value and value.startswith('@'):
+        with open(value[1:], encoding='utf-8') as f:
+            return f.read()
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--token', default='load-user', help='Bearer token ("" to send none)')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--json', dest='body', help='Request body')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='Seconds each client waits between requests')
+    parser.add_argument('--distinct-tokens', action='store_true',
+                        help='Send "<token>-<client>" so every client is its own user')
+    parser.add_argument('--abuse-url', help='URL flooded by the abusive clients (default: --url)')
+    parser.add_argument('--abuse-json', help='Request body of the abusive clients (enables them)')
+    parser.add_argument('--abuse-token', default='abusive-user')
+    parser.add_argument('--abuse-concurrency', type=int, default=16)
+    args = parser.parse_args(argv)
+
+    if not args.abuse_json:
+        result = asyncio.run(run_load(
+            args.url, args.concurrency, args.requests,
+            method=args.method.upper(), token=args.token or None, body=_body(args.body),
+            think_time=args.think_time, distinct_tokens=args.distinct_tokens
+        ))
+        print(json.dumps(result, indent=2))
+        return 0
+
+    async def mixed():
+        done = asyncio.Event()
+        abuse = asyncio.ensure_future(run_load(
+            args.abuse_url or args.url, args.abuse_concurrency, 0, method='POST',
+            token=args.abuse_token or None, body=_body(args.abuse_json), until=done
+        ))
+        measured = await run_load(
+            args.url, args.concurrency, args.requests,
+            method=args.method.upper(), token=args.token or None, body=_body(args.body),
+            think_time=args.think_time, distinct_tokens=args.distinct_tokens
+        )
+        done.set()
+        return {'measured': measured, 'abusive': await abuse}
+
+    print(json.dumps(asyncio.run(mixed()), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Benchmark registration and timing
+"""
+import statistics
+import time
+
+BENCHMARKS = []
+
+
+def benchmark(group, name, params=(None,)):
+    """
+    Register a benchmark case factory
+
+    The decorated function receives one parameter value and returns a
+    zero-argument callable to time (any setup happens in the factory, outside
+    the timed region).
+
+    Args:
+        group: Benchmark group, e.g. "calculations" or "endpoints"
+        name: Benchmark name within the group
+        params: Parameter values; one case is registered per value
+    """
+    def decorator(factory):
+        for param in params:
+            case_id = f'{group}.{name}' if param is None else f'{group}.{name}[{param}]'
+            BENCHMARKS.append((case_id, factory, param))
+        return factory
+    return decorator
+
+
+def time_case(func, min_time=0.2, repeat=5):
+    """
+    Time func and return per-call statistics in milliseconds
+
+    The call count per round is calibrated so each round lasts about
+    min_time / repeat seconds; the median of `repeat` rounds is reported.
+    """
+    func()  # Warm up (imports, caches, process pools)
+
+    loops = 1
+    round_time = min_time / repeat
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= round_time or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < round_time / 10 else 2
+
+    rounds = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        rounds.append((time.perf_counter() - start) / loops)
+
+    return {
+        'loops': loops,
+        'rounds': repeat,
+        'min_ms': round(min(rounds) * 1000, 6),
+        'median_ms': round(statistics.median(rounds) * 1000, 6),
+        'max_ms': round(max(rounds) * 1000, 6)
+    }
@@ -0,0 +1,103 @@
+"""
+Command-line runner for the benchmark suite
+
+Usage (from the backend folder):
+
+    python -m benchmarks [--filter REGEX] [--output results.json]
+                         [--baseline previous.json] [--tolerance 0.25]
+                         [--thresholds benchmarks/thresholds.json]
+                         [--min-time 0.2] [--repeat 5]
+
+Each case reports per-call min/median/max in milliseconds. The run fails
+(exit status 1) when a case's median exceeds its absolute limit in the
+thresholds file, or is more than `tolerance` slower than the same case in a
+baseline results file.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+from datetime import datetime
+
+from benchmarks.registry import BENCHMARKS, time_case
+from benchmarks import bench_calculations, bench_endpoints, bench_storage  # noqa: F401  (registers cases)
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(__file__), 'thresholds.json')
+
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_regressions(results, thresholds, baseline, tolerance):
+    """
+    Compare results against absolute thresholds and a baseline run
+
+    Returns:
+        list of human-readable failure messages
+    """
+    failures = []
+    baseline_cases = (baseline or {}).get('results', {})
+
+    for case_id, stats in results.items():
+        median = stats['median_ms']
+        limit = thresholds.get(case_id)
+        if limit is not None and median > limit:
+            failures.append(f'{case_id}: median {median:.4f}ms exceeds threshold {limit}ms')
+
+        previous = baseline_cases.get(case_id)
+        if previous and median > previous['median_ms'] * (1 + tolerance):
+            failures.append(
+                f"{case_id}: median {median:.4f}ms is more than {tolerance:.0%} slower "
+                f"than baseline {previous['median_ms']:.4f}ms"
+            )
+
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='RetireRight LK benchmark suite')
+    parser.add_argument('--filter', default=None, help='Only run cases whose id matches this regex')
+    parser.add_argument('--output', default=None, help='Write results JSON to this path')
+    parser.add_argument('--baseline', default=None, help='Previous results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown versus baseline (0.25 = 25%%)')
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS,
+                        help='JSON file mapping case id to maximum median ms')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds spent timing each case')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing rounds per case')
+    args = parser.parse_args(argv)
+
+    pattern = re.compile(args.filter) if args.filter else None
+    results = {}
+
+    for case_id, factory, param in BENCHMARKS:
+        if pattern and not pattern.search(case_id):
+            continue
+        stats = time_case(factory(param), min_time=args.min_time, repeat=args.repeat)
+        results[case_id] = stats
+        print(f"{case_id:<65} {stats['median_ms']:>12.4f} ms  (x{stats['loops']})")
+
+    report = {
+        'createdAt': datetime.utcnow().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}')
+
+    thresholds = _load_json(args.thresholds) if os.path.exists(args.thresholds) else {}
+    baseline = _load_json(args.baseline) if args.baseline else None
+    failures = check_regressions(results, thresholds, baseline, args.tolerance)
+
+    for failure in failures:
+        print(f'REGRESSION {failure}')
+
+    return 1 if failures else 0
@@ -0,0 +1,172 @@
+"""
+Cold-start time and per-worker memory of the API
+
+Usage (from the backend folder, Linux only):
+
+    python -m benchmarks.startup [--workers 4] [--runs 5] [--requests 50]
+
+Cold start runs `create_app` in fresh interpreters and reports the median
+time to import and build the app, the time to answer the first calculator
+request, and RSS after both.
+
+Worker memory imitates gunicorn's pre-fork model: with --preload the app is
+built once in the parent, which then forks `workers` children, without it
+every child builds its own. Each child serves `requests` calculator requests
+and reports RSS, PSS (shared pages split between the processes using them)
+and USS (pages only it holds). USS is what each extra worker really costs.
+"""
+from statistics import median
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROJECTION = {'currentAge': 30, 'basicSalary': 100000, 'retirementAge': 60}
+
+_COLD_START = """
+import json, time
+start = time.perf_counter()
+from benchmarks.startup import build_app, memory_kb
+app = build_app()
+ready = time.perf_counter()
+client = app.test_client()
+client.post('/api/calculator/retirement-projection', json=%r)
+first = time.perf_counter()
+print(json.dumps({'createApp': ready - start, 'firstRequest': first - ready,
+                  'rssKb': memory_kb()['rss'],
+                  'firebaseImported': 'firebase_admin' in __import__('sys').modules}))
+""" % (PROJECTION,)
+
+
+def build_app():
+    """Build the app as run.py does, with the benchmark's quiet config"""
+    from app import create_app
+    from benchmarks.bench_endpoints import BenchmarkConfig
+    return create_app(BenchmarkConfig)
+
+
+def memory_kb(pid='self'):
+    """Return RSS, PSS and USS (private clean + dirty) in KB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': values.get('Rss', 0),
+        'pss': values.get('Pss', 0),
+        'uss': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    }
+
+
+def cold_start(runs):
+    """Median createApp/first request time and RSS over fresh interpreters"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _COLD_START],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'createAppMs': round(median(s['createApp'] for s in samples) * 1000, 1),
+        'firstRequestMs': round(median(s['firstRequest'] for s in samples) * 1000, 1),
+        'rssMb': round(median(s['rssKb'] for s in samples) / 1024, 1),
+        'firebaseImported': samples[0]['firebaseImported']
+    }
+
+
+def _serve(app, requests, write_fd):
+    """Child body: build the app if needed, serve requests, report memory"""
+    if app is None:
+        app = build_app()
+    client = app.test_client()
+    for _ in range(requests):
+        client.post('/api/calculator/retirement-projection', json=PROJECTION)
+    os.write(write_fd, json.dumps(memory_kb()).encode('utf-8') + b'\n')
+
+
+def worker_memory(workers, requests, preload):
+    """
+    Fork `workers` children as gunicorn would and collect their memory
+
+    The children stay alive until all have reported, so shared pages are
+    split between them in PSS exactly as under a running server.
+    """
+    app = None
+    if preload:
+        app = build_app()
+        gc.freeze()  # As gunicorn.conf.py does before forking
+
+    read_fd, write_fd = os.pipe()
+    release_read, release_write = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            os.close(release_write)
+            try:
+                _serve(app, requests, write_fd)
+                os.read(release_read, 1)  # Wait until every worker reported
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    os.close(write_fd)
+    os.close(release_read)
+
+    reports = []
+    with os.fdopen(read_fd) as pipe:
+        while len(reports) < workers:
+            reports.append(json.loads(pipe.readline()))
+    # Re-read while all children are alive so PSS reflects the sharing
+    reports = [memory_kb(pid) for pid in pids]
+    os.write(release_write, b'x' * workers)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    os.close(release_write)
+
+    return {
+        'workers': workers,
+        'preload': preload,
+        'rssMb': round(median(r['rss'] for r in reports) / 1024, 1),
+        'pssMb': round(median(r['pss'] for r in reports) / 1024, 1),
+        'ussMb': round(median(r['uss'] for r in reports) / 1024, 1)
+    }
+
+
+def _worker_memory_subprocess(workers, requests, preload):
+    # Fresh interpreter so one mode's imports do not leak into the other
+    code = (
+        'import json; from benchmarks.startup import worker_memory; '
+        f'print(json.dumps(worker_memory({workers}, {requests}, {preload})))'
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts to take the median of')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per worker')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    print('cold start:', json.dumps(cold_start(args.runs)))
+    for preload in (False, True):
+        print('workers:   ', json.dumps(_worker_memory_subprocess(args.workers, args.requests, preload)))
+    print(f'({time.perf_counter() - started:.1f} s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+App instances with a stubbed, slow Firebase for local load tests
+
+    gunicorn benchmarks.stub_server:app -w 2 -b 127.0.0.1:8000
+    uvicorn benchmarks.stub_server:asgi_app --workers 2 --port 8000
+
+Every token verification sleeps STUB_FIREBASE_LATENCY seconds (default
+0.05) and the token cache is off, so each authenticated request pays the
+delay - the worst case of a cold certificate cache. Tokens are taken as the
+uid, so no Google credentials are needed.
+"""
+from app import create_app
+from app.asgi import AsgiAdapter
+from app.auth import set_token_verifier
+from app.config import Config
+from benchmarks.bench_endpoints import BenchmarkConfig
+import os
+import time
+
+STUB_FIREBASE_LATENCY = float(os.environ.get('STUB_FIREBASE_LATENCY', 0.05))
+
+
+class StubServerConfig(BenchmarkConfig):
+    TOKEN_CACHE_ENABLED = False
+    # Rate limits stay on (unless RATE_LIMIT_ENABLED=false) so load tests
+    # exercise them; each token is a separate client
+    RATE_LIMIT_ENABLED = Config.RATE_LIMIT_ENABLED
+
+
+def _slow_verifier(token):
+    time.sleep(STUB_FIREBASE_LATENCY)
+    return {'uid': token, 'sub': token, 'email': f'{token}@example.com', 'exp': time.time() + 3600}
+
+
+set_token_verifier(_slow_verifier)
+app = create_app(StubServerConfig)
+asgi_app = AsgiAdapter(app)
@@ -0,0 +1,22 @@
+"""
+Gunicorn settings (read automatically when gunicorn starts in this folder)
+
+The app is preloaded: the master imports it and runs create_app once, and
+workers are forked from it, sharing those pages copy-on-write instead of
+each importing NumPy and the app again. This is safe because create_app
+starts no threads and opens no connections; Firebase, SQLite connections,
+the certificate refresher and thread/process pools are all created lazily
+inside each worker. Set GUNICORN_PRELOAD=false to load the app per worker.
+"""
+import gc
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def pre_fork(server, worker):
+    # Move everything the master has allocated out of the collector's view,
+    # so garbage collections in workers do not write to (and so copy) the
+    # shared pages
+    if preload_app:
+        gc.freeze()
@@ -0,0 +1,70 @@
+"""
+Shared fixtures: an app with every data file under tmp_path and a stub
+token verifier, so no test touches the source tree or reaches Google
+"""
+import time
+import pytest
+from app import create_app
+from app.auth import set_token_verifier
+from app.config import TestingConfig
+
+TOKEN_LIFETIME = 3600  # Seconds
+
+
+def stub_verifier(token):
+    """Accept any token except "invalid"; the token is the uid"""
+    if token == 'invalid':
+        raise ValueError('Token rejected by stub verifier')
+    return {'uid': token, 'email': f'{token}@example.com', 'exp': time.time() + TOKEN_LIFETIME}
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Return a factory creating an app with config overrides"""
+    def factory(**overrides):
+        settings = {
+            'SQLITE_PATH': str(tmp_path / 'app.db'),
+            'JOBS_DB_PATH': str(tmp_path / 'jobs.db'),
+            'BATCH_RESULTS_DIR': str(tmp_path / 'batch-runs'),
+            'SINGLE_FLIGHT_SHARED_PATH': str(tmp_path / 'singleflight.db'),
+            'PROFILE_DIR': str(tmp_path / 'profiles'),
+            'TOKEN_CERT_REFRESH_INTERVAL': 0
+        }
+        settings.update(overrides)
+        config = type('TestConfig', (TestingConfig,), settings)
+        set_token_verifier(stub_verifier)
+        return create_app(config)
+
+    yield factory
+    set_token_verifier(None)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers():
+    """Return the Authorization header accepted by the stub verifier for uid"""
+    return lambda uid='user-a': {'Authorization': f'Bearer {uid}'}
+
+
+@pytest.fixture
+def wait_for_job():
+    """Return a function polling a job until it leaves queued/running"""
+    def wait(client, headers, job_id, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = client.get(f'/api/jobs/{job_id}', headers=headers).get_json()['data']
+            if job['status'] not in ('queued', 'running'):
+                return job
+            time.sleep(0.01)
+        pytest.fail(f'Job {job_id} did not finish')
+
+    return wait
@@ -0,0 +1,131 @@
+"""
+Closed-form compound-interest factors against month-by-month loops
+"""
+import random
+import numpy as np
+import pytest
+from app.annuity import accumulation_factor, growth_factor, growth_factor_array, pmt_factor
+from app.calculations import (
+    _projected_final_balance,
+    calculate_monthly_pension,
+    calculate_required_savings
+)
+
+RATES = [0, 0.25, 1, 6, 8, 9.5, 12.75, 15, 30]
+MONTHS = [1, 2, 12, 60, 120, 240, 300, 540]
+RELATIVE_TOLERANCE = 1e-11
+
+
+def loop_growth(annual_rate, months):
+    value = 1.0
+    for _ in range(months):
+        value *= 1 + annual_rate / 100 / 12
+    return value
+
+
+def loop_accumulation(annual_rate, months):
+    """Deposit 1 at the end of each month"""
+    balance = 0.0
+    for _ in range(months):
+        balance = balance * (1 + annual_rate / 100 / 12) + 1
+    return balance
+
+
+def loop_payout_remainder(annual_rate, months, payment):
+    """Balance left after paying `payment` at the end of each month from 1"""
+    balance = 1.0
+    for _ in range(months):
+        balance = balance * (1 + annual_rate / 100 / 12) - payment
+    return balance
+
+
+def cents(value):
+    return int(np.rint(value * 100))
+
+
+@pytest.mark.parametrize('rate', RATES)
+@pytest.mark.parametrize('months', MONTHS)
+def test_factors_match_monthly_loops(rate, months):
+    assert growth_factor(rate, months) == pytest.approx(loop_growth(rate, months), rel=RELATIVE_TOLERANCE)
+    assert accumulation_factor(rate, months) == pytest.approx(
+        loop_accumulation(rate, months), rel=RELATIVE_TOLERANCE
+    )
+    # The loop's own rounding error grows with the balance it compounds
+    remainder = loop_payout_remainder(rate, months, pmt_factor(rate, months))
+    assert remainder == pytest.approx(0, abs=1e-12 * months * loop_growth(rate, months))
+
+
+@pytest.mark.parametrize('months', MONTHS)
+def test_array_growth_matches_scalar(months):
+    rates = np.array(RATES, dtype=float)
+    expected = [growth_factor(rate, months) for rate in RATES]
+
+    np.testing.assert_allclose(growth_factor_array(rates, months), expected, rtol=1e-15)
+    assert growth_factor_array(9.5, months) == pytest.approx(growth_factor(9.5, months), rel=1e-15)
+
+
+def test_zero_rate_factors_are_exact():
+    assert accumulation_factor(0, 240) == 240.0
+    assert pmt_factor(0, 240) == 1 / 240
+    assert growth_factor(0, 240) == 1.0
+
+
+def random_profiles(count, seed):
+    rng = random.Random(seed)
+    return [
+        (
+            rng.randint(18, 59),  # Current age
+            rng.randint(1, 40),  # Years to retirement
+            round(rng.uniform(20000, 500000), 2),
+            rng.choice([8, 10]),
+            rng.choice([0, 2.5, 5, rng.uniform(0, 12)]),
+            rng.choice([0, 8, 9.5, rng.uniform(0, 15)]),
+            round(rng.choice([0, rng.uniform(0, 10000000)]), 2)
+        )
+        for _ in range(count)
+    ]
+
+
+def loop_final_balance(years, salary, epf_rate, increment, interest, balance):
+    monthly_rate = interest / 100 / 12
+    for _ in range(years):
+        contribution = salary * (epf_rate / 100) + salary * 0.12
+        for _ in range(12):
+            balance = balance * (1 + monthly_rate) + contribution
+        salary *= 1 + increment / 100
+    return balance
+
+
+def test_final_balance_over_ages_rates_and_increments():
+    # The closed form may land a value that sits within a hair of half a
+    # cent on the other side of it: one cent, and rarely
+    differences = []
+    for _, years, salary, epf_rate, increment, interest, balance in random_profiles(3000, seed=7):
+        expected = loop_final_balance(years, salary, epf_rate, increment, interest, balance)
+        actual = _projected_final_balance(years, salary, epf_rate, increment, interest, balance)
+        assert actual == pytest.approx(expected, rel=RELATIVE_TOLERANCE)
+        differences.append(abs(cents(actual) - cents(expected)))
+
+    assert max(differences) <= 1
+    assert sum(differences) <= len(differences) // 100
+
+
+def test_monthly_pension_exhausts_the_balance():
+    for balance in (250000.0, 1234567.89, 50000000.0):
+        for rate in (0, 6, 9.5, 15):
+            for years in (10, 20, 25):
+                pension = calculate_monthly_pension(balance, rate, years)['monthly_pension']
+                remainder = loop_payout_remainder(rate, years * 12, pension / balance) * balance
+                # Rounding the payment to cents leaves at most a cent a month
+                # (compounded) over or under
+                assert abs(remainder) <= 0.005 * loop_accumulation(rate, years * 12) + 1e-6
+
+
+def test_required_savings_matches_monthly_loop():
+    for years in (1, 10, 30):
+        for rate in (0, 9.5):
+            result = calculate_required_savings(10_000_000, 500000, 20000, rate, years)
+            balance = 500000.0
+            for _ in range(years * 12):
+                balance = balance * (1 + rate / 100 / 12) + 20000
+            assert abs(cents(result['projected_balance']) - cents(balance)) <= 1
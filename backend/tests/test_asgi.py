@@ -0,0 +1,82 @@
+"""
+ASGI adapter: token verification ahead of the WSGI app
+"""
+import asyncio
+import json
+import pytest
+from app.asgi import AsgiAdapter
+from app.auth import set_token_verifier
+from app.executors import shutdown_executors
+
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+
+
+@pytest.fixture
+def adapter(app):
+    adapter = AsgiAdapter(app)
+    yield adapter
+    shutdown_executors(wait=True)
+
+
+@pytest.fixture
+def verified():
+    """Record the tokens the verifier is asked to check"""
+    tokens = []
+
+    def verifier(token):
+        tokens.append(token)
+        if token.startswith('forged'):
+            raise ValueError('bad signature')
+        return {'uid': token, 'exp': 4102444800}
+
+    set_token_verifier(verifier)
+    return tokens
+
+
+def call(adapter, method, path, token=None, body=None):
+    """Send one HTTP request through the adapter; return (status, body bytes)"""
+    payload = json.dumps(body).encode() if body is not None else b''
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+    if token:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': headers,
+             'client': ('10.0.0.1', 1234), 'server': ('testserver', 80)}
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(adapter(scope, receive, send))
+    status = sent[0]['status']
+    return status, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def test_calculator_requests_are_not_verified(adapter, verified):
+    for index in range(3):
+        status, _ = call(adapter, 'POST', '/api/calculator/retirement-projection',
+                         token=f'forged-{index}', body=PROJECTION)
+        assert status == 200
+
+    assert verified == []
+
+
+def test_authenticated_routes_are_verified_once(adapter, verified):
+    status, body = call(adapter, 'GET', '/api/jobs', token='user-a')
+
+    assert status == 200
+    assert json.loads(body)['data'] == []
+    assert verified == ['user-a']  # require_auth reused the adapter's outcome
+
+    status, _ = call(adapter, 'GET', '/api/jobs', token='forged-1')
+    assert status == 401
+
+
+def test_unknown_routes_are_not_verified(adapter, verified):
+    status, _ = call(adapter, 'GET', '/api/nowhere', token='forged-1')
+
+    assert status == 404
+    assert verified == []
@@ -0,0 +1,151 @@
+"""
+Verified token cache and the certificate refresher
+"""
+import types
+import pytest
+from app import auth
+from app.auth import (
+    forget_token, set_token_verifier, token_cache, verify_firebase_token
+)
+
+
+class Clock:
+    """Stands in for both time.time and time.monotonic"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('app.auth.time.time', clock)
+    monkeypatch.setattr('app.cache.time.monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def verifier(app, clock):
+    """Stub verifier counting its calls; tokens in `revoked` are rejected"""
+    def verify(token):
+        verify.calls.append(token)
+        if token in verify.revoked:
+            raise ValueError('Token has been revoked')
+        return {'uid': token.split('.')[0], 'exp': clock.now + verify.lifetime}
+
+    verify.calls = []
+    verify.revoked = set()
+    verify.lifetime = 600
+    set_token_verifier(verify)
+    return verify
+
+
+def test_verified_tokens_are_served_from_cache(verifier):
+    first = verify_firebase_token('alice.1')
+    second = verify_firebase_token('alice.1')
+
+    assert first == second
+    assert verifier.calls == ['alice.1']
+    assert token_cache.stats()['hits'] >= 1
+
+
+def test_cache_keys_are_hashed(verifier):
+    verify_firebase_token('alice.secret')
+    assert 'alice.secret' not in token_cache._data
+
+
+def test_entries_expire_at_the_tokens_exp(verifier, clock):
+    verify_firebase_token('alice.1')
+
+    clock.now += 599
+    verify_firebase_token('alice.1')
+    assert len(verifier.calls) == 1
+
+    clock.now += 2
+    verify_firebase_token('alice.1')
+    assert len(verifier.calls) == 2
+
+
+def test_expired_tokens_are_not_cached(verifier):
+    verifier.lifetime = -1
+    verify_firebase_token('alice.1')
+    verify_firebase_token('alice.1')
+
+    assert len(verifier.calls) == 2
+
+
+def test_rejected_tokens_are_not_cached(verifier):
+    verifier.revoked.add('alice.1')
+    for _ in range(2):
+        with pytest.raises(Exception, match='Invalid authentication token'):
+            verify_firebase_token('alice.1')
+
+    assert len(verifier.calls) == 2
+
+
+def test_revoked_token_is_rejected_once_forgotten(verifier):
+    verify_firebase_token('alice.1')
+    verifier.revoked.add('alice.1')
+
+    assert verify_firebase_token('alice.1')['uid'] == 'alice'  # Cached until exp
+    forget_token('alice.1')
+    with pytest.raises(Exception):
+        verify_firebase_token('alice.1')
+
+
+def test_logout_forgets_the_token(client, verifier):
+    headers = {'Authorization': 'Bearer alice.1'}
+    assert client.get('/api/auth/me', headers=headers).status_code == 200
+    verifier.revoked.add('alice.1')
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert client.get('/api/auth/me', headers=headers).status_code == 401
+
+
+def test_least_recently_used_tokens_are_evicted(make_app, clock):
+    make_app(TOKEN_CACHE_SIZE=2)
+    calls = []
+    set_token_verifier(lambda token: calls.append(token) or {'uid': token, 'exp': clock.now + 600})
+
+    for token in ('a', 'b', 'a', 'c', 'a', 'b'):
+        verify_firebase_token(token)
+
+    assert calls == ['a', 'b', 'c', 'b']
+    assert token_cache.stats()['evictions'] == 2
+
+
+def test_cache_can_be_disabled(make_app, clock):
+    make_app(TOKEN_CACHE_ENABLED=False)
+    calls = []
+    set_token_verifier(lambda token: calls.append(token) or {'uid': token, 'exp': clock.now + 600})
+
+    verify_firebase_token('a')
+    verify_firebase_token('a')
+    assert calls == ['a', 'a']
+
+
+def test_certificate_refresh_uses_the_sdk_session(monkeypatch):
+    from firebase_admin import auth as firebase_auth
+    fetched = []
+    client = types.SimpleNamespace(_token_verifier=types.SimpleNamespace(request=fetched.append))
+    monkeypatch.setattr('app.auth.get_firebase_app', lambda: None)
+    monkeypatch.setattr(firebase_auth, '_get_client', lambda app: client, raising=False)
+
+    auth._refresh_certificates()
+    assert fetched == [
+        'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+    ]
+
+
+def test_refresher_stops_when_the_sdk_changed(monkeypatch):
+    from firebase_admin import auth as firebase_auth
+    monkeypatch.setattr('app.auth.get_firebase_app', lambda: None)
+    monkeypatch.setattr(firebase_auth, '_get_client', lambda app: object(), raising=False)
+    monkeypatch.setattr('app.auth.time.sleep', lambda seconds: pytest.fail('Refresher kept running'))
+
+    with pytest.raises(auth.CertificateRefreshUnsupported):
+        auth._refresh_certificates()
+    auth._certificate_refresh_loop(600)  # Returns instead of looping
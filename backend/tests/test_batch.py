@@ -0,0 +1,86 @@
+"""
+Batch projections over profile columns
+"""
+import pytest
+from app.calculations import calculate_retirement_savings_batch
+
+PROFILES = {
+    'currentAge': [25, 30, 35],
+    'retirementAge': [60, 55, 65],
+    'basicSalary': [50000, 75000, 100000],
+    'annualIncrement': 4,
+    'currentEpfBalance': [0, 100000, 500000]
+}
+BATCH_URL = '/api/calculator/retirement-projection/batch'
+
+
+def test_batch_matches_single_projections(client):
+    batch = client.post(BATCH_URL, json={'profiles': PROFILES}).get_json()['data']
+
+    for index in range(len(PROFILES['currentAge'])):
+        single = client.post('/api/calculator/retirement-projection', json={
+            'currentAge': PROFILES['currentAge'][index],
+            'retirementAge': PROFILES['retirementAge'][index],
+            'basicSalary': PROFILES['basicSalary'][index],
+            'annualIncrement': 4,
+            'currentEpfBalance': PROFILES['currentEpfBalance'][index]
+        }).get_json()['data']
+        assert batch['finalBalance'][index] == pytest.approx(single['finalBalance'], abs=0.011)
+
+
+def test_batch_profile_limit(make_app):
+    client = make_app(BATCH_MAX_PROFILES=2).test_client()
+
+    response = client.post(BATCH_URL, json={'profiles': PROFILES})
+    assert response.status_code == 413
+    response = client.post(BATCH_URL, json={'profiles': dict(PROFILES, basicSalary=[1, 2])})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('body', [
+    {'profiles': PROFILES},
+    {'profiles': PROFILES, 'store': True}
+])
+@pytest.mark.parametrize('field, ages', [
+    ('currentAge', [25, 30.5, 35]),
+    ('retirementAge', 60.25)
+])
+def test_fractional_ages_are_rejected(client, body, field, ages):
+    body = dict(body, profiles=dict(PROFILES, **{field: ages}))
+
+    response = client.post(BATCH_URL, json=body)
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Ages must be whole numbers'
+
+
+def test_streamed_batch_rejects_fractional_ages(client):
+    response = client.post(BATCH_URL, json={'profiles': dict(PROFILES, currentAge=29.9)},
+                           headers={'Accept': 'application/x-ndjson'})
+
+    assert response.status_code == 400
+
+
+def test_horizon_is_capped(make_app):
+    client = make_app(MAX_PROJECTION_YEARS=40, RATE_LIMIT_ENABLED=False).test_client()
+
+    assert client.post(BATCH_URL, json={'profiles': PROFILES}).status_code == 200
+    for store in (False, True):
+        response = client.post(BATCH_URL, json={
+            'profiles': dict(PROFILES, retirementAge=[60, 55, 76]),
+            'store': store
+        })
+        assert response.status_code == 400
+        assert '40 years' in response.get_json()['message']
+
+
+def test_whole_float_ages_are_accepted(client):
+    response = client.post(BATCH_URL, json={'profiles': dict(PROFILES, currentAge=[25.0, 30.0, 35.0])})
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['yearsToRetirement'] == [35, 25, 30]
+
+
+def test_engine_rejects_fractional_ages():
+    with pytest.raises(ValueError, match='whole numbers'):
+        calculate_retirement_savings_batch([30.5], [60], [100000])
@@ -0,0 +1,93 @@
+"""
+Batch runs stored as memory-mapped .npy files
+"""
+import io
+import os
+import numpy as np
+import pytest
+
+PROFILES = {
+    'currentAge': [25, 30, 35, 40, 45],
+    'retirementAge': [60, 55, 65, 60, 50],
+    'basicSalary': [50000, 75000, 100000, 150000, 200000],
+    'annualIncrement': 4,
+    'currentEpfBalance': [0, 100000, 500000, 1000000, 2000000]
+}
+BATCH_URL = '/api/calculator/retirement-projection/batch'
+
+
+@pytest.fixture
+def stored_run(client):
+    response = client.post(BATCH_URL, json={'profiles': PROFILES, 'store': True})
+    assert response.status_code == 201
+    return response.get_json()['data']
+
+
+def test_stored_run_manifest(client, app, stored_run):
+    assert stored_run['profiles'] == 5
+    assert stored_run['years'] == 35
+    assert stored_run['columns']['yearlyBalances']['shape'] == [5, 35]
+    run_dir = os.path.join(app.config['BATCH_RESULTS_DIR'], stored_run['runId'])
+    assert os.path.exists(os.path.join(run_dir, 'yearly_balances.npy'))
+
+    response = client.get(f"/api/calculator/batch-runs/{stored_run['runId']}")
+    assert response.get_json()['data'] == stored_run
+
+
+def test_stored_run_pages_match_direct_batch(client, stored_run):
+    direct = client.post(BATCH_URL, json={
+        'profiles': PROFILES, 'includeYearlyBalances': True
+    }).get_json()['data']
+    url = f"/api/calculator/batch-runs/{stored_run['runId']}/results"
+
+    first = client.get(url, query_string={'limit': 3}).get_json()['data']
+    second = client.get(url, query_string={'offset': first['nextOffset']}).get_json()['data']
+
+    assert first['nextOffset'] == 3
+    assert second['nextOffset'] is None
+    for name in ('finalBalance', 'realValue', 'yearsToRetirement'):
+        assert first['columns'][name] + second['columns'][name] == direct[name]
+    yearly = first['columns']['yearlyBalances'] + second['columns']['yearlyBalances']
+    assert yearly == direct['yearlyBalances']
+
+
+def test_stored_run_year_range_and_columns(client, stored_run):
+    url = f"/api/calculator/batch-runs/{stored_run['runId']}/results"
+    page = client.get(url, query_string={
+        'fromYear': 6, 'toYear': 10, 'columns': 'yearlyBalances'
+    }).get_json()['data']
+
+    assert list(page['columns']) == ['yearlyBalances']
+    # The profile retiring after five years has nothing in this range
+    assert [len(row) for row in page['columns']['yearlyBalances']] == [5, 5, 5, 5, 0]
+
+
+def test_stored_run_column_download(client, stored_run):
+    url = f"/api/calculator/batch-runs/{stored_run['runId']}/results"
+    response = client.get(url, query_string={
+        'format': 'npy', 'columns': 'yearlyBalances', 'offset': 1, 'limit': 2, 'toYear': 20
+    })
+    array = np.load(io.BytesIO(response.get_data()))
+    page = client.get(url, query_string={
+        'columns': 'yearlyBalances', 'offset': 1, 'limit': 2, 'toYear': 20
+    }).get_json()['data']
+
+    assert response.status_code == 200
+    assert array.shape == (2, 20)
+    for row, expected in zip(np.round(array, 2).tolist(), page['columns']['yearlyBalances']):
+        assert row[:len(expected)] == expected
+
+
+@pytest.mark.parametrize('query', [
+    {'offset': 6}, {'limit': 0}, {'fromYear': 0}, {'toYear': 36},
+    {'columns': 'secrets'}, {'format': 'npy'}, {'offset': 'x'}
+])
+def test_stored_run_rejects_bad_parameters(client, stored_run, query):
+    url = f"/api/calculator/batch-runs/{stored_run['runId']}/results"
+    assert client.get(url, query_string=query).status_code == 400
+
+
+@pytest.mark.parametrize('run_id', ['0' * 32, '..', 'not-a-run'])
+def test_unknown_runs_are_not_found(client, run_id):
+    assert client.get(f'/api/calculator/batch-runs/{run_id}').status_code == 404
+    assert client.get(f'/api/calculator/batch-runs/{run_id}/results').status_code == 404
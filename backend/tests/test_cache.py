@@ -0,0 +1,72 @@
+"""
+Result cache for calculator routes and the memoize decorator
+"""
+import pytest
+from app.cache import LRUCache, get_cache, memoize
+
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_cache_entries_expire(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('app.cache.time.monotonic', lambda: clock[0])
+    cache = LRUCache(maxsize=10, ttl=60)
+    cache.set('short', 1, ttl=5)
+    cache.set('default', 2)
+
+    clock[0] += 10
+    assert cache.get('short') is None
+    assert cache.get('default') == 2
+    clock[0] += 60
+    assert cache.get('default') is None
+    assert cache.stats()['expirations'] == 2
+
+
+def test_memoize_shares_entries_across_call_styles(app):
+    calls = []
+
+    @memoize
+    def projection(years, rate=9.5):
+        calls.append((years, rate))
+        return years * rate
+
+    assert projection(10) == projection(years=10, rate=9.5) == projection(10, 9.50001)
+    assert calls == [(10, 9.5)]
+
+
+def test_repeated_projection_is_served_from_cache(client):
+    first = client.post('/api/calculator/retirement-projection', json=PROJECTION)
+    misses = get_cache('calculations').stats()['misses']
+    second = client.post('/api/calculator/retirement-projection', json=PROJECTION)
+
+    assert first.status_code == second.status_code == 200
+    assert first.get_json() == second.get_json()
+    stats = client.get('/health').get_json()['cache']
+    assert stats['misses'] == misses
+    assert stats['hits'] >= 1
+
+
+def test_cache_can_be_disabled(make_app):
+    client = make_app(CALCULATION_CACHE_ENABLED=False).test_client()
+    client.post('/api/calculator/retirement-projection', json=PROJECTION)
+    client.post('/api/calculator/retirement-projection', json=PROJECTION)
+
+    stats = get_cache('calculations').stats()
+    assert stats['hits'] == stats['misses'] == stats['size'] == 0
+
+
+def test_unknown_cache_backend_is_rejected(make_app):
+    with pytest.raises(ValueError):
+        make_app(CACHE_BACKEND='memcached')
@@ -0,0 +1,68 @@
+"""
+Columnar yearly breakdown tables and their JSON layouts
+"""
+import json
+import numpy as np
+import pytest
+from app.columnar import ColumnarTable, is_columnar
+
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+
+
+def test_table_rounds_only_on_output():
+    table = ColumnarTable({'year': [1, 2], 'balance': [1.005, 2.3333]}, decimals={'balance': 2})
+
+    assert table['balance'].tolist() == [1.005, 2.3333]
+    assert table.to_rows() == [{'year': 1, 'balance': 1.0}, {'year': 2, 'balance': 2.33}]
+    assert table.to_json() == {'columns': ['year', 'balance'],
+                               'data': {'year': [1, 2], 'balance': [1.0, 2.33]}}
+
+
+def test_columns_are_read_only():
+    table = ColumnarTable({'year': np.arange(3)})
+    with pytest.raises(ValueError):
+        table['year'][0] = 5
+
+
+def test_columns_must_match():
+    with pytest.raises(ValueError):
+        ColumnarTable({'a': [1, 2], 'b': [1]})
+    with pytest.raises(ValueError):
+        ColumnarTable({'a': [[1, 2]]})
+
+
+def test_head_and_concat():
+    table = ColumnarTable({'year': [1, 2, 3], 'age': [31, 32, 33]})
+    joined = ColumnarTable.concat([table.head(1), ColumnarTable({'year': [2], 'age': [40]})])
+
+    assert joined.to_rows() == [{'year': 1, 'age': 31}, {'year': 2, 'age': 40}]
+
+
+def test_from_json_accepts_both_layouts():
+    table = ColumnarTable({'year': [1, 2], 'age': [31, 32]})
+
+    assert ColumnarTable.from_json(table.to_json()).to_rows() == table.to_rows()
+    assert ColumnarTable.from_json(table.to_rows()).to_rows() == table.to_rows()
+    with pytest.raises(ValueError):
+        ColumnarTable.from_json({'rows': []})
+
+
+def test_projection_layouts_carry_the_same_figures(client):
+    columnar = client.post('/api/calculator/retirement-projection',
+                           json=PROJECTION).get_json()['data']['yearlyBreakdown']
+    rows = client.post('/api/calculator/retirement-projection?layout=rows',
+                       json=PROJECTION).get_json()['data']['yearlyBreakdown']
+
+    assert is_columnar(columnar)
+    assert len(rows) == 30
+    assert ColumnarTable.from_json(columnar).to_rows() == rows
+
+
+def test_streamed_breakdown_matches_rows(client):
+    rows = client.post('/api/calculator/retirement-projection?layout=rows',
+                       json=PROJECTION).get_json()['data']['yearlyBreakdown']
+    response = client.post('/api/calculator/retirement-projection', json=PROJECTION,
+                           headers={'Accept': 'application/x-ndjson'})
+    streamed = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert streamed == rows
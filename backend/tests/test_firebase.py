@@ -0,0 +1,53 @@
+"""
+Lazy Firebase initialization and its log messages
+"""
+import logging
+import pytest
+import firebase_admin
+from app import firebase
+
+
+def _no_app():
+    raise ValueError('The default Firebase app does not exist')
+
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(firebase, '_state', {'pid': None, 'app': None})
+    monkeypatch.setattr(firebase_admin, 'get_app', _no_app)
+
+
+def test_success_is_logged_after_initialization(fresh_state, monkeypatch, caplog):
+    events = []
+    monkeypatch.setattr(firebase, '_credentials', lambda: ('cred', 'file'))
+    monkeypatch.setattr(firebase_admin, 'initialize_app',
+                        lambda cred: events.append('initialized') or 'app')
+
+    with caplog.at_level(logging.INFO, logger='app.firebase'):
+        assert firebase.get_firebase_app() == 'app'
+    assert events == ['initialized']
+    assert 'Firebase initialized from file' in caplog.text
+
+
+def test_failed_initialization_is_not_reported_as_success(fresh_state, monkeypatch, caplog):
+    def fail(cred):
+        raise ValueError('bad service account')
+
+    monkeypatch.setattr(firebase, '_credentials', lambda: ('cred', 'environment variable'))
+    monkeypatch.setattr(firebase_admin, 'initialize_app', fail)
+
+    with caplog.at_level(logging.INFO, logger='app.firebase'):
+        with pytest.raises(ValueError):
+            firebase.get_firebase_app()
+    assert 'initialized' not in caplog.text
+    assert firebase._state['pid'] is None  # Retried on the next call
+
+
+def test_missing_service_account_warns(fresh_state, monkeypatch, caplog):
+    monkeypatch.delenv('FIREBASE_SERVICE_ACCOUNT_BASE64', raising=False)
+    monkeypatch.setattr(firebase.os.path, 'exists', lambda path: False)
+
+    with caplog.at_level(logging.INFO, logger='app.firebase'):
+        assert firebase.get_firebase_app() is None
+    assert 'not configured' in caplog.text
+    assert 'initialized' not in caplog.text
@@ -0,0 +1,121 @@
+"""
+Goal seek over the closed-form projection
+"""
+import pytest
+from app.calculations import _projected_final_balance, solve_retirement_goal
+
+
+def real_balance(current_age, age, salary, inflation, increment=5, interest=9.5):
+    years = age - current_age
+    return _projected_final_balance(years, salary, 10, increment, interest, 0) / (1 + inflation / 100) ** years
+
+
+def first_age_reaching(target, current_age, salary, inflation, real_terms, **rates):
+    for age in range(current_age + 1, 76):
+        balance = (real_balance(current_age, age, salary, inflation, **rates) if real_terms
+                   else real_balance(current_age, age, salary, 0, **rates))
+        if balance >= target:
+            return age
+    return None
+
+
+@pytest.mark.parametrize('inflation', [0, 6, 12, 25])
+@pytest.mark.parametrize('fraction', [0.1, 0.5, 0.9, 0.99, 1.0])
+@pytest.mark.parametrize('real_terms', [False, True])
+def test_retirement_age_is_the_first_age_reaching_the_target(inflation, fraction, real_terms):
+    peak = max(real_balance(28, age, 75000, inflation if real_terms else 0) for age in range(29, 76))
+    target = peak * fraction
+
+    result = solve_retirement_goal(target, 'retirementAge', 28, 60, 75000,
+                                   inflation_rate=inflation, real_terms=real_terms)
+
+    assert result['achievable']
+    assert result['value'] == first_age_reaching(target, 28, 75000, inflation, real_terms)
+    assert result['projected_value'] >= round(target, 2)
+
+
+def test_real_balance_past_its_peak_is_still_found():
+    # At 25% inflation the real value peaks within a few years and then falls
+    balances = {age: real_balance(28, age, 75000, 25) for age in range(29, 76)}
+    peak_age = max(balances, key=balances.get)
+    assert balances[75] < balances[peak_age]
+
+    result = solve_retirement_goal(balances[peak_age] * 0.99, 'retirementAge', 28, 60, 75000,
+                                   inflation_rate=25, real_terms=True)
+    assert result['achievable']
+    assert result['value'] <= peak_age
+
+
+def test_unreachable_real_target_reports_the_closest_age():
+    balances = {age: real_balance(28, age, 75000, 25) for age in range(29, 76)}
+    peak_age = max(balances, key=balances.get)
+
+    result = solve_retirement_goal(balances[peak_age] * 1.01, 'retirementAge', 28, 60, 75000,
+                                   inflation_rate=25, real_terms=True)
+    assert not result['achievable']
+    assert result['value'] == peak_age
+
+
+@pytest.mark.parametrize('interest, increment, balance, inflation', [
+    (-5, 10, 50_000_000, 0),    # Falls, then contributions outgrow the losses
+    (-5, 10, 50_000_000, 8),
+    (-2, -3, 0, 0),             # Rises to a peak, then shrinks
+    (9.5, -20, 1_000_000, 6),
+    (-8, 0, 10_000_000, 0)      # Falls throughout
+])
+@pytest.mark.parametrize('fraction', [0.3, 0.8, 1.0, 1.2])
+def test_search_matches_a_scan_of_every_age(interest, increment, balance, inflation, fraction):
+    def balance_at(age):
+        years = age - 28
+        return (_projected_final_balance(years, 75000, 10, increment, interest, balance)
+                / (1 + inflation / 100) ** years)
+
+    balances = {age: balance_at(age) for age in range(29, 76)}
+    target = max(balances.values()) * fraction
+
+    result = solve_retirement_goal(target, 'retirementAge', 28, 60, 75000,
+                                   annual_increment=increment, epf_interest_rate=interest,
+                                   current_epf_balance=balance, inflation_rate=inflation,
+                                   real_terms=inflation > 0)
+
+    reaching = [age for age, value in balances.items() if value >= target]
+    if reaching:
+        assert result['achievable']
+        assert result['value'] == reaching[0]
+    else:
+        assert not result['achievable']
+        assert balances[result['value']] == max(balances.values())
+    assert result['evaluations'] < len(balances) // 2
+
+
+def test_nominal_target_beyond_the_bound():
+    result = solve_retirement_goal(1e15, 'retirementAge', 28, 60, 75000)
+
+    assert not result['achievable']
+    assert result['value'] == 75
+
+
+@pytest.mark.parametrize('solve_for', ['basicSalary', 'epfInterestRate', 'annualIncrement'])
+def test_solved_value_reproduces_the_target(solve_for):
+    target = 50_000_000
+    result = solve_retirement_goal(target, solve_for, 30, 60, 100000)
+
+    assert result['achievable']
+    assert result['projected_value'] == pytest.approx(target, rel=1e-6)
+
+
+@pytest.mark.parametrize('changes', [
+    {'employeeEpfRate': -12},
+    {'currentEpfBalance': -1},
+    {'solveFor': 'epfInterestRate', 'basicSalary': -75000},
+    {'annualIncrement': -100},
+    {'targetAmount': 1e300}
+])
+def test_unsolvable_salary_goals_are_rejected(client, changes):
+    body = dict({'targetAmount': 50_000_000, 'solveFor': 'basicSalary', 'currentAge': 30,
+                 'retirementAge': 60, 'basicSalary': 75000}, **changes)
+
+    response = client.post('/api/calculator/goal-seek', json=body)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid goal'
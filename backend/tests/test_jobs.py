@@ -0,0 +1,137 @@
+"""
+Background jobs (/api/jobs)
+"""
+import pytest
+
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+COMPARE = {'scenarios': [dict(PROJECTION, name=f'Retire at {age}', retirementAge=age)
+                         for age in (55, 60, 65)]}
+
+
+def test_job_result_matches_direct_call(client, auth_headers, wait_for_job):
+    headers = auth_headers()
+    response = client.post('/api/jobs', json={'type': 'compare', 'payload': COMPARE},
+                           headers=headers)
+
+    assert response.status_code == 202
+    job = response.get_json()['data']
+    assert response.headers['Location'] == job['statusUrl']
+
+    job = wait_for_job(client, headers, job['id'])
+    assert job['status'] == 'succeeded'
+    assert job['progress'] == 1
+
+    result = client.get(job['resultUrl'], headers=headers)
+    direct = client.post('/api/calculator/scenarios/compare', json=COMPARE)
+    assert result.status_code == 200
+    assert result.get_json() == direct.get_json()
+
+
+def test_failed_calculation_keeps_its_response(client, auth_headers, wait_for_job):
+    headers = auth_headers()
+    response = client.post('/api/jobs', json={
+        'type': 'retirementProjection',
+        'payload': {'currentAge': 30}
+    }, headers=headers)
+    job = wait_for_job(client, headers, response.get_json()['data']['id'])
+
+    assert job['status'] == 'failed'
+    assert job['error'] == 'retirementAge is required'
+    assert client.get(job['resultUrl'], headers=headers).status_code == 400
+
+
+@pytest.mark.parametrize('body', [
+    {'type': 'mining', 'payload': {}},
+    {'type': 'compare'},
+    {'type': 'compare', 'payload': [1, 2]}
+])
+def test_invalid_submissions_are_rejected(client, auth_headers, body):
+    assert client.post('/api/jobs', json=body, headers=auth_headers()).status_code == 400
+
+
+def test_jobs_require_authentication(client, auth_headers):
+    assert client.post('/api/jobs', json={'type': 'compare', 'payload': COMPARE}).status_code == 401
+    assert client.get('/api/jobs', headers=auth_headers('invalid')).status_code == 401
+
+
+def test_per_user_limit_and_queue_limit(make_app, auth_headers):
+    # No worker threads, so submitted jobs stay queued
+    client = make_app(JOBS_WORKERS=0, JOBS_MAX_PER_USER=2, JOBS_QUEUE_SIZE=3).test_client()
+    body = {'type': 'compare', 'payload': COMPARE}
+
+    statuses = [client.post('/api/jobs', json=body, headers=auth_headers()).status_code
+                for _ in range(3)]
+    assert statuses == [202, 202, 429]
+
+    assert client.post('/api/jobs', json=body, headers=auth_headers('user-b')).status_code == 202
+    response = client.post('/api/jobs', json=body, headers=auth_headers('user-c'))
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+
+
+def test_queued_job_can_be_cancelled(make_app, auth_headers):
+    client = make_app(JOBS_WORKERS=0).test_client()
+    headers = auth_headers()
+    job = client.post('/api/jobs', json={'type': 'compare', 'payload': COMPARE},
+                      headers=headers).get_json()['data']
+
+    assert client.get(f"/api/jobs/{job['id']}/result", headers=headers).status_code == 409
+    assert client.delete(f"/api/jobs/{job['id']}", headers=headers).status_code == 200
+    job = client.get(f"/api/jobs/{job['id']}", headers=headers).get_json()['data']
+    assert job['status'] == 'cancelled'
+    assert 'resultUrl' not in job
+
+
+def test_jobs_are_private_to_their_owner(client, auth_headers):
+    job = client.post('/api/jobs', json={'type': 'compare', 'payload': COMPARE},
+                      headers=auth_headers('user-a')).get_json()['data']
+    other = auth_headers('user-b')
+
+    assert client.get(f"/api/jobs/{job['id']}", headers=other).status_code == 404
+    assert client.delete(f"/api/jobs/{job['id']}", headers=other).status_code == 404
+    assert client.get('/api/jobs', headers=other).get_json()['data'] == []
+
+
+def test_finished_job_can_be_deleted(client, auth_headers, wait_for_job):
+    headers = auth_headers()
+    job = client.post('/api/jobs', json={'type': 'compare', 'payload': COMPARE},
+                      headers=headers).get_json()['data']
+    wait_for_job(client, headers, job['id'])
+
+    assert client.delete(f"/api/jobs/{job['id']}", headers=headers).status_code == 200
+    assert client.get(f"/api/jobs/{job['id']}", headers=headers).status_code == 404
+
+
+def test_jobs_are_not_rate_limited(make_app, auth_headers, wait_for_job):
+    client = make_app(RATE_LIMIT_BURST=1, RATE_LIMIT_REQUESTS_PER_SECOND=0.1,
+                      JOBS_MAX_PER_USER=5).test_client()
+    headers = auth_headers()
+    client.post('/api/calculator/retirement-projection', json=PROJECTION, headers=headers)
+
+    job = client.post('/api/jobs', json={'type': 'retirementProjection', 'payload': PROJECTION},
+                      headers=headers).get_json()['data']
+    assert wait_for_job(client, headers, job['id'])['status'] == 'succeeded'
+
+
+def test_job_database_is_created_on_first_use(make_app, auth_headers, tmp_path):
+    path = tmp_path / 'lazy' / 'jobs.db'
+    client = make_app(JOBS_DB_PATH=str(path), JOBS_WORKERS=0).test_client()
+    assert not path.exists()
+
+    assert client.get('/api/jobs', headers=auth_headers()).status_code == 200
+    assert path.exists()
+
+
+def test_jobs_above_the_cost_ceiling_are_refused(make_app, auth_headers):
+    client = make_app(JOBS_MAX_COST=60, JOBS_WORKERS=0).test_client()
+    headers = auth_headers()
+
+    response = client.post('/api/jobs', json={'type': 'compare', 'payload': COMPARE},
+                           headers=headers)
+    assert response.status_code == 413
+    assert response.get_json()['error'] == 'Job too expensive'
+    assert client.get('/api/jobs', headers=headers).get_json()['data'] == []
+
+    response = client.post('/api/jobs', json={'type': 'retirementProjection', 'payload': PROJECTION},
+                           headers=headers)
+    assert response.status_code == 202
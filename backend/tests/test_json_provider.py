@@ -0,0 +1,79 @@
+"""
+JSON providers with NumPy and ColumnarTable support
+"""
+import numpy as np
+import pytest
+from app import json_provider
+from app.columnar import ColumnarTable
+
+PROVIDERS = [
+    'stdlib',
+    pytest.param('orjson', marks=pytest.mark.skipif(json_provider.orjson is None,
+                                                     reason='orjson is not installed'))
+]
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+
+
+@pytest.mark.parametrize('provider', PROVIDERS)
+def test_numpy_values_are_written_as_json(make_app, provider):
+    app = make_app(JSON_PROVIDER=provider)
+    payload = {
+        'array': np.arange(3),
+        'strided': np.arange(6).reshape(2, 3)[:, ::2],
+        'float': np.float64(1.5),
+        'int': np.int64(2),
+        'flag': np.bool_(True)
+    }
+
+    assert app.json.loads(app.json.dumps(payload)) == {
+        'array': [0, 1, 2],
+        'strided': [[0, 2], [3, 5]],
+        'float': 1.5,
+        'int': 2,
+        'flag': True
+    }
+
+
+@pytest.mark.parametrize('provider', PROVIDERS)
+def test_tables_are_rounded_on_output(make_app, provider):
+    app = make_app(JSON_PROVIDER=provider)
+    table = ColumnarTable({'year': np.array([1, 2]), 'balance': np.array([1.234, 5.678])},
+                          decimals={'balance': 2})
+
+    with app.app_context():
+        response = app.json.response({'table': table})
+
+    assert response.mimetype == 'application/json'
+    assert app.json.loads(response.get_data()) == {'table': {
+        'columns': ['year', 'balance'],
+        'data': {'year': [1, 2], 'balance': [1.23, 5.68]}
+    }}
+
+
+@pytest.mark.skipif(json_provider.orjson is None, reason='orjson is not installed')
+def test_providers_return_the_same_responses(make_app):
+    responses = []
+    for provider in ('stdlib', 'orjson'):
+        client = make_app(JSON_PROVIDER=provider).test_client()
+        response = client.post('/api/calculator/retirement-projection', json=PROJECTION)
+        assert response.status_code == 200
+        responses.append(response.get_json())
+
+    assert responses[0] == responses[1]
+
+
+def test_auto_prefers_orjson(make_app, monkeypatch):
+    expected = 'orjson' if json_provider.orjson is not None else 'stdlib'
+    assert type(make_app(JSON_PROVIDER='auto').json) is json_provider.PROVIDERS[expected]
+
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert type(make_app(JSON_PROVIDER='auto').json) is json_provider.StdlibJSONProvider
+
+
+def test_unusable_providers_are_rejected(make_app, monkeypatch):
+    with pytest.raises(ValueError, match='Unknown JSON provider'):
+        make_app(JSON_PROVIDER='ujson')
+
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    with pytest.raises(ValueError, match='not installed'):
+        make_app(JSON_PROVIDER='orjson')
@@ -0,0 +1,54 @@
+"""
+Latency metrics and the opt-in request profiler
+"""
+import os
+
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+
+
+def profiled_post(client, secret):
+    headers = {} if secret is None else {'X-Profile': secret}
+    return client.post('/api/calculator/retirement-projection', json=PROJECTION, headers=headers)
+
+
+def test_profile_header_needs_the_secret(make_app):
+    app = make_app(PROFILING_ENABLED=True, PROFILE_SECRET='s3cret', RATE_LIMIT_ENABLED=False)
+    client = app.test_client()
+
+    for secret in (None, '1', 's3cre', 's3cret-and-more'):
+        response = profiled_post(client, secret)
+        assert response.status_code == 200
+        assert 'X-Profile-File' not in response.headers
+    assert not os.path.exists(app.config['PROFILE_DIR'])
+
+    response = profiled_post(client, 's3cret')
+    assert os.listdir(app.config['PROFILE_DIR']) == [response.headers['X-Profile-File']]
+
+
+def test_profile_header_is_ignored_without_a_secret(make_app):
+    app = make_app(PROFILING_ENABLED=True, PROFILE_SECRET='')
+    response = profiled_post(app.test_client(), '')
+
+    assert 'X-Profile-File' not in response.headers
+
+
+def test_only_the_newest_profiles_are_kept(make_app):
+    app = make_app(PROFILING_ENABLED=True, PROFILE_ALL_REQUESTS=True, PROFILE_MAX_FILES=3,
+                   RATE_LIMIT_ENABLED=False)
+    client = app.test_client()
+
+    names = [profiled_post(client, None).headers['X-Profile-File'] for _ in range(5)]
+
+    assert sorted(os.listdir(app.config['PROFILE_DIR'])) == names[-3:]
+
+
+def test_metrics_endpoint(make_app):
+    client = make_app(METRICS_ENABLED=True).test_client()
+    client.post('/api/calculator/retirement-projection', json=PROJECTION)
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'endpoint="/api/calculator/retirement-projection"' in body
+
+
+def test_metrics_endpoint_is_off_by_default(client):
+    assert client.get('/metrics').status_code == 404
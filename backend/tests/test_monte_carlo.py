@@ -0,0 +1,92 @@
+"""
+Monte Carlo projections with uncertain rates
+"""
+import pytest
+from app.calculations import calculate_retirement_savings, simulate_retirement_savings
+
+PROFILE = {'current_age': 30, 'retirement_age': 60, 'basic_salary': 100000,
+           'current_epf_balance': 500000}
+BODY = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000, 'paths': 2000, 'seed': 7}
+URL = '/api/calculator/monte-carlo'
+
+
+def test_same_seed_reproduces_the_result():
+    first = simulate_retirement_savings(**PROFILE, paths=3000, seed=42, chunk_size=1000)
+    second = simulate_retirement_savings(**PROFILE, paths=3000, seed=42, chunk_size=1000)
+    other = simulate_retirement_savings(**PROFILE, paths=3000, seed=43, chunk_size=1000)
+
+    assert first == second
+    assert other['final_balance'] != first['final_balance']
+
+
+def test_percentiles_are_ordered():
+    result = simulate_retirement_savings(**PROFILE, paths=5000, seed=1)
+
+    for bands in (result['final_balance'], result['real_value']):
+        assert bands['p5'] < bands['p50'] < bands['p95']
+        assert bands['p5'] < bands['mean'] < bands['p95']
+    assert result['real_value']['p50'] < result['final_balance']['p50']
+
+
+def test_fixed_rates_reproduce_the_deterministic_projection():
+    fixed = {'type': 'fixed'}
+    result = simulate_retirement_savings(
+        **PROFILE, paths=10, seed=0, inflation_rate=6,
+        epf_interest_distribution=fixed, increment_distribution=fixed, inflation_distribution=fixed
+    )
+    expected = calculate_retirement_savings(**PROFILE)['final_balance']
+
+    for key in ('p5', 'p50', 'p95', 'mean'):
+        assert result['final_balance'][key] == pytest.approx(expected, abs=0.02)
+
+
+def test_progress_is_reported_per_chunk():
+    calls = []
+    simulate_retirement_savings(**PROFILE, paths=2500, seed=0, chunk_size=1000,
+                                progress=lambda done, total: calls.append((done, total)))
+
+    assert calls == [(1000, 2500), (2000, 2500), (2500, 2500)]
+
+
+def test_route_matches_the_engine(client):
+    response = client.post(URL, json=BODY)
+    engine = simulate_retirement_savings(30, 60, 100000, paths=2000, seed=7,
+                                         chunk_size=client.application.config['MONTE_CARLO_CHUNK_SIZE'])
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['finalBalance'] == engine['final_balance']
+    assert data['realValue'] == engine['real_value']
+    assert data['yearsToRetirement'] == 30
+
+
+@pytest.mark.parametrize('changes', [
+    {'paths': 'abc'},
+    {'paths': 10.5},
+    {'paths': 0},
+    {'paths': 10 ** 9},
+    {'seed': 'abc'},
+    {'seed': -1},
+    {'retirementAge': 60.5},
+    {'retirementAge': 25},
+    {'retirementAge': 5000},
+    {'distributions': [1, 2]},
+    {'distributions': {'epfInterestRate': 'normal'}},
+    {'distributions': {'epfInterestRate': {'type': 'lognormal'}}},
+    {'distributions': {'annualIncrement': {'type': 'uniform', 'low': 3}}}
+])
+def test_invalid_input_is_rejected(make_app, changes):
+    client = make_app(RATE_LIMIT_ENABLED=False).test_client()
+
+    response = client.post(URL, json=dict(BODY, **changes))
+
+    assert response.status_code == 400
+
+
+def test_horizon_cap_is_configurable(make_app):
+    client = make_app(MAX_PROJECTION_YEARS=20, RATE_LIMIT_ENABLED=False).test_client()
+
+    response = client.post(URL, json=BODY)
+
+    assert response.status_code == 400
+    assert '20 years' in response.get_json()['message']
@@ -0,0 +1,76 @@
+"""
+Process-pool execution of large scenario comparisons
+"""
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from app import parallel
+import app.routes.calculator as calculator_routes
+
+COMPARE_URL = '/api/calculator/scenarios/compare'
+SCENARIOS = [
+    {'name': f'Retire at {age}', 'currentAge': 30, 'retirementAge': age, 'basicSalary': 100000}
+    for age in range(50, 62)
+] + [{'name': 'Missing salary', 'currentAge': 30, 'retirementAge': 60}, 'not a scenario']
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    yield
+    parallel._reset_pool()
+
+
+def test_map_sharded_keeps_input_order():
+    items = list(range(-25, 25))
+    seen = []
+
+    results = parallel.map_sharded(abs, items, max_workers=2,
+                                   progress=lambda done, total: seen.append((done, total)))
+
+    assert results == [abs(item) for item in items]
+    assert seen[-1] == (len(items), len(items))
+    assert [done for done, _ in seen] == sorted(done for done, _ in seen)
+
+
+def test_broken_pool_falls_back_to_serial(monkeypatch):
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool('worker died')
+
+        def shutdown(self, wait=True):
+            pass
+
+    monkeypatch.setattr(parallel, '_pool', BrokenPool())
+    monkeypatch.setattr(parallel, '_pool_workers', 2)
+
+    assert parallel.map_sharded(abs, [-1, -2, 3], max_workers=2) == [1, 2, 3]
+    assert parallel._pool is None
+
+
+def test_parallel_comparison_matches_serial(make_app):
+    serial = make_app(SCENARIO_MAX_WORKERS=1, RATE_LIMIT_ENABLED=False).test_client()
+    expected = serial.post(COMPARE_URL, json={'scenarios': SCENARIOS}).get_json()
+
+    pooled = make_app(SCENARIO_MAX_WORKERS=2, SCENARIO_PARALLEL_THRESHOLD=2,
+                      RATE_LIMIT_ENABLED=False).test_client()
+    response = pooled.post(COMPARE_URL, json={'scenarios': SCENARIOS})
+
+    assert response.status_code == 200
+    assert parallel._pool is not None
+    assert response.get_json() == expected
+    names = [item['name'] for item in expected['data']['scenarios']]
+    assert names == [item['name'] for item in SCENARIOS[:-1]] + ['Scenario 14']
+    assert 'error' in expected['data']['scenarios'][-2]
+
+
+def test_small_comparisons_stay_in_process(make_app, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError('process pool used below the threshold')
+
+    monkeypatch.setattr(calculator_routes, 'map_sharded', no_pool)
+    client = make_app(SCENARIO_MAX_WORKERS=4, SCENARIO_PARALLEL_THRESHOLD=len(SCENARIOS) + 1,
+                      RATE_LIMIT_ENABLED=False).test_client()
+
+    response = client.post(COMPARE_URL, json={'scenarios': SCENARIOS})
+
+    assert response.status_code == 200
+    assert len(response.get_json()['data']['scenarios']) == len(SCENARIOS)
@@ -0,0 +1,93 @@
+"""
+Bulk payroll contributions (/contributions/bulk)
+"""
+import csv
+import io
+import json
+import pytest
+from app.calculations import calculate_monthly_contributions
+
+URL = '/api/calculator/contributions/bulk'
+PAYROLL = (
+    'employeeId,basicSalary,employeeEpfRate\n'
+    'E001,75000,10\n'
+    'E002,120000.50,8\n'
+    'E003,abc,10\n'
+    'E004,50000,\n'
+)
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_rows_match_single_calculations(client):
+    response = client.post(URL, data=PAYROLL, content_type='text/csv')
+
+    assert response.status_code == 200
+    rows = ndjson(response)
+    assert [row['row'] for row in rows] == [1, 2, 3, 4, 'total']
+    for row, (salary, rate) in zip([rows[0], rows[1], rows[3]], [(75000, 10), (120000.5, 8), (50000, 10)]):
+        single = calculate_monthly_contributions(salary, rate)
+        assert row['employeeEpf'] == single['employee_epf']
+        assert row['totalMonthly'] == single['total_monthly']
+    assert rows[0]['employeeId'] == 'E001'
+    assert 'basicSalary' in rows[2]['error']
+
+
+def test_totals_row_sums_the_valid_rows(client):
+    rows = ndjson(client.post(URL, data=PAYROLL, content_type='text/csv'))
+    totals = rows[-1]
+
+    assert totals['employees'] == 3
+    assert totals['rejected'] == 1
+    valid = [row for row in rows[:-1] if 'error' not in row]
+    for field in ('basicSalary', 'employeeEpf', 'employerEpf', 'employerEtf', 'totalMonthly'):
+        assert totals[field] == pytest.approx(sum(row[field] for row in valid), abs=1e-9)
+
+
+def test_csv_export_keeps_the_totals_counts(client):
+    response = client.post(URL, data=PAYROLL, content_type='text/csv',
+                           headers={'Accept': 'text/csv'})
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[-1]['row'] == 'total'
+    assert rows[-1]['employees'] == '3'
+    assert rows[-1]['rejected'] == '1'
+
+
+def test_ndjson_and_multipart_uploads(client):
+    body = '\n'.join(json.dumps(record) for record in [
+        {'employeeId': 'E001', 'basicSalary': 75000},
+        {'employeeId': 'E002', 'basicSalary': 90000, 'employeeEpfRate': 8}
+    ])
+    from_ndjson = ndjson(client.post(URL, data=body, content_type='application/x-ndjson'))
+    from_file = ndjson(client.post(URL, data={
+        'file': (io.BytesIO(PAYROLL.encode()), 'payroll.csv')
+    }, content_type='multipart/form-data'))
+
+    assert from_ndjson[-1]['employees'] == 2
+    assert from_file[-1]['employees'] == 3
+
+
+def test_bad_uploads_are_rejected(client):
+    assert client.post(URL, json={'basicSalary': 75000}).status_code == 415
+    response = client.post(URL, data='employeeId,salary\nE001,75000\n', content_type='text/csv')
+    assert response.status_code == 400
+
+
+def test_uploads_are_costed_by_size(make_app):
+    client = make_app(ADMISSION_MAX_REQUEST_COST=1000).test_client()
+    small = 'basicSalary\n' + '75000\n' * 100
+    large = 'basicSalary\n' + '75000\n' * 10000
+
+    assert client.post(URL, data=small, content_type='text/csv').status_code == 200
+    assert client.post(URL, data=large, content_type='text/csv').status_code == 413
+
+
+def test_uploads_without_a_length_are_refused(client):
+    response = client.post(URL, input_stream=io.BytesIO(PAYROLL.encode()), content_type='text/csv',
+                           headers={'Transfer-Encoding': 'chunked'})
+
+    assert response.status_code == 400
+    assert 'Content-Length' in response.get_json()['message']
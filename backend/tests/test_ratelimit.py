@@ -0,0 +1,204 @@
+"""
+Per-client rate limiting and cost-based admission
+"""
+import pytest
+from app.auth import set_token_verifier, verify_firebase_token
+from app.ratelimit import AdmissionController, TokenBuckets, estimate_cost, get_admission_controller
+
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+
+
+def make_controller(**overrides):
+    settings = dict(request_rate=1, request_burst=2, cost_rate=10, cost_burst=100)
+    settings.update(overrides)
+    return AdmissionController(
+        TokenBuckets(**settings),
+        max_request_cost=1000,
+        cheap_cost=10,
+        max_inflight_cost=100
+    )
+
+
+def test_request_bucket_refills_over_time():
+    buckets = TokenBuckets(request_rate=1, request_burst=2, cost_rate=10, cost_burst=100)
+
+    assert buckets.take('a', 1, now=0) == 0
+    assert buckets.take('a', 1, now=0) == 0
+    assert buckets.take('a', 1, now=0) == 1.0
+    assert buckets.take('b', 1, now=0) == 0  # Clients are independent
+    assert buckets.take('a', 1, now=1) == 0
+
+
+def test_cost_bucket_limits_expensive_requests():
+    buckets = TokenBuckets(request_rate=100, request_burst=100, cost_rate=10, cost_burst=100)
+
+    assert buckets.take('a', 80, now=0) == 0
+    assert buckets.take('a', 80, now=0) == 6.0
+    assert buckets.take('a', 500, now=10) == 0  # Above the burst: needs a full bucket
+
+
+def test_refused_request_takes_nothing():
+    buckets = TokenBuckets(request_rate=1, request_burst=1, cost_rate=10, cost_burst=100)
+
+    assert buckets.take('a', 200, now=0) == 0
+    assert buckets.take('a', 50, now=0.5) > 0
+    assert buckets.request_wait('a', now=1) == 0
+
+
+def test_least_recently_seen_clients_are_forgotten():
+    buckets = TokenBuckets(request_rate=1, request_burst=1, cost_rate=10, cost_burst=100, max_clients=2)
+    for key in ('a', 'b', 'c'):
+        buckets.take(key, 1, now=0)
+
+    assert len(buckets) == 2
+    assert buckets.take('a', 1, now=0) == 0
+
+
+def test_admission_outcomes():
+    controller = make_controller()
+
+    assert controller.admit('a', 5000) == (413, 0)
+    assert controller.admit('a', 60) == (None, 0)
+    assert controller.admit('b', 60) == (503, 1)  # Would exceed the in-flight cap
+    assert controller.admit('b', 5) == (None, 0)  # Cheap requests are never shed
+    controller.release(60)
+    controller.release(5)
+    assert controller.admit('c', 60) == (None, 0)
+
+    stats = controller.stats()
+    assert stats['tooExpensive'] == 1
+    assert stats['shed'] == 1
+    assert stats['admitted'] == 3
+    assert stats['inFlightCost'] == 60
+
+
+def test_precheck_refuses_clients_out_of_requests():
+    controller = make_controller(request_burst=1)
+    controller.admit('a', 1)
+
+    assert controller.precheck('a') == 1
+    assert controller.precheck('b') == 0
+
+
+def test_route_returns_429_with_retry_after(make_app):
+    client = make_app(RATE_LIMIT_BURST=2, RATE_LIMIT_REQUESTS_PER_SECOND=0.1).test_client()
+    statuses = [
+        client.post('/api/calculator/retirement-projection', json=PROJECTION).status_code
+        for _ in range(3)
+    ]
+    response = client.post('/api/calculator/retirement-projection', json=PROJECTION)
+
+    assert statuses == [200, 200, 429]
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert get_admission_controller().stats()['inFlightCost'] == 0
+
+
+def test_clients_are_limited_separately(make_app, auth_headers):
+    client = make_app(RATE_LIMIT_BURST=1, RATE_LIMIT_REQUESTS_PER_SECOND=0.1).test_client()
+
+    for uid in ('user-a', 'user-b'):
+        verify_firebase_token(uid)  # As on signing in; only verified tokens name a client
+        response = client.post('/api/calculator/retirement-projection', json=PROJECTION,
+                               headers=auth_headers(uid))
+        assert response.status_code == 200
+    response = client.post('/api/calculator/retirement-projection', json=PROJECTION,
+                           headers=auth_headers('user-a'))
+    assert response.status_code == 429
+
+
+def test_unverified_tokens_are_limited_by_address(make_app, auth_headers):
+    client = make_app(RATE_LIMIT_BURST=1, RATE_LIMIT_REQUESTS_PER_SECOND=0.1).test_client()
+    calls = []
+
+    def verifier(token):
+        calls.append(token)
+        raise ValueError('bad signature')
+
+    set_token_verifier(verifier)
+    statuses = [
+        client.post('/api/calculator/retirement-projection', json=PROJECTION,
+                    headers=auth_headers(f'forged-{i}')).status_code
+        for i in range(3)
+    ]
+
+    assert statuses == [200, 429, 429]  # One address, however many tokens
+    assert calls == []
+
+
+def test_batch_cost_counts_every_column(make_app):
+    client = make_app(ADMISSION_MAX_REQUEST_COST=1000).test_client()
+    count = 1000
+    profiles = {
+        'currentAge': 30,
+        'retirementAge': [60],
+        'basicSalary': [100000] * count,
+        'inflationRate': [6] * count
+    }
+
+    response = client.post('/api/calculator/retirement-projection/batch',
+                           json={'profiles': profiles})
+
+    assert response.status_code == 413
+
+
+def test_route_refuses_requests_above_the_cost_ceiling(make_app):
+    client = make_app(ADMISSION_MAX_REQUEST_COST=1000).test_client()
+    scenarios = [dict(PROJECTION, name=f'S{i}') for i in range(100)]
+
+    response = client.post('/api/calculator/scenarios/compare', json={'scenarios': scenarios})
+
+    assert response.status_code == 413
+    assert '/api/jobs' in response.get_json()['message']
+
+
+def test_preflight_requests_are_not_limited(make_app):
+    client = make_app(RATE_LIMIT_BURST=1, RATE_LIMIT_REQUESTS_PER_SECOND=0.1).test_client()
+    for _ in range(3):
+        response = client.options('/api/calculator/retirement-projection')
+        assert response.status_code == 200
+
+
+def test_disabled_limiter_admits_everything(make_app):
+    client = make_app(RATE_LIMIT_ENABLED=False, RATE_LIMIT_BURST=1).test_client()
+    for _ in range(3):
+        response = client.post('/api/calculator/retirement-projection', json=PROJECTION)
+        assert response.status_code == 200
+    assert client.get('/health').get_json()['admission'] == {'enabled': False}
+
+
+def test_batch_is_costed_by_its_longest_horizon(app):
+    profiles = {'currentAge': [30] * 999 + [0], 'retirementAge': [31] * 999 + [100],
+                'basicSalary': 100000}
+
+    with app.test_request_context():
+        cost = estimate_cost('calculator.retirement_projection_batch', {'profiles': profiles})
+
+    assert cost == 1000 * 100 // 25  # Every row is padded to 100 years
+
+
+@pytest.mark.parametrize('url, body', [
+    ('/api/calculator/retirement-projection/batch',
+     {'profiles': {'currentAge': [30] * 20000, 'retirementAge': 5000, 'basicSalary': 100000}}),
+    ('/api/calculator/monte-carlo',
+     {'currentAge': 30, 'retirementAge': 5000, 'basicSalary': 100000, 'paths': 100000}),
+    ('/api/calculator/retirement-projection',
+     {'currentAge': 30, 'retirementAge': 5000, 'basicSalary': 100000}),
+    ('/api/calculator/scenarios/compare',
+     {'scenarios': [PROJECTION] * 100 + [dict(PROJECTION, retirementAge=5000)]})
+])
+def test_over_long_horizons_are_refused_before_admission(client, url, body):
+    response = client.post(url, json=body)
+
+    assert response.status_code == 400
+    assert '100 years' in response.get_json()['message']
+    assert get_admission_controller().stats()['admitted'] == 0
+
+
+def test_over_long_job_horizons_are_refused(client, auth_headers):
+    response = client.post('/api/jobs', json={
+        'type': 'monteCarlo',
+        'payload': {'currentAge': 30, 'retirementAge': 5000, 'basicSalary': 100000}
+    }, headers=auth_headers())
+
+    assert response.status_code == 400
@@ -0,0 +1,64 @@
+"""
+Re-running a projection with assumptions that change part-way
+"""
+import pytest
+from app.routes.calculator import resume_from_changes
+from app.calculations import calculate_retirement_savings
+
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+URL = '/api/calculator/retirement-projection'
+
+
+def test_resumed_projection_matches_a_split_full_run(client):
+    resumed = client.post(URL, json=dict(PROJECTION, changes={'fromAge': 40, 'annualIncrement': 7}))
+    rows = client.post(URL + '?layout=rows', json=dict(
+        PROJECTION, changes={'fromYear': 11, 'annualIncrement': 7}
+    )).get_json()['data']['yearlyBreakdown']
+    unchanged = client.post(URL + '?layout=rows', json=PROJECTION).get_json()['data']['yearlyBreakdown']
+
+    assert resumed.status_code == 200
+    assert rows[:10] == unchanged[:10]
+    assert rows[10]['salary'] == pytest.approx(unchanged[9]['salary'] * 1.07, abs=0.01)
+
+
+def test_whole_number_floats_are_accepted():
+    table = calculate_retirement_savings(30, 60, 100000)['yearly_breakdown']
+    by_int, _ = resume_from_changes(table, PROJECTION, {'fromAge': 40})
+    by_float, _ = resume_from_changes(table, PROJECTION, {'fromAge': 40.0})
+
+    assert by_int['final_balance'] == by_float['final_balance']
+
+
+@pytest.mark.parametrize('changes,message', [
+    ({'fromAge': 40.5}, 'changes.fromAge must be a whole number'),
+    ({'fromYear': 2.5}, 'changes.fromYear must be a whole number'),
+    ({'fromAge': '40'}, 'changes.fromAge must be a number'),
+    ({'fromAge': True}, 'changes.fromAge must be a number'),
+    ({'fromAge': 40, 'annualIncrement': 'high'}, 'changes.annualIncrement must be a number'),
+    ({'fromAge': 40, 'retirementAge': 62.5}, 'retirementAge must be a whole number'),
+    ({'annualIncrement': 7}, 'changes.fromAge or changes.fromYear is required'),
+    ({'fromAge': 90}, 'from_year must be between 1 and 30'),
+    (['fromAge', 40], 'changes must be an object'),
+    ('fromAge=40', 'changes must be an object')
+])
+def test_invalid_changes_are_rejected(client, changes, message):
+    response = client.post(URL, json=dict(PROJECTION, changes=changes))
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid changes', 'message': message}
+
+
+def test_saved_calculation_resume_validates_changes(client, auth_headers):
+    headers = auth_headers()
+    projection = client.post(URL, json=PROJECTION).get_json()['data']
+    saved = client.post('/api/user/calculations', json={
+        'inputs': PROJECTION,
+        'results': projection
+    }, headers=headers).get_json()['data']
+    resume_url = f"/api/user/calculations/{saved['id']}/resume"
+
+    assert client.post(resume_url, json={'fromAge': 45, 'epfInterestRate': 10},
+                       headers=headers).status_code == 200
+    for body in ({'fromAge': 45.5}, [45], {'fromYear': 'ten'}):
+        response = client.post(resume_url, json=body, headers=headers)
+        assert response.status_code == 400
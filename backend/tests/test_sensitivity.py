@@ -0,0 +1,89 @@
+"""
+Sensitivity grids
+"""
+import tracemalloc
+import pytest
+
+BASE = {'currentAge': 30, 'basicSalary': 100000}
+URL = '/api/calculator/sensitivity'
+
+
+def test_grid_shape_and_axes(client):
+    response = client.post(URL, json=dict(BASE, ranges={
+        'epfInterestRate': {'start': 8, 'stop': 10, 'step': 0.5},
+        'annualIncrement': [3, 5],
+        'retirementAge': [55, 60, 65]
+    }))
+    data = response.get_json()['data']
+
+    assert response.status_code == 200
+    assert data['axes']['epfInterestRate'] == [8.0, 8.5, 9.0, 9.5, 10.0]
+    assert len(data['finalBalance']) == 5
+    assert len(data['finalBalance'][0]) == 2
+    assert len(data['finalBalance'][0][0]) == 1
+    assert len(data['finalBalance'][0][0][0]) == 3
+
+
+def test_oversized_range_is_rejected_before_expansion(make_app):
+    client = make_app(RATE_LIMIT_ENABLED=False).test_client()
+    # 50 million values if expanded (about 2 GB of Python floats)
+    body = dict(BASE, ranges={'epfInterestRate': {'start': 0, 'stop': 10, 'step': 2e-7}})
+
+    tracemalloc.start()
+    try:
+        response = client.post(URL, json=body)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Grid too large'
+    assert peak < 10 * 1024 * 1024
+
+
+def test_grid_product_is_checked(make_app):
+    client = make_app(SENSITIVITY_MAX_CELLS=100).test_client()
+    response = client.post(URL, json=dict(BASE, ranges={
+        'epfInterestRate': list(range(10)),
+        'annualIncrement': list(range(11))
+    }))
+
+    assert response.status_code == 400
+    assert '110 cells' in response.get_json()['message']
+
+
+@pytest.mark.parametrize('spec', [
+    [], {'start': 1, 'stop': 2}, {'start': 2, 'stop': 1, 'step': 1},
+    {'start': 1, 'stop': 2, 'step': 0}, {'start': 0, 'stop': 1e308, 'step': 1e-308},
+    {'start': 'a', 'stop': 'b', 'step': 1}, 'wide'
+])
+def test_invalid_axes_are_rejected(client, spec):
+    response = client.post(URL, json=dict(BASE, ranges={'annualIncrement': spec}))
+
+    assert response.status_code == 400
+
+
+def test_oversized_range_in_a_job_fails_cleanly(client, auth_headers, wait_for_job):
+    headers = auth_headers()
+    body = dict(BASE, ranges={'epfInterestRate': {'start': 0, 'stop': 10, 'step': 2e-7}})
+    job = client.post('/api/jobs', json={'type': 'sensitivity', 'payload': body},
+                      headers=headers).get_json()['data']
+
+    job = wait_for_job(client, headers, job['id'])
+    assert job['status'] == 'failed'
+    assert 'the limit is' in job['error']
+
+
+@pytest.mark.parametrize('ages', [[55, 60.5], 60.5, {'start': 55, 'stop': 60, 'step': 0.5}])
+def test_fractional_retirement_ages_are_rejected(client, ages):
+    response = client.post(URL, json=dict(BASE, ranges={'retirementAge': ages}))
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Ages must be whole numbers'
+
+
+def test_whole_float_retirement_ages_are_accepted(client):
+    response = client.post(URL, json=dict(BASE, ranges={'retirementAge': [55.0, 60.0]}))
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['axes']['retirementAge'] == [55, 60]
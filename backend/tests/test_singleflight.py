@@ -0,0 +1,121 @@
+"""
+Single-flight coalescing of identical concurrent requests
+"""
+import threading
+import time
+from app.singleflight import SingleFlight, SQLiteFlightStore, flights
+
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+
+
+def test_concurrent_callers_share_one_call():
+    single_flight = SingleFlight(timeout=5)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(single_flight.do('key', compute)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(single_flight.do('key', compute)))
+        for _ in range(4)
+    ]
+    for thread in followers:
+        thread.start()
+    while single_flight.stats()['followers'] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [('result', False)] + [('result', True)] * 4
+    assert single_flight.stats() == {'inFlight': 0, 'leaders': 1, 'followers': 4}
+
+
+def test_followers_receive_the_leaders_exception():
+    single_flight = SingleFlight(timeout=5)
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError('boom')
+
+    def call():
+        try:
+            single_flight.do('key', fail)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait(5)
+    threads.append(threading.Thread(target=call))
+    threads[1].start()
+    while single_flight.stats()['followers'] < 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ['boom', 'boom']
+
+
+def test_calls_are_not_cached_once_finished():
+    single_flight = SingleFlight()
+    assert single_flight.do('key', lambda: 1) == (1, False)
+    assert single_flight.do('key', lambda: 2) == (2, False)
+
+
+def test_shared_store_hands_the_leaders_response_to_other_workers(tmp_path):
+    path = str(tmp_path / 'flights.db')
+    leader = SQLiteFlightStore(path, lease=5, result_ttl=5)
+    follower = SQLiteFlightStore(path, lease=5, result_ttl=5)
+
+    assert leader.try_acquire('key')
+    assert not follower.try_acquire('key')
+    leader.publish('key', (200, [('Content-Type', 'application/json')], b'{}'))
+
+    assert follower.wait('key', timeout=1) == (200, [('Content-Type', 'application/json')], b'{}')
+
+
+def test_shared_store_wait_ends_when_leader_abandons(tmp_path):
+    path = str(tmp_path / 'flights.db')
+    leader = SQLiteFlightStore(path)
+    follower = SQLiteFlightStore(path)
+
+    leader.try_acquire('key')
+    leader.abandon('key')
+
+    assert follower.wait('key', timeout=1) is None
+    assert follower.try_acquire('key')
+
+
+def test_coalesced_route_returns_the_same_response(client):
+    leaders = flights.stats()['leaders']
+    direct = client.post('/api/calculator/retirement-projection', json=PROJECTION)
+    jittered = client.post('/api/calculator/retirement-projection',
+                           json=dict(PROJECTION, basicSalary=100000.00001))
+
+    assert direct.status_code == jittered.status_code == 200
+    assert direct.get_data() == jittered.get_data()
+    assert flights.stats()['leaders'] == leaders + 2  # Sequential: nothing to share
+
+
+def test_shared_mode_serves_requests(make_app):
+    client = make_app(SINGLE_FLIGHT_SHARED=True).test_client()
+    response = client.post('/api/calculator/retirement-projection', json=PROJECTION)
+
+    assert response.status_code == 200
+    assert response.get_json()['success']
@@ -0,0 +1,77 @@
+"""
+Profile and calculation history storage backends
+"""
+import pytest
+from app.storage import MemoryStorage, SQLiteStorage
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def storage(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryStorage()
+    return SQLiteStorage(str(tmp_path / 'app.db'))
+
+
+def read_all_pages(storage, uid, limit):
+    records, cursor = storage.list_calculations(uid, limit=limit)
+    pages = [records]
+    while cursor is not None:
+        records, cursor = storage.list_calculations(uid, limit=limit, cursor=cursor)
+        pages.append(records)
+    return pages
+
+
+def test_profiles(storage):
+    assert storage.get_profile('alice') is None
+    storage.save_profile('alice', {'basicSalary': 100000})
+    storage.save_profile('alice', {'basicSalary': 120000})
+
+    assert storage.get_profile('alice') == {'basicSalary': 120000}
+    assert storage.get_profile('bob') is None
+
+
+def test_history_pages_are_newest_first_without_gaps(storage):
+    ids = [storage.add_calculation('alice', 'projection', {'n': n}, {})['id'] for n in range(7)]
+    storage.add_calculation('bob', 'projection', {}, {})
+
+    pages = read_all_pages(storage, 'alice', limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [record['id'] for page in pages for record in page] == ids[::-1]
+
+
+def test_pages_follow_ids_even_when_clocks_disagree(tmp_path):
+    # Workers stamp created_at from their own clocks, so timestamps need not
+    # follow insertion order; the id cursor must still see every record once
+    storage = SQLiteStorage(str(tmp_path / 'app.db'))
+    ids = [storage.add_calculation('alice', 'projection', {'n': n}, {})['id'] for n in range(6)]
+    storage._connection.execute(
+        "UPDATE calculations SET created_at = '2000-01-01T00:00:00' WHERE id IN (?, ?)",
+        (ids[1], ids[4])
+    )
+
+    pages = read_all_pages(storage, 'alice', limit=2)
+
+    assert [record['id'] for page in pages for record in page] == ids[::-1]
+
+
+def test_history_query_uses_the_id_index(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / 'app.db'))
+    plan = storage._connection.execute(
+        'EXPLAIN QUERY PLAN ' + SQLiteStorage.SELECT_CALCULATIONS, ('alice', 100, 10)
+    ).fetchall()
+
+    details = ' '.join(row[-1] for row in plan)
+    assert 'idx_calculations_uid_id' in details
+    assert 'TEMP B-TREE' not in details  # No sort step
+
+
+def test_calculations_belong_to_their_owner(storage):
+    record = storage.add_calculation('alice', 'projection', {'a': 1}, {'b': 2})
+
+    assert storage.get_calculation('alice', record['id'])['inputs'] == {'a': 1}
+    assert storage.get_calculation('bob', record['id']) is None
+    assert not storage.delete_calculation('bob', record['id'])
+    assert storage.delete_calculation('alice', record['id'])
+    assert storage.get_calculation('alice', record['id']) is None
+    assert storage.list_calculations('alice') == ([], None)
@@ -0,0 +1,133 @@
+"""
+Streamed NDJSON/CSV exports of yearly breakdowns, batches and history
+"""
+import csv
+import io
+import json
+import pytest
+import app.routes.user as user_routes
+from app.routes.calculator import BATCH_COLUMNS, YEARLY_BREAKDOWN_COLUMNS
+from app.streaming import requested_stream_format, stream_rows
+
+PROJECTION = {'currentAge': 30, 'retirementAge': 60, 'basicSalary': 100000}
+PROJECTION_URL = '/api/calculator/retirement-projection'
+EXPORT_URL = '/api/user/calculations/export'
+
+
+def read_csv(response):
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.parametrize('query, accept, expected', [
+    ('', None, None),
+    ('', 'application/json', None),
+    ('', 'application/x-ndjson', 'ndjson'),
+    ('', 'text/csv', 'csv'),
+    ('?format=csv', 'application/x-ndjson', 'csv'),
+    ('?format=xml', 'text/csv', 'csv'),
+    ('?format=ndjson', None, 'ndjson')
+])
+def test_stream_format_negotiation(app, query, accept, expected):
+    headers = {'Accept': accept} if accept else {}
+    with app.test_request_context(f'/{query}', headers=headers):
+        assert requested_stream_format() == expected
+
+
+def test_rows_are_produced_while_streaming(app):
+    produced = []
+
+    def rows():
+        for index in range(3):
+            produced.append(index)
+            yield {'index': index, 'detail': {'nested': [index]}}
+
+    with app.test_request_context('/'):
+        response = stream_rows(rows(), 'csv', ['index', 'detail'], filename='rows')
+        assert response.is_streamed
+        assert produced == []
+        body = response.get_data(as_text=True)
+
+    assert produced == [0, 1, 2]
+    assert response.headers['Content-Disposition'] == 'attachment; filename="rows.csv"'
+    records = list(csv.DictReader(io.StringIO(body)))
+    assert [json.loads(record['detail']) for record in records] == [{'nested': [0]}, {'nested': [1]},
+                                                                   {'nested': [2]}]
+
+
+def test_csv_breakdown_matches_rows(client):
+    rows = client.post(f'{PROJECTION_URL}?layout=rows',
+                       json=PROJECTION).get_json()['data']['yearlyBreakdown']
+
+    response = client.post(f'{PROJECTION_URL}?format=csv', json=PROJECTION)
+
+    assert response.mimetype == 'text/csv'
+    assert 'retirement-projection.csv' in response.headers['Content-Disposition']
+    records = read_csv(response)
+    assert list(records[0]) == YEARLY_BREAKDOWN_COLUMNS
+    assert len(records) == len(rows) == 30
+    for record, row in zip(records, rows):
+        assert {column: float(value) for column, value in record.items()} == pytest.approx(row)
+
+
+def test_streamed_breakdown_with_changes(client):
+    body = dict(PROJECTION, changes={'fromAge': 45, 'annualIncrement': 8})
+    expected = client.post(f'{PROJECTION_URL}?layout=rows', json=body).get_json()['data']
+
+    response = client.post(PROJECTION_URL, json=body, headers={'Accept': 'application/x-ndjson'})
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert read_ndjson(response) == expected['yearlyBreakdown']
+
+
+def test_streamed_batch(client):
+    profiles = {'currentAge': [25, 30], 'retirementAge': [60, 55], 'basicSalary': [50000, 75000]}
+    expected = client.post('/api/calculator/retirement-projection/batch',
+                           json={'profiles': profiles}).get_json()['data']
+
+    response = client.post('/api/calculator/retirement-projection/batch?format=csv',
+                           json={'profiles': profiles})
+
+    records = read_csv(response)
+    assert list(records[0]) == BATCH_COLUMNS
+    assert [float(record['finalBalance']) for record in records] == pytest.approx(
+        expected['finalBalance'], abs=0.01)
+
+
+def test_history_export_covers_every_page(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(user_routes, 'MAX_HISTORY_LIMIT', 2)
+    headers = auth_headers()
+    saved = [
+        client.post('/api/user/calculations', json={'inputs': dict(PROJECTION, basicSalary=salary),
+                                                     'results': {}}, headers=headers).get_json()['data']
+        for salary in (50000, 60000, 70000, 80000, 90000)
+    ]
+
+    response = client.get(EXPORT_URL, headers=headers)
+
+    assert response.mimetype == 'application/x-ndjson'
+    exported = read_ndjson(response)
+    assert [record['id'] for record in exported] == [record['id'] for record in reversed(saved)]
+
+
+def test_history_export_as_csv(client, auth_headers):
+    headers = auth_headers()
+    client.post('/api/user/calculations', json={'inputs': PROJECTION, 'results': {'finalBalance': 1}},
+                headers=headers)
+
+    response = client.get(EXPORT_URL, headers=dict(headers, Accept='text/csv'))
+
+    records = read_csv(response)
+    assert list(records[0]) == user_routes.HISTORY_EXPORT_COLUMNS
+    assert json.loads(records[0]['inputs']) == PROJECTION
+    assert json.loads(records[0]['results']) == {'finalBalance': 1}
+
+
+def test_history_export_is_private(client, auth_headers):
+    client.post('/api/user/calculations', json={'inputs': PROJECTION}, headers=auth_headers('user-a'))
+
+    assert client.get(EXPORT_URL).status_code == 401
+    assert read_ndjson(client.get(EXPORT_URL, headers=auth_headers('user-b'))) == []
@@ -0,0 +1,103 @@
+"""
+Read-through cache for user profiles and the first history page
+"""
+from app.cache import get_cache, user_cache_enabled
+from app.routes.user import _invalidate, _read_through
+from app.storage import get_storage
+
+PROFILE = {'currentBasicSalary': 100000, 'age': 30}
+
+
+def test_profile_reads_are_cached_and_invalidated(client, auth_headers):
+    headers = auth_headers()
+    client.put('/api/user/profile', json=PROFILE, headers=headers)
+    first = client.get('/api/user/profile', headers=headers).get_json()['data']
+    hits = get_cache('users').stats()['hits']
+    second = client.get('/api/user/profile', headers=headers).get_json()['data']
+
+    assert first == second
+    assert get_cache('users').stats()['hits'] > hits
+
+    client.put('/api/user/profile', json={'currentBasicSalary': 150000}, headers=headers)
+    updated = client.get('/api/user/profile', headers=headers).get_json()['data']
+    assert updated['salaryProfile']['currentBasicSalary'] == 150000
+
+
+def test_history_page_is_invalidated_on_save_and_delete(client, auth_headers):
+    headers = auth_headers()
+    assert client.get('/api/user/calculations', headers=headers).get_json()['data'] == []
+
+    saved = client.post('/api/user/calculations', json={'inputs': PROFILE, 'results': {}},
+                        headers=headers).get_json()['data']
+    page = client.get('/api/user/calculations', headers=headers).get_json()['data']
+    assert [item['id'] for item in page] == [saved['id']]
+
+    client.delete(f"/api/user/calculations/{saved['id']}", headers=headers)
+    assert client.get('/api/user/calculations', headers=headers).get_json()['data'] == []
+
+
+def test_load_racing_with_a_write_is_not_served(app):
+    key = ('profile', 'user-a')
+    storage = {'value': 'old'}
+
+    def racing_load():
+        value = storage['value']
+        # Another request writes and invalidates while this load is running
+        storage['value'] = 'new'
+        _invalidate(key)
+        return value
+
+    assert _read_through(key, racing_load) == 'old'
+    assert _read_through(key, lambda: storage['value']) == 'new'
+    assert _read_through(key, lambda: 'unused') == 'new'
+
+
+def test_entries_from_an_older_format_are_reloaded(app):
+    key = ('profile', 'user-a')
+    get_cache('users').set(key, {'age': 1})
+
+    assert _read_through(key, lambda: {'age': 2}) == {'age': 2}
+
+
+def test_per_process_cache_is_off_with_shared_storage(make_app, auth_headers):
+    # Two workers sharing one SQLite file; a per-process cache in the first
+    # would miss the second's write
+    reader = make_app(STORAGE_BACKEND='sqlite').test_client()
+    assert not user_cache_enabled()
+    headers = auth_headers()
+
+    get_storage().save_profile('user-a', PROFILE)
+    profile = reader.get('/api/user/profile', headers=headers).get_json()['data']
+    assert profile['salaryProfile'] == PROFILE
+
+    get_storage().save_profile('user-a', dict(PROFILE, currentBasicSalary=150000))  # "Other worker"
+    profile = reader.get('/api/user/profile', headers=headers).get_json()['data']
+    assert profile['salaryProfile']['currentBasicSalary'] == 150000
+
+
+def test_per_process_cache_is_kept_with_per_process_storage(make_app):
+    make_app(STORAGE_BACKEND='memory')
+    assert user_cache_enabled()
+    make_app(USER_CACHE_ENABLED=False)
+    assert not user_cache_enabled()
+
+
+def test_evicting_entries_does_not_resurrect_stale_reads(make_app):
+    make_app(USER_CACHE_SIZE=2)
+    key = ('profile', 'user-a')
+    storage = {'value': 'old'}
+
+    def racing_load():
+        value = storage['value']
+        storage['value'] = 'new'
+        _invalidate(key)
+        return value
+
+    assert _read_through(key, racing_load) == 'old'
+    # Fill the cache past its size so everything else it held is evicted
+    for uid in ('user-b', 'user-c'):
+        _read_through(('profile', uid), lambda: 'other')
+        _read_through(key, lambda: storage['value'])
+
+    assert _read_through(key, lambda: storage['value']) == 'new'
+    assert get_cache('users').stats()['evictions'] > 0
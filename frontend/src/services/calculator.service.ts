@@ -39,7 +39,8 @@ export const calculateRetirementProjection = async (
   try {
     const response = await api.post(
       '/api/calculator/retirement-projection',
-      inputs
+      inputs,
+      { params: { layout: 'rows' } }
     );
     return response.data.data;
   } catch (error: any) {
@@ -41,7 +41,9 @@ export const getCalculationHistory = async (): Promise<
   CalculationHistory[]
 > => {
   try {
-    const response = await api.get('/api/user/calculations');
+    const response = await api.get('/api/user/calculations', {
+      params: { layout: 'rows' },
+    });
     return response.data.data;
   } catch (error: any) {
     console.error('Get calculation history error:', error);